@@ -0,0 +1 @@
+"""End-to-end benchmarks for the RATBALL governors and Ingestor."""
@@ -0,0 +1,380 @@
+"""
+Loopback benchmark: simulated rigs → local Ingestor.
+
+Every scenario starts one Ingestor process and, per simulated rig, one
+SensorGovernor process and (unless frame size is ``none``) one
+CameraGovernor process, all configured from a generated settings.yaml with
+the `sim` / `numpy` device backends.  Rigs stream for `--duration`
+seconds, then the Ingestor is stopped with SIGINT and the run is scored:
+
+  * samples/s and frames/s that reached the Ingestor's writers
+  * p50 / p99 / p99.9 sender → writer latency from the embedded timestamps
+    (``ingestor.latency_stats``)
+  * CPU seconds and utilisation per process
+  * dropped frames: gaps in the frame numbers `SimulatedCapture` stamps
+    into every frame, plus the source / ring drops seen on the rig
+
+The parameters named by the sweep options are crossed, and one JSON
+document with every scenario is written to `--out` (stdout by default).
+
+Usage
+-----
+python -m bench.harness --rates 200 400 --frame-sizes none 640x480 \\
+    --batch-sizes 1 64 --rigs 1 2 --duration 10 --out bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import signal
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from queue import Empty
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from loguru import logger
+
+from src.config import SETTINGS_ENV_VAR
+
+REPO_SETTINGS = Path(__file__).resolve().parent.parent / "settings.yaml"
+# the sensor I2C addresses only seed the simulated trajectories
+SIM_I2C_ADDR = [0x17, 0x67]
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    rate_hz: float
+    # (width, height), or None for sensor-only rigs
+    frame_size: Optional[Tuple[int, int]]
+    # 1 sends single records, > 1 sends batch frames of up to this many records
+    batch_size: int
+    rigs: int
+    ingestor_mode: str
+
+    def label(self) -> str:
+        frames = "x".join(map(str, self.frame_size)) if self.frame_size else "none"
+        return f"rate={self.rate_hz:g} frames={frames} batch={self.batch_size} rigs={self.rigs} mode={self.ingestor_mode}"
+
+
+# ---- process entry points
+
+
+def _init_child(settings_path: str, log_level: str) -> None:
+    os.environ[SETTINGS_ENV_VAR] = settings_path
+    logger.remove()
+    logger.add(sys.stderr, level=log_level)
+
+
+def _cpu_seconds() -> Dict[str, float]:
+    times = os.times()
+    return {"user": times.user, "system": times.system}
+
+
+def _run_ingestor(settings_path: str, log_level: str, results: mp.Queue) -> None:
+    _init_child(settings_path, log_level)
+    from src.config import RatballConfig
+
+    if RatballConfig().ingestor.mode == "asyncio":
+        from src.async_ingestor import AsyncIngestorService as Service
+    else:
+        from src.ingestor import IngestorService as Service
+
+    started = time.monotonic()
+    service = Service()
+    try:
+        service.start()
+    except KeyboardInterrupt:
+        service.stop()
+    results.put(("ingestor", {"cpu": _cpu_seconds(), "wall": time.monotonic() - started}))
+
+
+def _run_governor(name: str, kind: str, settings_path: str, log_level: str, duration: float, results: mp.Queue) -> None:
+    _init_child(settings_path, log_level)
+    from src.governors import CameraGovernor, SensorGovernor
+
+    started = time.monotonic()
+    governor = SensorGovernor() if kind == "sensor" else CameraGovernor()
+    timer = threading.Timer(duration, governor._tx_complete.set)
+    timer.start()
+    governor.run()
+    timer.cancel()
+
+    report: Dict[str, Any] = {"cpu": _cpu_seconds(), "wall": time.monotonic() - started}
+    if kind == "camera":
+        report["cameras"] = {
+            camera.sensor_id: {
+                "captured": camera.frames_captured,
+                "source_dropped": camera.sink_dropped,
+                "ring_dropped": camera.dropped_frames,
+            }
+            for camera in governor._manifest
+        }
+    results.put((name, report))
+
+
+# ---- scenario setup and scoring
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# TCP state LISTEN in /proc/net/tcp{,6}
+_TCP_LISTEN = "0A"
+
+
+def _listening(port: int) -> bool:
+    local = f":{port:04X}"
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as infile:
+                next(infile)
+                for line in infile:
+                    fields = line.split()
+                    if fields[1].endswith(local) and fields[3] == _TCP_LISTEN:
+                        return True
+        except FileNotFoundError:
+            continue
+    return False
+
+
+def _wait_for_port(port: int, timeout: float) -> None:
+    # watch the socket table rather than connect, so the measured Ingestor never sees a probe connection
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if _listening(port):
+            return
+        time.sleep(0.05)
+    raise TimeoutError(f"Ingestor didn't start listening on port {port} within {timeout}s")
+
+
+def _write_settings(path: Path, settings: Dict[str, Any]) -> str:
+    with open(path, "w") as outfile:
+        yaml.safe_dump(settings, outfile, sort_keys=False)
+    return str(path)
+
+
+def _scenario_settings(scenario: Scenario, base: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+    settings = json.loads(json.dumps(base))
+    settings["ingestor"].update(
+        ip="127.0.0.1",
+        gateway_port=_free_port(),
+        mode=scenario.ingestor_mode,
+        latency_stats=True,
+    )
+    # nothing listens here, so the BMI connection is refused immediately
+    settings["bmi"].update(ip="127.0.0.1", listen_port=_free_port())
+    settings["sensor"].update(
+        backend="sim",
+        i2c_addr=SIM_I2C_ADDR,
+        sim_rate_hz=scenario.rate_hz,
+        poll_rate_hz=scenario.rate_hz,
+        wire_mode="batch" if scenario.batch_size > 1 else "single",
+        batch_size=max(scenario.batch_size, 1),
+    )
+    if scenario.frame_size is not None:
+        width, height = scenario.frame_size
+        settings["camera"].update(backend="numpy", width=width, height=height, transport="tcp", segment_seconds=0)
+    settings["data_paths"] = {
+        "sensor": str(workdir / "sensor"),
+        "camera": str(workdir / "camera"),
+        "audio": str(workdir / "audio"),
+        "logs": str(workdir / "ratball.log"),
+    }
+    return settings
+
+
+def _score_camera_file(path: str, header_binfmt: str) -> Dict[str, int]:
+    """count received frames and frame-number gaps in an Ingestor camera capture file"""
+    header = struct.Struct(header_binfmt)
+    received = 0
+    first = last = None
+    with open(path, "rb") as infile:
+        while len(header_bytes := infile.read(header.size)) == header.size:
+            _, frame_sz, _ = header.unpack(header_bytes)
+            number = int.from_bytes(infile.read(8), "little")
+            infile.seek(frame_sz - 8, os.SEEK_CUR)
+            first = number if first is None else first
+            last = number
+            received += 1
+    span = 0 if first is None else last - first + 1
+    return {"received": received, "dropped": span - received}
+
+
+def _cpu_report(report: Dict[str, Any]) -> Dict[str, float]:
+    cpu = report["cpu"]
+    seconds = cpu["user"] + cpu["system"]
+    return {**cpu, "seconds": seconds, "utilisation": seconds / report["wall"] if report["wall"] > 0 else 0.0}
+
+
+def run_scenario(scenario: Scenario, duration: float, base_settings: Dict[str, Any], log_level: str) -> Dict[str, Any]:
+    ctx = mp.get_context("fork")
+    results: mp.Queue = ctx.Queue()
+    with tempfile.TemporaryDirectory(prefix="ratball_bench_") as tmp:
+        workdir = Path(tmp)
+        settings = _scenario_settings(scenario, base_settings, workdir)
+        ingestor_settings = _write_settings(workdir / "ingestor.yaml", settings)
+
+        ingestor = ctx.Process(target=_run_ingestor, args=(ingestor_settings, log_level, results), name="ingestor")
+        ingestor.start()
+        _wait_for_port(settings["ingestor"]["gateway_port"], timeout=10.0)
+
+        governors = []
+        for rig in range(scenario.rigs):
+            # distinct camera idents keep each rig's cameras in their own capture files
+            rig_settings = json.loads(json.dumps(settings))
+            rig_settings["camera"]["ident"] = [2 * rig, 2 * rig + 1]
+            rig_path = _write_settings(workdir / f"rig{rig}.yaml", rig_settings)
+            kinds = ("sensor", "camera") if scenario.frame_size is not None else ("sensor",)
+            for kind in kinds:
+                name = f"rig{rig}_{kind}"
+                governors.append(
+                    ctx.Process(target=_run_governor, args=(name, kind, rig_path, log_level, duration, results), name=name)
+                )
+        for governor in governors:
+            governor.start()
+
+        reports: Dict[str, Any] = {}
+        expected = len(governors)
+        deadline = time.monotonic() + duration + 30.0
+        while len(reports) < expected and time.monotonic() < deadline:
+            try:
+                name, report = results.get(timeout=1.0)
+                reports[name] = report
+            except Empty:
+                if not any(governor.is_alive() for governor in governors):
+                    break
+        # give the Ingestor a moment to drain its sockets before stopping it
+        time.sleep(0.5)
+        os.kill(ingestor.pid, signal.SIGINT)
+        try:
+            name, report = results.get(timeout=10.0)
+            reports[name] = report
+        except Empty:
+            logger.warning(f"Ingestor didn't report for scenario {scenario.label()}")
+
+        for process in (*governors, ingestor):
+            # the threaded Ingestor keeps non-daemon listener threads alive after stop()
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        latency: Dict[str, Any] = {}
+        for path in glob.glob(str(workdir / "sensor" / "*" / "latency.json")):
+            with open(path) as infile:
+                latency = json.load(infile)
+
+        cameras = {}
+        for path in sorted(glob.glob(str(workdir / "camera" / "*" / "camera*.bin"))):
+            stream = Path(path).stem
+            cameras[stream] = {
+                **_score_camera_file(path, settings["camera"]["frame_header_binfmt"]),
+                "latency_ms": latency.get(stream, {}).get("latency_ms"),
+            }
+            cameras[stream]["frames_per_s"] = cameras[stream]["received"] / duration
+        for name, report in reports.items():
+            for ident, counters in report.get("cameras", {}).items():
+                cameras.setdefault(f"camera{ident}", {"received": 0, "dropped": 0}).update(
+                    {f"rig_{key}": value for key, value in counters.items()}
+                )
+
+        sensor = latency.get("sensor", {"count": 0, "latency_ms": None})
+        return {
+            "scenario": {**asdict(scenario), "label": scenario.label()},
+            "sensor": {
+                "samples": sensor["count"],
+                "samples_per_s": sensor["count"] / duration,
+                "latency_ms": sensor["latency_ms"],
+            },
+            "cameras": cameras,
+            "dropped_frames": sum(camera["dropped"] for camera in cameras.values()),
+            "cpu": {name: _cpu_report(report) for name, report in sorted(reports.items())},
+            "missing_reports": sorted({"ingestor", *(g.name for g in governors)} - set(reports)),
+        }
+
+
+# ---- CLI
+
+
+def _frame_size(value: str) -> Optional[Tuple[int, int]]:
+    if value.lower() == "none":
+        return None
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RATBALL governors → Ingestor loopback benchmark")
+    parser.add_argument("--rates", type=float, nargs="+", default=[400.0], help="simulated sensor sample rates (Hz)")
+    parser.add_argument("--frame-sizes", type=_frame_size, nargs="+", default=[(640, 480)], help="WIDTHxHEIGHT, or `none` for sensor-only rigs")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64], help="sensor records per frame, 1 sends single records")
+    parser.add_argument("--rigs", type=int, nargs="+", default=[1], help="simulated rigs streaming concurrently")
+    parser.add_argument("--ingestor-modes", nargs="+", default=["asyncio"], choices=["asyncio", "threaded"])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds each scenario streams for")
+    parser.add_argument("--settings", default=str(REPO_SETTINGS), help="base settings.yaml the scenarios are derived from")
+    parser.add_argument("--log-level", default="WARNING", help="log level inside the benchmarked processes")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    with open(args.settings) as infile:
+        base_settings = yaml.safe_load(infile)
+
+    scenarios = [
+        Scenario(rate, frame_size, batch_size, rigs, mode)
+        for rate, frame_size, batch_size, rigs, mode in itertools.product(
+            args.rates, args.frame_sizes, args.batch_sizes, args.rigs, args.ingestor_modes
+        )
+    ]
+    report = {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "duration_s": args.duration,
+        },
+        "results": [],
+    }
+    for idx, scenario in enumerate(scenarios):
+        logger.info(f"[{idx + 1}/{len(scenarios)}] {scenario.label()}")
+        result = run_scenario(scenario, args.duration, base_settings, args.log_level)
+        logger.info(
+            f"{result['sensor']['samples_per_s']:.0f} samples/s, "
+            f"p99 {((result['sensor']['latency_ms'] or {}).get('p99', float('nan'))):.2f} ms, "
+            f"{result['dropped_frames']} dropped frames"
+        )
+        report["results"].append(result)
+
+    document = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as outfile:
+            outfile.write(document + "\n")
+    else:
+        print(document)
+
+
+if __name__ == "__main__":
+    main()
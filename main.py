@@ -5,6 +5,7 @@ from loguru import logger
 from src.config import RatballConfig
 from src.governors import SensorGovernor, SpeakerGovernor, CameraGovernor
 from src.ingestor import IngestorService
+from src.async_ingestor import AsyncIngestorService
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--ingestor", help="run the Ingestor service", action="store_true")
@@ -47,7 +48,10 @@ def run_ratball_client():
 def run_ingestor_service():
     init_logger()
 
-    ingestor_srv = IngestorService()
+    if RatballConfig().ingestor.mode == "asyncio":
+        ingestor_srv = AsyncIngestorService()
+    else:
+        ingestor_srv = IngestorService()
     ingestor_srv.start()
 
 def main():
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import struct
+import time
+
+from dataclasses import replace
+from datetime import datetime
+from loguru import logger
+from typing import Dict, Optional, Tuple
+
+from .config import RatballConfig
+from .dataclasses import SegmentIndexEntry
+from .sensor_store import open_sensor_store
+from .stats import LatencyRecorder
+from .clock import clock
+from .clock_sync import PeerClock
+from . import socket_profile
+from .ingestor import grant_wire_mode, server_handshake_binfmt
+from .protocol import (
+    SAME_CONNECTION_PORT,
+    WIRE_MODE_BATCH,
+    WIRE_MODE_SEGMENT,
+    CLOCK_PONG,
+    CONTROL_BATCH_COUNT,
+    CONTROL_FRAME_SIZE,
+)
+from .utils import safe_unwrap_exception
+
+
+# RATBALL Ingestor Server (asyncio mode)
+#
+# Speaks the same gateway/handshake protocol as `IngestorService`, but runs the gateway,
+# every per-device data socket and every file writer as coroutines on one event loop:
+#
+#  gateway ── hello ──> data server (one-shot, per device) ── reader ──> bounded queue ──> writer
+#
+# In single-port mode (`ingestor.single_port`) the data server step is skipped: the handshake
+# carries port 0 and the reader consumes the stream straight off the gateway connection.
+#
+# Readers await `put` on a bounded `asyncio.Queue`, so a slow writer stops the reader from
+# draining its socket and the kernel's TCP window pushes back on the device. Nothing polls:
+# with no traffic, the loop sleeps in the selector and the process idles at ~0% CPU.
+#
+# Framed data connections also get a clock-sync ping task (see `clock_sync`); readers rewrite
+# timestamps into the Ingestor's time base once the device has answered a ping.
+
+# sentinel marking the end of a device stream on its writer queue
+_END_OF_STREAM = None
+
+
+class AsyncIngestorService:
+    def __init__(self):
+        self._cfg = RatballConfig()
+
+        self._next_device_port: int = self._cfg.ingestor.data_port_range_start
+        self._stop: Optional[asyncio.Event] = None
+        # connection handlers (gateway and device readers) vs. everything they spawn (writers, pings):
+        # readers are cancelled first so their writers can still take the end-of-stream marker
+        self._readers = set()
+        self._tasks = set()
+        # one-shot data servers still waiting for their device to connect
+        self._data_servers = set()
+        # shared by every sensor stream of the session; the event loop serializes access
+        self._sensor_store = None
+        self._latency: Optional[LatencyRecorder] = LatencyRecorder() if self._cfg.ingestor.latency_stats else None
+
+        session_dirname = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+        self._data_dir = os.path.join(self._cfg.data_paths.sensor, session_dirname)
+        self._camera_dir = os.path.join(self._cfg.data_paths.camera, session_dirname)
+        self._init_data_dirs()
+
+    def _init_data_dirs(self):
+        logger.info(f"Creating sensor data directory at {self._data_dir}")
+        os.makedirs(self._data_dir, exist_ok=True)
+        logger.info(f"Creating camera data directory at {self._camera_dir}")
+        os.makedirs(self._camera_dir, exist_ok=True)
+
+    def _get_next_device_port(self) -> int:
+        """Return the next available data port number, then increment it (wrapping within the range)"""
+        port = self._next_device_port
+        self._next_device_port += 1
+        if self._next_device_port >= self._cfg.ingestor.data_port_range_end:
+            self._next_device_port = self._cfg.ingestor.data_port_range_start
+        return port
+
+    def _spawn(self, coro, name: str, reader: bool = False) -> asyncio.Task:
+        """start a tracked task, so shutdown can cancel whatever is still running"""
+        tasks = self._readers if reader else self._tasks
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    def _on_gateway_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """`start_server` callback: run the connection as a tracked reader task"""
+        self._spawn(self._handle_gateway_conn(reader, writer), "_gateway_conn_", reader=True)
+
+    # ----------------------------------------------------------- gateway
+
+    async def _handle_gateway_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """receive client hello, route the device to its data stream, then send handshake"""
+        addr = writer.get_extra_info("peername")
+        logger.info(f"Connection from: {addr}")
+        multiplexed = False
+        try:
+            hello = await reader.readexactly(struct.calcsize(self._cfg.ingestor.client_hello_binfmt))
+            device_enc, ident, ts, wire_mode = struct.unpack(self._cfg.ingestor.client_hello_binfmt, hello)
+            device = device_enc.decode("ascii")
+            logger.info(f"Got client hello from device {device}{ident}, ts={ts}, wire_mode={wire_mode}")
+
+            # fall back to single-record framing for any wire mode this device type can't use
+            wire_mode = grant_wire_mode(device, ident, wire_mode)
+
+            if self._cfg.ingestor.single_port:
+                writer.write(struct.pack(server_handshake_binfmt, SAME_CONNECTION_PORT, wire_mode))
+                await writer.drain()
+                multiplexed = True
+                await self._serve_device(device, ident, wire_mode, reader, writer)
+                return
+
+            port = await self._open_data_server(device, ident, wire_mode)
+            writer.write(struct.pack(server_handshake_binfmt, port, wire_mode))
+            await writer.drain()
+        except asyncio.IncompleteReadError:
+            logger.warning(f"Did not receive hello packet from client at {addr}")
+        except (struct.error, UnicodeDecodeError, OSError) as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Exception occurred while accepting new connection from {addr}: {exmsg}")
+        finally:
+            # `_serve_device` owns (and closes) multiplexed connections
+            if not multiplexed:
+                writer.close()
+
+    def _close_data_server(self, server: asyncio.AbstractServer) -> None:
+        server.close()
+        self._data_servers.discard(server)
+
+    async def _open_data_server(self, device: str, ident: int, wire_mode: int) -> int:
+        """bind the device's data port and serve exactly one connection on it"""
+        accepted = False
+
+        def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            nonlocal accepted
+            if accepted:
+                writer.close()
+                return
+            accepted = True
+            expiry.cancel()
+            self._close_data_server(server)
+            self._spawn(self._serve_device(device, ident, wire_mode, reader, writer), f"_read_{device}{ident}_", reader=True)
+
+        def on_timeout():
+            logger.warning(f"{device}{ident} never connected to its data port {port}, closing it")
+            self._close_data_server(server)
+
+        port = self._get_next_device_port()
+        listener = socket_profile.listen(port, self._cfg.sockets.for_device(device), f"{device}{ident}")
+        server = await asyncio.start_server(on_connect, sock=listener)
+        self._data_servers.add(server)
+        expiry = asyncio.get_running_loop().call_later(self._cfg.ingestor.data_accept_timeout_s, on_timeout)
+        logger.info(f"Assigned port {port} to {device}{ident}")
+        return port
+
+    # ----------------------------------------------------------- device streams
+
+    async def _serve_device(self, device, ident, wire_mode, reader, writer):
+        # data ports inherit their listener's profile, the gateway connection needs the device's
+        socket_profile.apply_profile(
+            writer.get_extra_info("socket"), self._cfg.sockets.for_device(device), f"{device}{ident}"
+        )
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._cfg.ingestor.queue_depth)
+        # single sensor records have no framing to carry a clock pong, so those streams are never pinged
+        peer = None
+        if self._cfg.ingestor.clock_sync_interval_s > 0 and (device == "camera" or wire_mode == WIRE_MODE_BATCH):
+            peer = PeerClock(f"{device}{ident}", self._cfg.ingestor.clock_sync_window)
+        if device == "sensor":
+            reader_coro = (
+                self._read_sensor_batches(reader, queue, peer)
+                if wire_mode == WIRE_MODE_BATCH
+                else self._read_sensor_records(reader, queue)
+            )
+            writer_coro = self._write_sensor_records(queue)
+        elif device == "camera" and wire_mode == WIRE_MODE_SEGMENT:
+            reader_coro = self._read_camera_segments(ident, reader, queue, peer)
+            writer_coro = self._write_camera_segments(ident, queue)
+        elif device == "camera":
+            reader_coro = self._read_camera_frames(reader, queue, peer)
+            writer_coro = self._write_camera_frames(ident, queue)
+        else:
+            logger.warning(f"No handler for device type {device}, closing connection")
+            writer.close()
+            return
+
+        logger.info(f"Receiving data stream from {device}{ident}")
+        write_task = self._spawn(writer_coro, f"_write_{device}{ident}_")
+        ping_task = self._spawn(self._ping_clock_peer(writer, peer), f"_ping_{device}{ident}_") if peer else None
+        stopping = False
+        try:
+            await reader_coro
+        except asyncio.CancelledError:
+            # Ingestor shutdown: `serve` finishes (or cancels) the writer after every reader is gone
+            stopping = True
+            raise
+        except asyncio.IncompleteReadError:
+            logger.info(f"Device {device}{ident} closed its data stream")
+        except (struct.error, OSError) as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Exception occurred while receiving data from {device}{ident}: {exmsg}")
+        finally:
+            if ping_task is not None:
+                ping_task.cancel()
+            writer.close()
+            try:
+                queue.put_nowait(_END_OF_STREAM)
+            except asyncio.QueueFull:
+                # never block here on a writer that may be cancelled; a tracked put is cancelled with it
+                self._spawn(queue.put(_END_OF_STREAM), f"_end_{device}{ident}_")
+            if not stopping:
+                await write_task
+
+    # ----------------------------------------------------------- clock sync
+
+    async def _ping_clock_peer(self, writer: asyncio.StreamWriter, peer: PeerClock):
+        """send a clock ping down the device's data connection every sync interval"""
+        interval = self._cfg.ingestor.clock_sync_interval_s
+        while peer.active:
+            await asyncio.sleep(interval)
+            # a device that isn't reading its pings mustn't grow the transport buffer without bound
+            if writer.transport.get_write_buffer_size() > 0:
+                continue
+            ping = peer.ping()
+            if ping is not None:
+                writer.write(ping)
+
+    async def _read_clock_pong(self, reader: asyncio.StreamReader, peer: Optional[PeerClock]):
+        """read the pong following a control frame header and fold it into the peer's estimate"""
+        pong = await reader.readexactly(CLOCK_PONG.size)
+        if peer is not None:
+            rtt = peer.pong(pong)
+            if self._latency is not None:
+                self._latency.record_ms(f"{peer.name}.rtt", rtt / 1e6)
+
+    async def _read_sensor_records(self, reader, queue):
+        record = struct.Struct(self._cfg.sensor.binfmt)
+        while True:
+            await queue.put((record.unpack(await reader.readexactly(record.size)),))
+
+    async def _read_sensor_batches(self, reader, queue, peer: Optional[PeerClock] = None):
+        header = struct.Struct(self._cfg.sensor.batch_header_binfmt)
+        record = struct.Struct(self._cfg.sensor.binfmt)
+        expected_seq = None
+        while True:
+            count, seq = header.unpack(await reader.readexactly(header.size))
+            if count == CONTROL_BATCH_COUNT:
+                await self._read_clock_pong(reader, peer)
+                continue
+            body = await reader.readexactly(count * record.size)
+            if expected_seq is not None and seq != expected_seq:
+                logger.warning(f"Sensor batch sequence gap: expected {expected_seq}, got {seq}")
+            expected_seq = (seq + 1) & 0xFFFFFFFF
+            # one queue item per batch keeps per-record overhead out of the event loop
+            if peer is not None and peer.synced:
+                offset_ms = peer.offset_ms
+                await queue.put(tuple((ts + offset_ms, x, y, h, idx) for ts, x, y, h, idx in record.iter_unpack(body)))
+            else:
+                await queue.put(tuple(record.iter_unpack(body)))
+
+    async def _read_camera_frames(self, reader, queue, peer: Optional[PeerClock] = None):
+        header = struct.Struct(self._cfg.camera.frame_header_binfmt)
+        while True:
+            header_bytes = await reader.readexactly(header.size)
+            cam_id, frame_sz, sent_ts = header.unpack(header_bytes)
+            if frame_sz == CONTROL_FRAME_SIZE:
+                await self._read_clock_pong(reader, peer)
+                continue
+            if peer is not None and peer.synced:
+                # stored headers carry the capture time in the Ingestor's time base
+                header_bytes = header.pack(cam_id, frame_sz, sent_ts + peer.offset_ns)
+            await queue.put((header_bytes, await reader.readexactly(frame_sz)))
+
+    async def _read_camera_segments(self, ident, reader, queue, peer: Optional[PeerClock] = None):
+        header = struct.Struct(self._cfg.camera.segment_header_binfmt)
+        chunk_size = 1 << 20
+        while True:
+            entry = SegmentIndexEntry(*header.unpack(await reader.readexactly(header.size)))
+            if entry.seq == CONTROL_FRAME_SIZE:
+                await self._read_clock_pong(reader, peer)
+                continue
+            if peer is not None and peer.synced:
+                entry = replace(entry, start_ts=entry.start_ts + peer.offset_ns, end_ts=entry.end_ts + peer.offset_ns)
+            await queue.put(entry)
+            remaining = entry.nbytes
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, chunk_size))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                await queue.put(chunk)
+                remaining -= len(chunk)
+
+    # ----------------------------------------------------------- writers
+
+    async def _write_sensor_records(self, queue):
+        if self._sensor_store is None:
+            logger.info(f"Writing {self._cfg.sensor.store} sensor store to {self._data_dir}")
+            self._sensor_store = open_sensor_store(self._cfg.sensor, self._data_dir)
+        store = self._sensor_store
+        poll_interval = self._cfg.sensor.flush_interval_ms / 1000
+        while True:
+            try:
+                records = await asyncio.wait_for(queue.get(), poll_interval)
+            except asyncio.TimeoutError:
+                # commit staged samples that aged out while the stream was idle
+                store.poll()
+                continue
+            if records is _END_OF_STREAM:
+                return
+            if self._latency is not None:
+                self._latency.record_epoch_ms("sensor", (record[0] for record in records))
+            store.extend(records)
+            store.poll()
+
+    async def _write_camera_frames(self, ident, queue):
+        header = struct.Struct(self._cfg.camera.frame_header_binfmt)
+        outpath = os.path.join(self._camera_dir, f"camera{ident}.bin")
+        frames = 0
+        window_start = time.perf_counter()
+        with open(outpath, "wb") as outfile:
+            while (item := await queue.get()) is not _END_OF_STREAM:
+                header_bytes, frame = item
+                if self._latency is not None:
+                    self._latency.record_epoch_ns(f"camera{ident}", header.unpack(header_bytes)[2])
+                # raw frames are large enough that disk writes must stay off the event loop
+                await asyncio.to_thread(outfile.writelines, (header_bytes, frame))
+                frames += 1
+                if frames % 300 == 0:
+                    elapsed = time.perf_counter() - window_start
+                    logger.info(f"Camera{ident} received {frames} frames, {300 / elapsed:.1f} fps over last window")
+                    window_start = time.perf_counter()
+        logger.info(f"Camera{ident} stream ended after {frames} frames, written to {outpath}")
+
+    async def _write_camera_segments(self, ident, queue):
+        index_path = os.path.join(self._camera_dir, f"camera{ident}_segments.csv")
+        outfile = None
+        entry: Optional[SegmentIndexEntry] = None
+        with open(index_path, "w") as index_file:
+            index_file.write("seq,start_ts,end_ts,frame_count,byte_offset,nbytes\n")
+            try:
+                while (item := await queue.get()) is not _END_OF_STREAM:
+                    if isinstance(item, SegmentIndexEntry):
+                        if outfile is not None:
+                            outfile.close()
+                        entry = item
+                        logger.info(f"Receiving video segment: {entry}")
+                        outfile = open(os.path.join(self._camera_dir, f"camera{ident}_{entry.seq:05d}.mkv"), "wb")
+                        index_file.write(
+                            f"{entry.seq},{entry.start_ts},{entry.end_ts},{entry.frame_count},{entry.byte_offset},{entry.nbytes}\n"
+                        )
+                        index_file.flush()
+                    else:
+                        await asyncio.to_thread(outfile.write, item)
+            finally:
+                if outfile is not None:
+                    outfile.close()
+
+    # ----------------------------------------------------------- lifecycle
+
+    async def serve(self):
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stop.set)
+
+        gateway = await asyncio.start_server(
+            self._on_gateway_conn,
+            sock=socket_profile.listen(self._cfg.ingestor.gateway_port, self._cfg.sockets.control, "gateway"),
+        )
+        logger.info(f"Listening for inbound clients on port {self._cfg.ingestor.gateway_port}")
+        await self._stop.wait()
+
+        # stop accepting first; waiting on the gateway must come after its connections are gone
+        gateway.close()
+        for server in list(self._data_servers):
+            self._close_data_server(server)
+        logger.info(f"Stopping Ingestor, cancelling {len(self._readers)} readers and {len(self._tasks)} other tasks")
+        # readers first: their writers are still running to take the end-of-stream marker
+        for task in list(self._readers):
+            task.cancel()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        if self._tasks:
+            # writers holding an end-of-stream marker get a moment to flush their backlog
+            await asyncio.wait(list(self._tasks), timeout=1.0)
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await gateway.wait_closed()
+        if self._sensor_store is not None:
+            self._sensor_store.close()
+        if self._latency is not None:
+            self._latency.dump(os.path.join(self._data_dir, "latency.json"))
+
+    def start(self):
+        clock.start_drift_monitor()
+        asyncio.run(self.serve())
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
@@ -1,8 +1,13 @@
 """
-Lock-free (GIL-protected) single-producer / single-consumer buffers.
-"Lock-free" here means **no user-code locks**; CPython’s
-GIL guarantees atomic pointer updates, and `threading.Condition`
-handles the occasional wait without busy-spinning.
+Single-producer / single-consumer buffers.
+
+`RingBuffer` and `DoubleBuffer` hold arbitrary Python objects and park
+waiting threads on `threading.Condition`.
+
+`FrameRing` holds fixed-shape frames in one preallocated slab and has no
+locks on the data path: the producer only ever advances *head*, the
+consumer only ever advances *tail*, and CPython's GIL makes each of those
+integer stores atomic.
 
 Usage
 -----
@@ -11,6 +16,14 @@ producer.put(frame)                            # non-blocking
 if buffer.ready():                             # consumer side
     for f in buffer.drain():
         socket_writer.send(f.pack())
+
+ring = FrameRing(capacity=300, shape=(720, 1280))
+slot = ring.acquire()                          # producer side
+if slot is not None:
+    cap.read(image=slot)
+    ring.commit(clock.now_ns())
+for view, ts in ring.drain():                  # consumer side, zero-copy
+    sock.sendall(view)
 """
 
 from __future__ import annotations
@@ -18,7 +31,9 @@ from __future__ import annotations
 import threading
 import time
 from collections.abc import Iterable
-from typing import Generic, List, Optional, TypeVar
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+import numpy as np
 
 T = TypeVar("T")
 
@@ -199,3 +214,136 @@ class DoubleBuffer(Generic[T]):
     def __len__(self) -> int:
         """Total elements across both rings (mostly for debugging)."""
         return len(self._front) + len(self._back)
+
+
+# ---------------------------------------------------------------------------
+#                          Preallocated frame ring
+# ---------------------------------------------------------------------------
+
+
+class FrameRing:
+    """SPSC ring of fixed-shape frames backed by one contiguous slab.
+
+    The slab (capacity × *shape*) is allocated once, so neither side
+    allocates or copies per frame: the producer fills the slot returned by
+    :pymeth:`acquire` in place and publishes it with :pymeth:`commit`, and
+    the consumer receives a ``memoryview`` of the slot which stays valid
+    until it calls :pymeth:`release`.
+
+    When the ring is full :pymeth:`acquire` returns ``None`` and the frame
+    is counted as dropped; the producer is never blocked by a slow consumer.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of frame slots.  Must be > 0.
+    shape : tuple of int
+        Shape of a single frame, e.g. ``(height, width)`` for GRAY8 or
+        ``(height, width, 3)`` for BGR.
+    dtype :
+        Element type of a frame, ``uint8`` for all supported pipelines.
+    """
+
+    __slots__ = (
+        "_capacity",
+        "_shape",
+        "_slab",
+        "_slots",
+        "_views",
+        "_timestamps",
+        "_head",
+        "_tail",
+        "_dropped",
+        "_not_empty",
+    )
+
+    def __init__(self, capacity: int, shape: Tuple[int, ...], dtype=np.uint8) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self._capacity: int = capacity
+        self._shape: Tuple[int, ...] = tuple(shape)
+        self._slab = np.empty((capacity, *self._shape), dtype=dtype)
+        # per-slot ndarray/memoryview handles are built once up front
+        self._slots = [self._slab[i] for i in range(capacity)]
+        self._views = [memoryview(slot).cast("B") for slot in self._slots]
+        self._timestamps: List[int] = [0] * capacity
+        # monotonically increasing counters; slot index is counter % capacity
+        self._head: int = 0  # written only by the producer
+        self._tail: int = 0  # written only by the consumer
+        self._dropped: int = 0
+        # only used to park an idle consumer, never taken on the write path
+        self._not_empty = threading.Event()
+
+    # ----------------------------------------------------------- producer API
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Return the next writable slot, or None (and count a drop) if full."""
+        if self._head - self._tail >= self._capacity:
+            self._dropped += 1
+            return None
+        return self._slots[self._head % self._capacity]
+
+    def commit(self, ts: int) -> None:
+        """Publish the slot returned by the last :pymeth:`acquire`."""
+        self._timestamps[self._head % self._capacity] = ts
+        self._head += 1
+        self._not_empty.set()
+
+    # ---------------------------------------------------------- consumer API
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[memoryview, int]]:
+        """Return (view, timestamp) of the oldest frame without releasing it.
+
+        Waits up to *timeout* seconds when empty (``None`` means don't wait).
+        """
+        if self._head == self._tail:
+            if timeout is None:
+                return None
+            self._not_empty.clear()
+            # re-check after clearing so a concurrent commit isn't missed
+            if self._head == self._tail and not self._not_empty.wait(timeout):
+                return None
+        idx = self._tail % self._capacity
+        return self._views[idx], self._timestamps[idx]
+
+    def release(self) -> None:
+        """Hand the oldest slot back to the producer."""
+        if self._head != self._tail:
+            self._tail += 1
+
+    def drain(self, timeout: Optional[float] = None) -> Iterable[Tuple[memoryview, int]]:
+        """Yield all committed frames; each view is released on the next iteration.
+
+        Waits up to *timeout* seconds for the first frame when the ring is empty.
+        """
+        while True:
+            record = self.get(timeout)
+            timeout = None
+            if record is None:
+                return
+            try:
+                yield record
+            finally:
+                self.release()
+
+    # --------------------------------------------------------------- stats
+
+    @property
+    def frame_nbytes(self) -> int:
+        return self._views[0].nbytes
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    @property
+    def full(self) -> bool:
+        return self._head - self._tail >= self._capacity
+
+    @property
+    def empty(self) -> bool:
+        return self._head == self._tail
@@ -1,89 +1,244 @@
 from __future__ import annotations
 
-import cv2
+import re
+import shutil
+import subprocess
 import threading
 import time
-from datetime import datetime, timezone
-from os import makedirs
-from typing import Iterable, Tuple, Optional
+from collections import deque
+from os import makedirs, path
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Tuple, Optional
+
+import numpy as np
+from loguru import logger
+
+try:
+    import cv2
+except ImportError:  # only the `numpy` backend works without OpenCV
+    cv2 = None
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    gi.require_version("GstPbutils", "1.0")
+    from gi.repository import GLib, Gst, GstPbutils
+except (ImportError, ValueError):  # fragment durations fall back to gst-discoverer-1.0
+    GstPbutils = None
+
+from .buffers import FrameRing
+from .clock import clock
+from .gst_encode import EncodePath, select_encode_path
+from .gst_pipeline import (
+    AppSinkBranch,
+    Caps,
+    EncodeBranch,
+    PipelineSpec,
+    Stages,
+    build_pipeline,
+    csi_source,
+    element,
+    latency_profile,
+    testsrc_source,
+)
+from .shm_ring import SharedFrameRing
+from .simulators import CAP_PROP_POS_MSEC, SimulatedCapture
+
+if TYPE_CHECKING:
+    from .config import CameraRoi
+
+camera_backends = ("csi", "videotestsrc", "numpy")
+
+_DISCOVERER_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+)\.(\d{9})")
+
+
+def _fragment_duration_ns(location: str) -> Optional[int]:
+    """running-time span of a finished splitmuxsink fragment, None if it can't be probed"""
+    if GstPbutils is not None:
+        if not Gst.is_initialized():
+            Gst.init(None)
+        try:
+            info = GstPbutils.Discoverer.new(10 * Gst.SECOND).discover_uri(Gst.filename_to_uri(location))
+        except GLib.Error:
+            return None
+        duration = info.get_duration()
+        return duration if 0 < duration != Gst.CLOCK_TIME_NONE else None
+    discoverer = shutil.which("gst-discoverer-1.0")
+    if discoverer is None:
+        return None
+    try:
+        out = subprocess.run([discoverer, location], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = _DISCOVERER_DURATION.search(out)
+    if match is None:
+        return None
+    hours, minutes, seconds, nanos = map(int, match.groups())
+    return ((hours * 60 + minutes) * 60 + seconds) * 1_000_000_000 + nanos or None
+
+
+# Jetson CSI frames leave NVMM rotated upright, the sensors are mounted upside down
+def _csi_upright() -> Stages:
+    return (element("nvvidconv", flip_method=2),)
+
+
+# overlay buffer-time in h:mm:ss.mmm format on recordings, which needs system memory
+def _timeoverlay(upright: bool) -> Stages:
+    convert = _csi_upright() if upright else ()
+    return (
+        *convert,
+        Caps("BGRx"),
+        element(
+            "timeoverlay", time_mode="running-time", halignment="left", valignment="top",
+            font_desc="Monospace, 28", shaded_background=True,
+        ),
+    )
+
+
+def _recording(
+    outpath: str, fps: int, bitrate: int, segment_seconds: int, encode: Optional[EncodePath], container: str = "mkv"
+) -> EncodeBranch:
+    return EncodeBranch(
+        encode or select_encode_path(),
+        outpath,
+        container=container,
+        bitrate=bitrate,
+        # one keyframe per second so every segment boundary falls exactly on a split point
+        key_int=fps if segment_seconds > 0 else 0,
+        split_ns=segment_seconds * 1_000_000_000,
+    )
 
-from .buffers import DoubleBuffer
+
+def _appsink(fmt: str, width: int, height: int, roi: Optional[CameraRoi]) -> AppSinkBranch:
+    """appsink branch delivering `roi` of the `width`×`height` frames, GRAY8 if it asks for gray"""
+    if roi is None:
+        return AppSinkBranch(fmt)
+    x, y, crop_width, crop_height = roi.rect(width, height)
+    crop = (x, y, width - x - crop_width, height - y - crop_height)
+    return AppSinkBranch(
+        "GRAY8" if roi.gray else fmt,
+        crop=crop if any(crop) else None,
+        scale=roi.output_size(width, height) if roi.decimate > 1 else None,
+    )
 
 
 # slams out low-resolution frames as fast as possible
-def gstreamer_dyn_pipeline(sensor_id: int, width: int, height: int, fps: int) -> str:
+def gstreamer_dyn_pipeline(
+    sensor_id: int, width: int, height: int, fps: int, profile: str = "realtime", roi: Optional[CameraRoi] = None,
+) -> str:
     """Jetson CSI → GRAY8 pipeline string (semi-)optimized for low-latency network transfer."""
-    return (
-        f"nvarguscamerasrc sensor-id={sensor_id} ! "
-        f"video/x-raw(memory:NVMM), width={width}, height={height}, "
-        f"format=NV12, framerate={fps}/1 ! "
-        f"nvvidconv flip-method=2 ! "
-        f"videoconvert ! video/x-raw, format=GRAY8 ! appsink"
+    spec = PipelineSpec(
+        source=csi_source(sensor_id, width, height, fps, fmt="NV12"),
+        convert=_csi_upright(),
+        branches=(_appsink("GRAY8", width, height, roi),),
     )
+    return build_pipeline(spec, latency_profile(profile))
 
 
 # saves mp4 to a predetermined (absolute) path
 def gstreamer_static_pipeline_mp4(
-    sensor_id: int, width: int, height: int, fps: int, outpath: str, bitrate: int = 2000
+    sensor_id: int, width: int, height: int, fps: int, outpath: str, bitrate: int = 2000,
+    encode: Optional[EncodePath] = None, profile: str = "realtime", roi: Optional[CameraRoi] = None,
 ) -> str:
-    """Jetson CSI → h264 MP4 pipeline string optimized for high quality output file."""
-    return (
-        f'nvarguscamerasrc sensor-id={sensor_id} ispdigitalgainrange="1 1" ! '
-        f"video/x-raw(memory:NVMM), width={width}, height={height}, framerate={fps}/1 ! "
-        # convert out of NVMM so the overlay element can work
-        f"nvvidconv ! video/x-raw, format=BGRx ! "
-        # overlay buffer-time in h:mm:ss.mmm format
-        f"timeoverlay time-mode=running-time halignment=left valignment=top "
-        f'font-desc="Monospace, 28" shaded-background=true ! '
-        # split the streams (don't cross them)
-        f"tee name=t "
-        # first branch goes to appsink (opencv)
-        f"t. ! queue ! videoconvert ! video/x-raw, format=BGR !"
-        f"appsink emit-signals=true "
-        #        f"drop=true max-buffers=30 "
-        # second branch streams to filesink (output mp4)
-        f"t. ! queue ! nvvidconv ! video/x-raw, format=I420 ! "
-        f"x264enc tune=zerolatency speed-preset=ultrafast bitrate={bitrate} ! mp4mux !"
-        f'filesink location="{outpath}.mp4" sync=false '
+    """Jetson CSI → h264 MP4 pipeline string optimized for high quality output file.
+
+    `encode` picks the recording encoder, by default NVENC when present (see `gst_encode`).
+    """
+    spec = PipelineSpec(
+        source=csi_source(sensor_id, width, height, fps, gain_range="1 1"),
+        convert=_timeoverlay(upright=True),
+        # first branch goes to appsink (opencv), second streams to the output file
+        branches=(_appsink("BGR", width, height, roi), _recording(outpath, fps, bitrate, 0, encode, container="mp4")),
     )
+    return build_pipeline(spec, latency_profile(profile))
 
 
 # saves mkv to a predetermined (absolute) path
 def gstreamer_static_pipeline_mkv(
-    sensor_id: int, width: int, height: int, fps: int, outpath: str, bitrate: int = 2000
+    sensor_id: int, width: int, height: int, fps: int, outpath: str, bitrate: int = 2000,
+    segment_seconds: int = 0, encode: Optional[EncodePath] = None, profile: str = "realtime",
+    roi: Optional[CameraRoi] = None,
 ) -> str:
-    """Jetson CSI → h264 Matroska pipeline string optimized for high quality output file."""
-    return (
-        f'nvarguscamerasrc sensor-id={sensor_id} ispdigitalgainrange="1 1" ! '
-        f"video/x-raw(memory:NVMM), width={width}, height={height}, framerate={fps}/1 ! "
-        # convert out of NVMM so the overlay element can work
-        f"nvvidconv flip-method=2 ! video/x-raw, format=BGRx ! "
-        # overlay buffer-time in h:mm:ss.mmm format
-        f"timeoverlay time-mode=running-time halignment=left valignment=top "
-        f'font-desc="Monospace, 28" shaded-background=true ! '
-        # split the streams (don't cross them!!)
-        f"tee name=t "
-        # first branch goes to appsink (opencv)
-        f"t. ! queue ! videoconvert ! video/x-raw, format=BGR !"
-        f"appsink emit-signals=true "
-        #        f"drop=true max-buffers=30 "
-        # second branch streams to filesink (output mp4)
-        f"t. ! queue ! nvvidconv ! video/x-raw, format=I420 ! "
-        # no on-board hardware encoders, use x264 and output to Matroska container
-        f"x264enc tune=zerolatency speed-preset=ultrafast bitrate={bitrate} ! "
-        f'splitmuxsink location="{outpath}.mkv" muxer=matroskamux '
+    """Jetson CSI → h264 Matroska pipeline string optimized for high quality output file.
+
+    With `segment_seconds` > 0, output is split into fixed-duration `{outpath}_%05d.mkv` segments.
+    `encode` picks the recording encoder, by default NVENC when present (see `gst_encode`).
+    """
+    spec = PipelineSpec(
+        source=csi_source(sensor_id, width, height, fps, gain_range="1 1"),
+        convert=_timeoverlay(upright=True),
+        branches=(_appsink("BGR", width, height, roi), _recording(outpath, fps, bitrate, segment_seconds, encode)),
     )
+    return build_pipeline(spec, latency_profile(profile))
+
 
+# hardware-free stand-ins for the CSI pipelines above, same appsink caps
+def gstreamer_testsrc_pipeline(
+    sensor_id: int, width: int, height: int, fps: int, profile: str = "realtime", roi: Optional[CameraRoi] = None,
+) -> str:
+    """videotestsrc → GRAY8 pipeline string matching `gstreamer_dyn_pipeline` caps."""
+    spec = PipelineSpec(
+        source=testsrc_source(sensor_id, width, height, fps),
+        branches=(_appsink("GRAY8", width, height, roi),),
+    )
+    return build_pipeline(spec, latency_profile(profile))
+
+
+def gstreamer_testsrc_pipeline_mkv(
+    sensor_id: int, width: int, height: int, fps: int, outpath: str, bitrate: int = 2000,
+    segment_seconds: int = 0, encode: Optional[EncodePath] = None, profile: str = "realtime",
+    roi: Optional[CameraRoi] = None,
+) -> str:
+    """videotestsrc → h264 Matroska pipeline string matching `gstreamer_static_pipeline_mkv` outputs."""
+    spec = PipelineSpec(
+        source=testsrc_source(sensor_id, width, height, fps),
+        branches=(_appsink("BGR", width, height, roi), _recording(outpath, fps, bitrate, segment_seconds, encode)),
+    )
+    return build_pipeline(spec, latency_profile(profile))
 
-FrameRecord = Tuple[bytes, bytes]
+
+# (zero-copy view of frame slot, capture timestamp in ns)
+FrameRecord = Tuple[memoryview, int]
 
 
 class Camera:
     """
-    Single-producer / single-consumer camera wrapper using a DoubleBuffer.
+    Single-producer / single-consumer camera wrapper using a FrameRing.
 
-    Producer: internal thread created by `start()`
+    Producer: internal thread created by `start()`, reads frames straight into ring slots
     Consumer: call `.drain()` from any other thread / async task
+
+    If `shm_name` is given, frames are instead read straight into a `SharedFrameRing`
+    of that name, which same-host processes attach to with a `SharedFrameReader`.
+
+    If `segment_seconds` is given along with `output_dir`, the camera instead records
+    fixed-duration H.264 segments and keeps per-segment frame timing for the sender.
+    splitmuxsink only splits on a keyframe once a fragment reaches `segment_seconds`, so
+    frames are attributed to segments by each finished fragment's running-time span rather
+    than by nominal `segment_seconds` buckets (see `segment_info`).
+
+    `backend` selects the frame source: `csi` (Jetson nvarguscamerasrc), `videotestsrc`
+    (same pipelines without camera hardware) or `numpy` (no GStreamer or OpenCV needed,
+    frames only - it can't record).
+
+    Recordings are encoded as `codec` (`h264` or `jpeg`); `encoder` picks NVENC/NVJPG
+    (`hardware`), the CPU (`software`) or whichever is present (`auto`), and the chosen
+    path is kept as `encode_path`.  `latency_profile` names the `gst_pipeline` profile
+    sizing the queue of each pipeline branch and the appsink.
+
+    `roi` crops, decimates and optionally grays frames before they enter the ring (and
+    so the socket and the Ingestor's files): inside the appsink branch of the built-in
+    pipelines, as a precomputed NumPy slicing view of a scratch frame for the `numpy`
+    backend and custom pipelines.  Recordings always keep the full frame.
+
+    Capture is paced by the source: the producer thread blocks in `read()`/`grab()` on an
+    appsink that (in the `realtime` profile) keeps only the newest buffer, so frames arrive at the sensor's own rate.
+    Each frame is stamped with its buffer PTS mapped onto the shared `clock`, i.e. when the
+    source produced it rather than when the thread got to it; PTS gaps larger than one frame
+    period are counted as frames the sink dropped (`sink_dropped`).
+
+    Cameras handed to a `SyncedCapture` are not `start()`ed: the coordinator paces them
+    together through `grab()` and `retrieve()` instead of the producer thread.
     """
 
     __slots__ = (
@@ -94,10 +249,29 @@ class Camera:
         "fps",
         "output_dir",
         "pipeline_str",
+        "encode_path",
+        "roi",
         "_outpath",
         "_capture_is_static",
         "_buffer",
+        "_frame_shape",
+        "_full_frame",
+        "_roi_view",
+        "_roi_gray",
+        "_shm",
+        "_segment_ns",
+        "_segment_lock",
+        "_segment_pending",
+        "_segment_start",
+        "_segment_next",
+        "_segment_frames",
         "_cap",
+        "_frame_period_ns",
+        "_pts_offset_ns",
+        "_last_pts_ns",
+        "_frame_pts_ns",
+        "_captured",
+        "_sink_dropped",
         "_stop_event",
         "_thread",
     )
@@ -112,7 +286,22 @@ class Camera:
         buffer_seconds: int = 10,
         output_dir: Optional[str] = None,
         pipeline_str: Optional[str] = None,
+        shm_name: Optional[str] = None,
+        shm_slots: int = 8,
+        segment_seconds: int = 0,
+        backend: str = "csi",
+        codec: str = "h264",
+        encoder: str = "auto",
+        latency_profile: str = "realtime",
+        roi: Optional[CameraRoi] = None,
     ) -> None:
+        if backend not in camera_backends:
+            raise ValueError(f"Unsupported camera backend: {backend}")
+        if backend != "numpy" and cv2 is None:
+            raise ImportError(f"OpenCV is required by the `{backend}` camera backend")
+        if backend == "numpy" and (output_dir is not None or pipeline_str is not None):
+            raise ValueError("The `numpy` camera backend can't record or run a custom pipeline")
+
         self.sensor_id = sensor_id
         self.capture_id = capture_id
         self.width = width
@@ -120,20 +309,39 @@ class Camera:
         self.fps = framerate
         self.output_dir = output_dir
         self.pipeline_str = pipeline_str
+        self.roi = roi
 
         self._outpath = (
             f"{output_dir}/{capture_id}_cam{sensor_id}" if output_dir is not None else None
         )
 
         self._capture_is_static = True if output_dir is not None else False
+        # only the built-in recording pipelines encode, probed once per process
+        self.encode_path: Optional[EncodePath] = (
+            select_encode_path(codec, encoder)
+            if self._capture_is_static and pipeline_str is None and backend != "numpy"
+            else None
+        )
 
-        # capacity = frames per second × seconds per ring
-        capacity = framerate * buffer_seconds
-        self._buffer: DoubleBuffer[FrameRecord] = DoubleBuffer(capacity)
+        # chunked video transfer bookkeeping: (running time, ts) of every frame not yet attributed,
+        # the running time the next unresolved segment starts at, and resolved segment seq ->
+        # (first ts, last ts, frame count)
+        self._segment_ns = segment_seconds * 1_000_000_000 if self._capture_is_static else 0
+        self._segment_lock = threading.Lock()
+        self._segment_pending: Deque[Tuple[int, int]] = deque()
+        self._segment_start: Optional[int] = None
+        self._segment_next = 0
+        self._segment_frames: Dict[int, Tuple[int, int, int]] = {}
 
         self._cap = None
+        static_pipeline = gstreamer_testsrc_pipeline_mkv if backend == "videotestsrc" else gstreamer_static_pipeline_mkv
+        dyn_pipeline = gstreamer_testsrc_pipeline if backend == "videotestsrc" else gstreamer_dyn_pipeline
+        # the built-in GStreamer pipelines apply the ROI themselves, other sources get a NumPy view below
+        pipeline_roi = roi if backend != "numpy" and self.pipeline_str is None else None
+        if backend == "numpy":
+            self._cap = SimulatedCapture(width, height, framerate, channels=1, seed=sensor_id)
         # use an externally supplied gstreamer pipeline command, if present
-        if self.pipeline_str is not None:
+        elif self.pipeline_str is not None:
             self._cap = cv2.VideoCapture(
                 self.pipeline_str,
                 cv2.CAP_GSTREAMER,
@@ -141,20 +349,76 @@ class Camera:
         # if `output_dir` is provided, write frames at that location and tee to cv2
         elif self._outpath is not None:
             self._cap = cv2.VideoCapture(
-                gstreamer_static_pipeline_mkv(
-                    sensor_id, width, height, framerate, self._outpath
+                static_pipeline(
+                    sensor_id, width, height, framerate, self._outpath,
+                    segment_seconds=segment_seconds if self._capture_is_static else 0,
+                    encode=self.encode_path,
+                    profile=latency_profile,
+                    roi=pipeline_roi,
                 ),
                 cv2.CAP_GSTREAMER,
             )
         else:
             self._cap = cv2.VideoCapture(
-                gstreamer_dyn_pipeline(sensor_id, width, height, framerate),
+                dyn_pipeline(sensor_id, width, height, framerate, profile=latency_profile, roi=pipeline_roi),
                 cv2.CAP_GSTREAMER,
             )
 
         if not self._cap.isOpened():
             raise RuntimeError(f"Camera {sensor_id} failed to open")
 
+        # appsink caps are known for the built-in pipelines; probe one frame for external ones
+        if self.pipeline_str is not None:
+            ret, probe = self._cap.read()
+            if not ret:
+                raise RuntimeError(f"Camera {sensor_id} produced no frame for shape probe")
+            self._frame_shape = probe.shape
+        elif self._capture_is_static:
+            self._frame_shape = (height, width, 3)
+        else:
+            self._frame_shape = (height, width)
+
+        # frames are read whole into `_full_frame`, and `_roi_view` slices the ROI out of it
+        self._full_frame: Optional[np.ndarray] = None
+        self._roi_view: Optional[np.ndarray] = None
+        self._roi_gray = False
+        full_height, full_width = self._frame_shape[:2]
+        if roi is not None:
+            out_width, out_height = roi.output_size(full_width, full_height)
+            if pipeline_roi is None:
+                x, y, _, _ = roi.rect(full_width, full_height)
+                step = roi.decimate
+                self._full_frame = np.empty(self._frame_shape, dtype=np.uint8)
+                self._roi_view = self._full_frame[y:y + out_height * step:step, x:x + out_width * step:step]
+                self._roi_gray = roi.gray and len(self._frame_shape) == 3
+            gray = roi.gray or len(self._frame_shape) == 2
+            roi_shape = (out_height, out_width) if gray else (out_height, out_width, self._frame_shape[2])
+            logger.info(
+                f"Camera{sensor_id} ROI {roi} in the {'pipeline' if pipeline_roi is not None else 'NumPy stage'}: "
+                f"{self._frame_shape} → {roi_shape}, "
+                f"{np.prod(self._frame_shape) / np.prod(roi_shape):.1f}x fewer bytes per frame"
+            )
+            self._frame_shape = roi_shape
+
+        # same-host transport, bypasses the in-process ring entirely, so only one of them is allocated;
+        # ring capacity = frames per second × seconds per ring, allocated once up front
+        self._shm = (
+            SharedFrameRing.create(shm_name, shm_slots, self._frame_shape)
+            if shm_name is not None
+            else None
+        )
+        self._buffer: Optional[FrameRing] = (
+            FrameRing(framerate * buffer_seconds, self._frame_shape) if self._shm is None else None
+        )
+
+        # PTS → monotonic mapping and capture counters, owned by the producer thread
+        self._frame_period_ns = int(1e9 / framerate)
+        self._pts_offset_ns: Optional[int] = None
+        self._last_pts_ns: Optional[int] = None
+        self._frame_pts_ns: Optional[int] = None
+        self._captured = 0
+        self._sink_dropped = 0
+
         self._stop_event = threading.Event()
         self._thread = threading.Thread(
             target=self._capture_loop, name=f"Cam{sensor_id}", daemon=True
@@ -165,80 +429,237 @@ class Camera:
         self._thread.start()
 
     def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
         self._stop_event.set()
-        self._thread.join(timeout=2.0)
+        # cameras driven by a `SyncedCapture` never start their own thread
+        if self._thread.ident is not None:
+            self._thread.join(timeout=2.0)
         self._cap.release()
+        if self._shm is not None:
+            self._shm.close()
 
     # ------------------------------------------------------------------ API (chunked video transfer strategy)
 
-        # TODO: send fixed-interval mkv or mp4 video chunks
+    @property
+    def segmented(self) -> bool:
+        return self._segment_ns > 0
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def segment_path(self, seq: int) -> str:
+        """Path of the `seq`-th segment written by splitmuxsink."""
+        return f"{self._outpath}_{seq:05d}.mkv"
+
+    def segment_complete(self, seq: int) -> bool:
+        """True once splitmuxsink has moved on from segment `seq` (or capture has stopped)."""
+        if not path.exists(self.segment_path(seq)):
+            return False
+        return self.stopped or path.exists(self.segment_path(seq + 1))
+
+    def segment_info(self, seq: int) -> Tuple[int, int, int]:
+        """(first frame ts, last frame ts, frame count) observed at the appsink for completed segment `seq`."""
+        with self._segment_lock:
+            while self._segment_next <= seq:
+                self._resolve_segment(self._segment_next)
+                self._segment_next += 1
+            return self._segment_frames.get(seq, (0, 0, 0))
+
+    def forget_segment(self, seq: int) -> None:
+        self._segment_frames.pop(seq, None)
+
+    # ------------------------------------------------------------------ API (externally paced capture)
+
+    def grab(self) -> Optional[int]:
+        """
+        Block until the next frame arrives and latch it without decoding.
+
+        Returns the frame's capture timestamp, or None if no frame was available.
+        Together with `retrieve` this splits a read, so a `SyncedCapture` can latch
+        every camera back-to-back before paying for any decode.
+        """
+        if not self._cap.grab():
+            return None
+        return self._frame_ts()
+
+    def retrieve(self, ts: int) -> bool:
+        """decode the last grabbed frame into the next ring (or shared-memory) slot, stamped `ts`"""
+        if self._shm is not None:
+            slot = self._shm.begin_write()
+            commit = self._shm.commit
+        else:
+            slot = self._buffer.acquire()
+            if slot is None:
+                # consumer stalled: the grabbed frame is discarded and counted by the ring
+                return True
+            commit = self._buffer.commit
+        target = slot if self._full_frame is None else self._full_frame
+        ret, frame = self._cap.retrieve(image=target)
+        if not ret:
+            return False
+        if frame is not target:
+            # OpenCV reallocated because the negotiated caps differ from the slot shape
+            target[...] = frame.reshape(target.shape)
+        if self._roi_gray:
+            cv2.cvtColor(self._roi_view, cv2.COLOR_BGR2GRAY, dst=slot)
+        elif self._roi_view is not None:
+            # the only copy of the ROI: strided view of the full frame into the slot
+            np.copyto(slot, self._roi_view)
+        commit(ts)
+        return True
 
     # ------------------------------------------------------------------ API (per-frame transfer strategy)
 
-    def drain(self) -> Iterable[FrameRecord]:
-        """Yield all queued (frame, timestamp) pairs in FIFO order."""
-        yield from self._buffer.drain()
-
-    def pop(self) -> FrameRecord:
-        """Remove and return (frame, timestamp) pair from buffer in FIFO order."""
-        if self._buffer.ready():
-            return self._buffer.pop()
-        else:
-            pass
+    def drain(self, timeout: Optional[float] = None) -> Iterable[FrameRecord]:
+        """Yield all queued (frame, timestamp) pairs in FIFO order.
+
+        Frames are views into the ring and are only valid until the next iteration.
+        Waits up to `timeout` seconds for the first frame if none are queued.
+        """
+        yield from self._ring().drain(timeout)
+
+    def pop(self) -> Optional[FrameRecord]:
+        """Remove and return (frame, timestamp) pair from buffer in FIFO order as an owned copy."""
+        record = self._ring().get()
+        if record is None:
+            return None
+        view, ts = record
+        frame = bytes(view)
+        self._buffer.release()
+        return frame, ts
+
+    @property
+    def frame_shape(self) -> Tuple[int, ...]:
+        """shape of the frames in the ring, after the ROI stage"""
+        return self._frame_shape
+
+    @property
+    def frame_nbytes(self) -> int:
+        return int(np.prod(self._frame_shape))
+
+    @property
+    def dropped_frames(self) -> int:
+        """frames discarded because the ring was full, always 0 for shared memory, which overwrites"""
+        return self._buffer.dropped if self._buffer is not None else 0
+
+    @property
+    def frames_captured(self) -> int:
+        """frames read from the appsink"""
+        return self._captured
+
+    @property
+    def sink_dropped(self) -> int:
+        """frames the source produced but the appsink discarded before they were read"""
+        return self._sink_dropped
 
     # ----------------------------------------------------------- internals
 
-    def _capture_loop(self) -> None:
-        if self._capture_is_static:
-            ret, frame = self._cap.read()
-            if not ret:
-                print("[static pipeline] no frame available yet, continuing")
-            try:
-                ns_since_epoch = time.perf_counter_ns()
-                self._buffer.put((frame.tobytes(), ns_since_epoch), drop_if_full=False)
-            except BufferError:
-                pass
-        else:
-            """Producer thread"""
-            frame_interval = 2.0 / self.fps
-            next_frame_time = time.monotonic()
-
-            while not self._stop_event.is_set():
-                # Busy-wait until the next frame deadline
-                sleep_time = next_frame_time - time.monotonic()
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-
-                ret, frame = self._cap.read()
-                if not ret:
-                    # Simple error handling: skip this frame
-                    print(f"skipped frame @ ival:{frame_interval}")
-                    continue
-
-                next_frame_time += frame_interval
-                # Generate metadata
-                ts = datetime.now(timezone.utc)
-                # ms_since_epoch = unix_time_millis(ts)
-                ns_since_epoch = time.perf_counter_ns()
-                # ts_packed = struct.pack("d", ms_since_epoch)
-
-                # Disabling for now in favor of gstreamer `timeoverlay`
-                # cv2.putText(
-                #     frame,
-                #     ts.strftime("%H:%M:%S.%f")[:-3],
-                #     (10, 40),
-                #     cv2.FONT_HERSHEY_SIMPLEX,
-                #     1,
-                #     (255, 255, 255),
-                #     2,
-                # )
-
-                try:
-                    self._buffer.put(
-                        (frame.tobytes(), ns_since_epoch), drop_if_full=False
-                    )
-                except BufferError:
-                    # Both rings full and drop_if_full=False → we block
-                    # OR propagate – choose policy appropriate for experiment
-                    pass
+    def _ring(self) -> FrameRing:
+        if self._buffer is None:
+            raise RuntimeError(f"Camera{self.sensor_id} publishes to shared memory, read it with a SharedFrameReader")
+        return self._buffer
+
+    def _frame_ts(self) -> int:
+        """
+        Capture time of the frame just grabbed, as epoch ns on the shared `clock`.
+
+        The appsink reports the buffer PTS as pipeline running time.  The offset
+        from running time to the monotonic clock is the smallest `now - pts`
+        seen so far, i.e. the least-delayed read, so timestamps keep the
+        source's frame spacing regardless of when the thread reads them; the
+        pipeline's minimum latency is the only part not accounted for.  Without
+        a PTS the read time is used.
+        """
+        now = time.monotonic_ns()
+        self._captured += 1
+        pts_ms = self._cap.get(CAP_PROP_POS_MSEC)
+        if not pts_ms or pts_ms <= 0:
+            self._frame_pts_ns = None
+            return clock.to_epoch_ns(now)
+        pts = self._frame_pts_ns = int(pts_ms * 1e6)
+
+        if self._last_pts_ns is not None:
+            if pts < self._last_pts_ns:
+                # the pipeline restarted its running time, remap from scratch
+                self._pts_offset_ns = None
+            else:
+                skipped = round((pts - self._last_pts_ns) / self._frame_period_ns) - 1
+                if skipped > 0:
+                    self._sink_dropped += skipped
+        self._last_pts_ns = pts
+
+        offset = now - pts
+        if self._pts_offset_ns is None or offset < self._pts_offset_ns:
+            self._pts_offset_ns = offset
+        return clock.to_epoch_ns(pts + self._pts_offset_ns)
+
+    def _read_into_ring(self) -> bool:
+        """read the next frame directly into a free ring (or shared-memory) slot"""
+        ts = self.grab()
+        return ts is not None and self.retrieve(ts)
+
+    def _mark_segment_frame(self, ts: int) -> None:
+        """queue a captured frame for attribution once its segment is finished"""
+        # the appsink and splitmuxsink see the same buffers, so the PTS is the fragment's running time
+        running_time = self._frame_pts_ns if self._frame_pts_ns is not None else ts
+        with self._segment_lock:
+            self._segment_pending.append((running_time, ts))
+
+    def _resolve_segment(self, seq: int) -> None:
+        """
+        Attribute the pending frames that belong to finished segment `seq`.
+
+        The segment starts at the running time of the first frame not claimed
+        by its predecessor and spans the fragment's probed duration; the
+        boundary is snapped to the nearest frame, so a duration rounded by the
+        muxer doesn't accumulate across segments.  The last segment of a
+        stopped camera takes every remaining frame.
+        """
+        pending = self._segment_pending
+        half_period = self._frame_period_ns // 2
+        # re-anchor on the first unclaimed frame unless the sink dropped the segment's real first frame
+        if pending and (self._segment_start is None or abs(pending[0][0] - self._segment_start) < half_period):
+            self._segment_start = pending[0][0]
+        bound = None
+        if not (self.stopped and not path.exists(self.segment_path(seq + 1))) and self._segment_start is not None:
+            duration = _fragment_duration_ns(self.segment_path(seq))
+            if duration is None:
+                # keyframes every second make a full fragment the likeliest split
+                logger.warning(f"Camera{self.sensor_id} segment {seq} duration unknown, assuming {self._segment_ns / 1e9:g} s")
+                duration = self._segment_ns
+            bound = self._segment_start + duration - half_period
+        first_ts = last_ts = count = 0
+        while pending and (bound is None or pending[0][0] < bound):
+            _, last_ts = pending.popleft()
+            if count == 0:
+                first_ts = last_ts
+            count += 1
+        if bound is not None:
+            self._segment_start = bound + half_period
+        self._segment_frames[seq] = (first_ts, last_ts, count)
 
+    def _capture_loop(self) -> None:
+        """Producer thread: every read blocks on the appsink, so the source sets the pace"""
+        failures = 0
+        while not self._stop_event.is_set():
+            if self.segmented:
+                # frames travel as encoded segments; only drain the appsink and keep timing
+                ok = self._cap.grab()
+                if ok:
+                    self._mark_segment_frame(self._frame_ts())
+            else:
+                ok = self._read_into_ring()
+            if ok:
+                failures = 0
+                continue
+            failures += 1
+            if failures == 1:
+                logger.warning(f"Camera{self.sensor_id} read failed, retrying")
+            # no buffer (pipeline prerolling or at EOS): back off a frame instead of spinning
+            self._stop_event.wait(self._frame_period_ns / 1e9)
+        logger.info(
+            f"Camera{self.sensor_id} capture stopped after {self._captured} frames, "
+            f"{self._sink_dropped} dropped by the sink, {self.dropped_frames} by the ring"
+        )
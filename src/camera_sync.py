@@ -0,0 +1,235 @@
+"""
+Synchronized multi-camera capture.
+
+Each `Camera` normally reads from its own producer thread, so the frames of
+two cameras are latched at unrelated times and stereo or behaviour pipelines
+have to re-pair them offline.  `SyncedCapture` instead paces every camera
+from one coordinator thread, one frame set per cycle:
+
+  1. grab     - `Camera.grab()` on every camera back-to-back, latching each
+                camera's next frame without decoding it
+  2. align    - a camera whose frame is more than half a frame period older
+                than the newest one is grabbed once more, taking its next frame
+  3. retrieve - one worker thread per camera decodes its latched frame into
+                the camera's ring in parallel (OpenCV releases the GIL while
+                converting), and the cycle ends once all of them are done
+
+Each cycle produces a `FrameSet` holding every camera's capture timestamp and
+the skew between the earliest and latest of them.  Frames still travel
+through their camera's own ring and stream, stamped with their own timestamp;
+the frame-set index, optionally written as CSV, pairs them afterwards.  Clock
+sync may shift stored timestamps by a few microseconds per connection, so
+match index timestamps to frames within half a frame period, not exactly.
+
+Usage
+-----
+sync = SyncedCapture(cameras, max_skew_ms=5.0, index_path="230101_1200_framesets.csv")
+sync.start()                                    # instead of camera.start()
+...
+sync.stop()                                     # before camera.stop()
+sync.last.timestamps, sync.last.skew_ms
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from .camera import Camera
+
+
+@dataclass(frozen=True, slots=True)
+class FrameSet:
+    """one synchronized capture cycle: per-camera timestamps (epoch ns) in manifest order"""
+
+    seq: int
+    timestamps: Tuple[int, ...]
+    skew_ns: int
+
+    @property
+    def skew_ms(self) -> float:
+        return self.skew_ns / 1e6
+
+
+class SyncedCapture:
+    """
+    Paces a group of cameras together and records the frame set of every cycle.
+
+    Parameters
+    ----------
+    cameras : sequence of Camera
+        Cameras to capture together.  They must not be started; the
+        coordinator drives them through `grab` and `retrieve`.
+    max_skew_ms : float
+        Frame sets with a larger skew are counted (and logged) as out of sync.
+    index_path : str, optional
+        CSV file receiving one line per frame set:
+        ``seq,skew_ns,cam<ident>_ts,...``.
+    """
+
+    __slots__ = (
+        "_cameras",
+        "_period_ns",
+        "_max_skew_ns",
+        "_index_path",
+        "_timestamps",
+        "_retrieved",
+        "_begin",
+        "_end",
+        "_stop_event",
+        "_thread",
+        "_workers",
+        "sets",
+        "out_of_sync",
+        "realigned",
+        "incomplete",
+        "max_skew_ns",
+        "_total_skew_ns",
+        "last",
+    )
+
+    def __init__(
+        self,
+        cameras: Sequence[Camera],
+        max_skew_ms: float = 5.0,
+        index_path: Optional[str] = None,
+    ) -> None:
+        if not cameras:
+            raise ValueError("SyncedCapture needs at least one camera")
+        if any(camera.segmented for camera in cameras):
+            raise ValueError("Segmented cameras capture independently, synchronized capture needs per-frame transport")
+
+        self._cameras = tuple(cameras)
+        self._period_ns = int(1e9 / min(camera.fps for camera in self._cameras))
+        self._max_skew_ns = int(max_skew_ms * 1e6)
+        self._index_path = index_path
+
+        # per-cycle hand-off to the retrieve workers, indexed in manifest order
+        self._timestamps: List[Optional[int]] = [None] * len(self._cameras)
+        self._retrieved: List[bool] = [False] * len(self._cameras)
+        # the coordinator and every worker meet before the retrieves and again after them
+        self._begin = threading.Barrier(len(self._cameras) + 1)
+        self._end = threading.Barrier(len(self._cameras) + 1)
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._capture_loop, name="CamSync", daemon=True)
+        self._workers = [
+            threading.Thread(target=self._retrieve_loop, args=(idx,), name=f"CamSync{camera.sensor_id}", daemon=True)
+            for idx, camera in enumerate(self._cameras)
+        ]
+
+        self.sets = 0
+        self.out_of_sync = 0
+        self.realigned = 0
+        self.incomplete = 0
+        self.max_skew_ns = 0
+        self._total_skew_ns = 0
+        self.last: Optional[FrameSet] = None
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        # let the coordinator finish its cycle, then release workers parked on the barrier
+        self._thread.join(timeout=2.0)
+        self._begin.abort()
+        self._end.abort()
+        for worker in self._workers:
+            worker.join(timeout=2.0)
+
+    @property
+    def mean_skew_ms(self) -> float:
+        return self._total_skew_ns / self.sets / 1e6 if self.sets else 0.0
+
+    # ----------------------------------------------------------- internals
+
+    def _grab_all(self) -> bool:
+        """latch one frame per camera, re-grabbing cameras that latched a stale frame"""
+        timestamps = self._timestamps
+        for idx, camera in enumerate(self._cameras):
+            timestamps[idx] = camera.grab()
+            if timestamps[idx] is None:
+                return False
+        newest = max(timestamps)
+        for idx, camera in enumerate(self._cameras):
+            if newest - timestamps[idx] > self._period_ns // 2:
+                # the sink still held this camera's previous frame, its next one is closer
+                timestamps[idx] = camera.grab()
+                if timestamps[idx] is None:
+                    return False
+                self.realigned += 1
+        return True
+
+    def _capture_set(self) -> Optional[FrameSet]:
+        """run one grab/align/retrieve cycle, returning its frame set or None if a camera failed"""
+        if not self._grab_all():
+            self.incomplete += 1
+            return None
+        self._begin.wait()
+        self._end.wait()
+        if not all(self._retrieved):
+            self.incomplete += 1
+            return None
+
+        timestamps = tuple(self._timestamps)
+        frameset = FrameSet(self.sets, timestamps, max(timestamps) - min(timestamps))
+        self.sets += 1
+        self._total_skew_ns += frameset.skew_ns
+        self.max_skew_ns = max(self.max_skew_ns, frameset.skew_ns)
+        if frameset.skew_ns > self._max_skew_ns:
+            self.out_of_sync += 1
+            if self.out_of_sync == 1:
+                logger.warning(f"Frame set {frameset.seq} skewed by {frameset.skew_ms:.3f} ms, over {self._max_skew_ns / 1e6} ms")
+        self.last = frameset
+        return frameset
+
+    def _retrieve_loop(self, idx: int) -> None:
+        """worker thread: decode this camera's latched frame once per cycle"""
+        camera = self._cameras[idx]
+        try:
+            while True:
+                self._begin.wait()
+                self._retrieved[idx] = camera.retrieve(self._timestamps[idx])
+                self._end.wait()
+        except threading.BrokenBarrierError:
+            return
+
+    def _capture_loop(self) -> None:
+        """coordinator thread: every grab blocks on the appsinks, so the slowest camera sets the pace"""
+        index = open(self._index_path, "w") if self._index_path is not None else None
+        failures = 0
+        try:
+            if index is not None:
+                columns = ",".join(f"cam{camera.sensor_id}_ts" for camera in self._cameras)
+                index.write(f"seq,skew_ns,{columns}\n")
+            while not self._stop_event.is_set():
+                frameset = self._capture_set()
+                if frameset is None:
+                    failures += 1
+                    if failures == 1:
+                        logger.warning("Synchronized capture missed a frame set, retrying")
+                    # no buffer (pipeline prerolling or at EOS): back off a frame instead of spinning
+                    self._stop_event.wait(self._period_ns / 1e9)
+                    continue
+                failures = 0
+                if index is not None:
+                    index.write(f"{frameset.seq},{frameset.skew_ns},{','.join(map(str, frameset.timestamps))}\n")
+        except threading.BrokenBarrierError:
+            # `stop()` gave up waiting on a blocked grab and aborted the cycle
+            pass
+        finally:
+            if index is not None:
+                index.close()
+        logger.info(
+            f"Synchronized capture stopped after {self.sets} frame sets: skew mean {self.mean_skew_ms:.3f} ms, "
+            f"max {self.max_skew_ns / 1e6:.3f} ms, {self.out_of_sync} out of sync, "
+            f"{self.realigned} realigned grabs, {self.incomplete} incomplete"
+        )
@@ -0,0 +1,123 @@
+"""
+Shared time base for every device on a host.
+
+The wall clock is read once, together with the monotonic clock, to form an
+anchor; after that a timestamp is one `time.monotonic_ns()` call plus a
+precomputed offset, so it is cheap, never jumps backwards when NTP steps
+the wall clock, and every device (sensors, cameras, microphone) stamps in
+the same domain:
+
+  * `now_ms()` - epoch milliseconds as a float, the sensor/audio wire format
+  * `now_ns()` - epoch nanoseconds as an int, the camera frame header format
+
+Because the monotonic clock isn't disciplined by NTP, the anchored epoch
+slowly drifts from the wall clock.  `drift_ms()` measures it, and
+`start_drift_monitor()` logs it periodically; `reanchor()` re-reads the wall
+clock and should only be called at a point where a step in the timestamps
+is acceptable (e.g. between sessions).
+
+Usage
+-----
+from .clock import clock
+ts = clock.now_ms()
+clock.start_drift_monitor()
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+# anchor reads bracketed by monotonic reads further apart than this are retried
+_ANCHOR_MAX_WINDOW_NS = 20_000
+_ANCHOR_ATTEMPTS = 5
+
+
+class Clock:
+    """wall/monotonic anchor with cheap epoch stamps derived from the monotonic clock"""
+
+    __slots__ = ("_offset_ns", "_anchor_mono_ns", "max_drift_ms", "_monitor")
+
+    def __init__(self) -> None:
+        self._offset_ns = 0
+        self._anchor_mono_ns = 0
+        self.max_drift_ms = 0.0
+        self._monitor: Optional[threading.Thread] = None
+        self.reanchor()
+
+    def reanchor(self) -> None:
+        """capture a fresh wall/monotonic anchor, keeping the tightest of a few bracketed reads"""
+        best_window = None
+        for _ in range(_ANCHOR_ATTEMPTS):
+            before = time.monotonic_ns()
+            wall = time.time_ns()
+            after = time.monotonic_ns()
+            window = after - before
+            if best_window is None or window < best_window:
+                best_window = window
+                # attribute the wall read to the midpoint of its monotonic bracket
+                self._anchor_mono_ns = before + window // 2
+                self._offset_ns = wall - self._anchor_mono_ns
+            if window <= _ANCHOR_MAX_WINDOW_NS:
+                break
+        self.max_drift_ms = 0.0
+
+    # ---- stamps
+
+    @staticmethod
+    def monotonic_ns() -> int:
+        return time.monotonic_ns()
+
+    def now_ns(self) -> int:
+        """current time as epoch nanoseconds"""
+        return time.monotonic_ns() + self._offset_ns
+
+    def now_ms(self) -> float:
+        """current time as epoch milliseconds"""
+        return (time.monotonic_ns() + self._offset_ns) / 1e6
+
+    def to_epoch_ns(self, mono_ns: int) -> int:
+        """convert a `time.monotonic_ns()` reading into epoch nanoseconds"""
+        return mono_ns + self._offset_ns
+
+    def to_epoch_ms(self, mono_ns: int) -> float:
+        """convert a `time.monotonic_ns()` reading into epoch milliseconds"""
+        return (mono_ns + self._offset_ns) / 1e6
+
+    # ---- drift
+
+    def drift_ms(self) -> float:
+        """wall clock minus anchored clock; positive when the wall clock has run ahead"""
+        mono = time.monotonic_ns()
+        wall = time.time_ns()
+        drift = (wall - (mono + self._offset_ns)) / 1e6
+        if abs(drift) > abs(self.max_drift_ms):
+            self.max_drift_ms = drift
+        return drift
+
+    def start_drift_monitor(self, interval_s: float = 60.0, warn_ms: float = 5.0) -> None:
+        """log the drift every `interval_s` seconds from a daemon thread (once per process)"""
+        if self._monitor is not None and self._monitor.is_alive():
+            return
+        self._monitor = threading.Thread(
+            target=self._drift_monitor, args=(interval_s, warn_ms), name="_clock_drift_", daemon=True
+        )
+        self._monitor.start()
+
+    def _drift_monitor(self, interval_s: float, warn_ms: float) -> None:
+        while True:
+            time.sleep(interval_s)
+            drift = self.drift_ms()
+            anchored_s = (time.monotonic_ns() - self._anchor_mono_ns) / 1e9
+            message = f"Clock drift {drift:+.3f} ms after {anchored_s:.0f} s (max {self.max_drift_ms:+.3f} ms)"
+            if abs(drift) >= warn_ms:
+                logger.warning(message)
+            else:
+                logger.info(message)
+
+
+# process-wide time base; the anchor stays valid across fork() since both clocks are system-wide
+clock = Clock()
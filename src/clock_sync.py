@@ -0,0 +1,150 @@
+"""
+NTP-style clock offset estimation between the Ingestor and each connected device.
+
+Every device stamps its samples and frames with its own host's `clock`, so
+across hosts the timestamps differ from the Ingestor's time base by the
+offset between the two clocks.  The Ingestor measures that offset per data
+connection with a four-timestamp ping exchange (see `protocol`):
+
+  * t1 - Ingestor sends a ping            (Ingestor clock)
+  * t2 - device receives the ping         (device clock)
+  * t3 - device sends the in-band pong    (device clock)
+  * t4 - Ingestor reads the pong          (Ingestor clock)
+
+  rtt    = (t4 - t1) - (t3 - t2)
+  offset = ((t1 - t2) + (t4 - t3)) / 2      device timestamp + offset = Ingestor time
+
+An exchange that was delayed in either direction (a pong queued behind a large
+frame, a busy receiver thread) has a larger RTT and a less accurate offset, so
+`PeerClock` keeps the last `window` exchanges and uses the offset of the one
+with the smallest RTT (a min-filter), which tracks slow drift while rejecting
+queueing noise.
+
+Usage
+-----
+Ingestor, per data connection:
+    peer = PeerClock("camera0")
+    conn.send(peer.ping())                        # periodically
+    peer.pong(payload)                            # on each control frame
+    local_ns = sent_ns + peer.offset_ns
+
+Device, per data connection:
+    Thread(target=answer_clock_pings, args=(sock, send_lock, control_header, "camera0"), daemon=True).start()
+"""
+
+from __future__ import annotations
+
+import socket
+from collections import deque
+from threading import Lock
+from typing import Deque, Optional, Tuple
+
+from loguru import logger
+
+from .clock import clock
+from .protocol import CLOCK_PING, CLOCK_PONG
+from .utils import safe_unwrap_exception
+
+
+class PeerClock:
+    """
+    Ingestor-side estimate of one device connection's clock offset.
+
+    Parameters
+    ----------
+    name : str
+        Stream name used in log messages, e.g. ``camera0``.
+    window : int
+        Number of most recent exchanges the min-filter chooses from.
+    max_unanswered : int
+        Pings sent without any pong before the device is assumed not to
+        support clock sync and pinging stops.
+    """
+
+    __slots__ = ("name", "_samples", "offset_ns", "rtt_ns", "exchanges", "_pings", "_max_unanswered")
+
+    def __init__(self, name: str, window: int = 8, max_unanswered: int = 5) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.name = name
+        self._samples: Deque[Tuple[int, int]] = deque(maxlen=window)
+        # added to a device timestamp (ns) to express it in the Ingestor's time base
+        self.offset_ns = 0
+        self.rtt_ns: Optional[int] = None
+        self.exchanges = 0
+        self._pings = 0
+        self._max_unanswered = max_unanswered
+
+    @property
+    def synced(self) -> bool:
+        return self.exchanges > 0
+
+    @property
+    def offset_ms(self) -> float:
+        return self.offset_ns / 1e6
+
+    @property
+    def active(self) -> bool:
+        """False once the device has ignored the first `max_unanswered` pings"""
+        return self.exchanges > 0 or self._pings < self._max_unanswered
+
+    def ping(self) -> Optional[bytes]:
+        """next ping message, or None if the device doesn't answer pings"""
+        if not self.active:
+            return None
+        self._pings += 1
+        if not self.active:
+            logger.warning(f"{self.name} answered none of {self._pings - 1} clock pings, timestamps stay in its own time base")
+            return None
+        return CLOCK_PING.pack(clock.now_ns())
+
+    def pong(self, payload) -> int:
+        """fold one pong into the estimate, returning the exchange's RTT in ns"""
+        t4 = clock.now_ns()
+        t1, t2, t3 = CLOCK_PONG.unpack(payload)
+        rtt = (t4 - t1) - (t3 - t2)
+        offset = ((t1 - t2) + (t4 - t3)) // 2
+        self._samples.append((rtt, offset))
+        self.rtt_ns, self.offset_ns = min(self._samples)
+        self.exchanges += 1
+        message = f"{self.name} clock offset {self.offset_ms:+.3f} ms, rtt {self.rtt_ns / 1e6:.3f} ms (exchange rtt {rtt / 1e6:.3f} ms)"
+        if self.exchanges == 1:
+            logger.info(message)
+        else:
+            logger.debug(message)
+        return rtt
+
+
+def answer_clock_pings(sock: socket.socket, send_lock: Lock, control_header: bytes, name: str) -> None:
+    """
+    Device-side responder: answer every Ingestor ping on `sock` with an in-band pong.
+
+    Runs until the connection closes.  `send_lock` must be held by every
+    writer of `sock` around each complete frame, so a pong never lands
+    inside another frame; `control_header` is the stream's frame header
+    carrying the reserved control marker.
+    """
+    ping = bytearray(CLOCK_PING.size)
+    view = memoryview(ping)
+    pong = bytearray(len(control_header) + CLOCK_PONG.size)
+    pong[:len(control_header)] = control_header
+    answered = 0
+    try:
+        while True:
+            received = 0
+            while received < len(view):
+                nbytes = sock.recv_into(view[received:])
+                if nbytes == 0:
+                    logger.debug(f"{name} clock responder exiting after {answered} pings")
+                    return
+                received += nbytes
+            t2 = clock.now_ns()
+            (t1,) = CLOCK_PING.unpack(ping)
+            with send_lock:
+                CLOCK_PONG.pack_into(pong, len(control_header), t1, t2, clock.now_ns())
+                sock.sendall(pong)
+            answered += 1
+    except OSError as ex:
+        # the transmit thread closing the socket ends the responder too
+        exmsg = safe_unwrap_exception(ex)
+        logger.debug(f"{name} clock responder exiting after {answered} pings: {exmsg}")
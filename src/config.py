@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import copy
+import hashlib
 import os
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 import yaml
 
@@ -14,6 +16,9 @@ try:
 except ImportError:  # pragma: no cover – PyPy / pure-Python envs
     from yaml import SafeLoader  # type: ignore
 
+# overrides the default settings.yaml location, e.g. for benchmarks and simulated rigs
+SETTINGS_ENV_VAR = "RATBALL_SETTINGS"
+
 
 @dataclass(frozen=True, slots=True)
 class IngestorConfig:
@@ -23,6 +28,20 @@ class IngestorConfig:
     data_port_range_end: int
     client_hello_binfmt: str
     handshake_binfmt: str
+    # `asyncio` runs every connection on one event loop, `threaded` uses a thread per stream
+    mode: str = "threaded"
+    # bounded per-stream queue depth between socket readers and file writers (asyncio mode)
+    queue_depth: int = 1024
+    # keep each device's data stream on its gateway connection instead of assigning a data port
+    single_port: bool = False
+    # seconds a device has to connect to its assigned data port before the port is closed (asyncio mode)
+    data_accept_timeout_s: float = 10.0
+    # record sender → writer latency per stream and dump it to `latency.json` in the session directory
+    latency_stats: bool = False
+    # seconds between clock-sync pings on each framed data connection, 0 disables clock sync
+    clock_sync_interval_s: float = 1.0
+    # recent ping exchanges the per-connection offset min-filter chooses from
+    clock_sync_window: int = 8
 
 @dataclass(frozen=True, slots=True)
 class BMIConfig:
@@ -58,11 +77,121 @@ class SpeakerConfig:
 class SensorConfig:
     i2c_addr: tuple[int, int]
     binfmt: str
+    # `otos` reads the I2C sensors, `sim` generates synthetic trajectories at `sim_rate_hz`
+    backend: str = "otos"
+    sim_rate_hz: float = 400.0
+    # per-sensor poll rate; polls are staggered evenly across the sensors on the bus
+    poll_rate_hz: float = 200.0
+    # wire mode requested in the client hello, one of `single` or `batch`
+    wire_mode: str = "single"
+    batch_header_binfmt: str = ">HI"
+    batch_size: int = 64
+    batch_max_age_ms: float = 10.0
+    # Ingestor-side storage format, one of `csv` or `columnar`
+    store: str = "csv"
+    store_block_rows: int = 4096
+    store_segment_rows: int = 1048576
+    # group commit: staged bytes (csv) and max age before staged samples are written
+    flush_bytes: int = 1048576
+    flush_interval_ms: float = 500.0
+    # one of `never`, `close` or `commit`
+    fsync: str = "close"
+
+
+@dataclass(frozen=True, slots=True)
+class CameraRoi:
+    # crop rectangle in sensor pixels; a width or height of 0 extends to the frame edge
+    x: int = 0
+    y: int = 0
+    width: int = 0
+    height: int = 0
+    # keep every n-th pixel of the crop in both directions
+    decimate: int = 1
+    # convert BGR frames to GRAY8
+    gray: bool = False
+
+    def rect(self, frame_width: int, frame_height: int) -> Tuple[int, int, int, int]:
+        """(x, y, width, height) of the crop within a `frame_width`×`frame_height` frame"""
+        width = self.width or frame_width - self.x
+        height = self.height or frame_height - self.y
+        if self.x < 0 or self.y < 0 or width <= 0 or height <= 0 or self.x + width > frame_width or self.y + height > frame_height:
+            raise ValueError(f"ROI {width}x{height}+{self.x}+{self.y} doesn't fit a {frame_width}x{frame_height} frame")
+        if self.decimate < 1 or self.decimate > min(width, height):
+            raise ValueError(f"ROI decimation must be between 1 and {min(width, height)}, got {self.decimate}")
+        return self.x, self.y, width, height
+
+    def output_size(self, frame_width: int, frame_height: int) -> Tuple[int, int]:
+        """(width, height) of the frames leaving the ROI stage"""
+        _, _, width, height = self.rect(frame_width, frame_height)
+        return width // self.decimate, height // self.decimate
 
 
 @dataclass(frozen=True, slots=True)
 class CameraConfig:
     ident: tuple[int, int]
+    # frame source, one of `csi`, `videotestsrc` (GStreamer, no camera) or `numpy` (no GStreamer)
+    backend: str = "csi"
+    width: int = 1280
+    height: int = 720
+    framerate: int = 30
+    # seconds of frames held in each camera's ring, bounds worst-case streaming latency
+    buffer_seconds: int = 1
+    frame_header_binfmt: str = "!BIQ"
+    # chunked video transfer: 0 streams raw frames, > 0 sends H.264 segments of this many seconds
+    segment_seconds: int = 0
+    segment_header_binfmt: str = "!BIQQIQQ"
+    # recording codec, `h264` or `jpeg` (Motion-JPEG)
+    codec: str = "h264"
+    # recording encoder: `hardware` (NVENC/NVJPG), `software` (x264enc/jpegenc) or `auto` to probe
+    encoder: str = "auto"
+    # per-branch queue and appsink sizing: `realtime`, `balanced` or `lossless`
+    latency_profile: str = "realtime"
+    # keep local segment files on the rig after they have been sent
+    keep_segments: bool = True
+    # `tcp` streams frames to the Ingestor, `shm` publishes them to same-host shared memory
+    transport: str = "tcp"
+    shm_prefix: str = "ratball_cam"
+    shm_slots: int = 8
+    # pace all cameras from one coordinator so frames are captured as aligned sets (per-frame transport only)
+    sync_capture: bool = False
+    # frame sets skewed by more than this are counted as out of sync
+    sync_max_skew_ms: float = 5.0
+    # per-camera region of interest applied before frames enter the ring, keyed by camera ident
+    roi: Mapping[int, CameraRoi] = field(default_factory=lambda: MappingProxyType({}))
+
+    def roi_for(self, ident: int) -> Optional[CameraRoi]:
+        return self.roi.get(ident)
+
+
+@dataclass(frozen=True, slots=True)
+class SocketProfile:
+    # disable Nagle so small frames leave immediately instead of waiting for an ACK
+    nodelay: bool = True
+    # requested kernel buffer sizes in bytes; 0 keeps the kernel default (and autotuning)
+    sndbuf: int = 0
+    rcvbuf: int = 0
+    keepalive: bool = True
+    keepalive_idle_s: int = 1
+    keepalive_interval_s: int = 3
+    keepalive_count: int = 5
+    # SO_BUSY_POLL in microseconds, 0 disables; raising it needs CAP_NET_ADMIN
+    busy_poll_us: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class SocketsConfig:
+    # gateway, handshake and BMI connections
+    control: SocketProfile = SocketProfile()
+    sensor: SocketProfile = SocketProfile()
+    camera: SocketProfile = SocketProfile(sndbuf=4194304, rcvbuf=4194304)
+
+    def for_device(self, device: str) -> SocketProfile:
+        """data stream profile for a device type, `control` for unknown types"""
+        if device == "sensor":
+            return self.sensor
+        if device == "camera":
+            return self.camera
+        return self.control
 
 
 @dataclass(frozen=True, slots=True)
@@ -73,6 +202,117 @@ class DataPathsConfig:
     logs: Path
 
 
+@dataclass(frozen=True, slots=True)
+class _Settings:
+    """one parsed settings file: typed sections plus the read-only raw mapping"""
+    ingestor: IngestorConfig
+    bmi: BMIConfig
+    buffer: BufferConfig
+    audio: AudioConfig
+    speaker: SpeakerConfig
+    sensor: SensorConfig
+    camera: CameraConfig
+    sockets: SocketsConfig
+    data_paths: DataPathsConfig
+    raw: Mapping[str, Any]
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: bytes
+    settings: _Settings
+
+
+# process-wide parsed settings per file; forked governor processes inherit it already populated
+_cache: Dict[Path, _CacheEntry] = {}
+_cache_lock = threading.Lock()
+
+_REQUIRED_SECTIONS = frozenset((
+    "ingestor",
+    "bmi",
+    "buffer",
+    "audio",
+    "speaker",
+    "sensor",
+    "camera",
+    "data_paths",
+))
+
+
+def _freeze(value: Any) -> Any:
+    """read-only view of parsed YAML: mappings become mapping proxies, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _parse_settings(config_path: Path, text: bytes) -> _Settings:
+    """Parse the YAML document, perform basic structural validation and build the typed sections."""
+    data = yaml.load(text, Loader=SafeLoader)
+
+    if not isinstance(data, dict):
+        raise ValueError(
+            f"Settings file {config_path!s} must contain a "
+            f"top-level mapping, got {type(data).__name__}"
+        )
+
+    # assert required top-level keys exist
+    missing = _REQUIRED_SECTIONS.difference(data)
+    if missing:
+        raise KeyError(
+            f"Missing top-level sections in settings.yaml: {', '.join(missing)}"
+        )
+
+    return _Settings(
+        ingestor=IngestorConfig(**data["ingestor"]),
+        bmi=BMIConfig(**data["bmi"]),
+        buffer=BufferConfig(**data["buffer"]),
+        audio=AudioConfig(**data["audio"]),
+        speaker=SpeakerConfig(**data["speaker"]),
+        sensor=SensorConfig(**{**data["sensor"], "i2c_addr": tuple(data["sensor"]["i2c_addr"])}),
+        camera=CameraConfig(**{
+            **data["camera"],
+            "ident": tuple(data["camera"]["ident"]),
+            "roi": MappingProxyType({int(k): CameraRoi(**v) for k, v in (data["camera"].get("roi") or {}).items()}),
+        }),
+        # optional section; profiles not given keep their defaults
+        sockets=SocketsConfig(**{k: SocketProfile(**v) for k, v in (data.get("sockets") or {}).items()}),
+        # cast data-path strings to Path for safer downstream use
+        data_paths=DataPathsConfig(**{k: Path(v) for k, v in data["data_paths"].items()}),
+        raw=_freeze(data),
+    )
+
+
+def _load_settings(config_path: Path) -> _Settings:
+    """
+    Return the parsed settings for `config_path`, re-parsing only when the file changed.
+
+    A file whose mtime and size are unchanged is served from the cache
+    without being read.  Otherwise it is read and hashed, and only parsed
+    again if the content hash differs (so e.g. a `touch` costs one read).
+    """
+    if not config_path.exists():
+        raise FileNotFoundError(f"Settings file not found: {config_path!s}")
+    stat = config_path.stat()
+    with _cache_lock:
+        entry = _cache.get(config_path)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry.settings
+
+        text = config_path.read_bytes()
+        digest = hashlib.blake2b(text, digest_size=16).digest()
+        if entry is None or entry.digest != digest:
+            entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, digest, _parse_settings(config_path, text))
+            _cache[config_path] = entry
+        else:
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+        return entry.settings
+
+
 class RatballConfig:
     """
     strongly-typed load/read handler class for settings.yaml
@@ -80,69 +320,49 @@ class RatballConfig:
     Parameters
     ----------
     config_path :
-        Optional override for the YAML file location.  Defaults to
+        Optional override for the YAML file location.  Defaults to the
+        ``RATBALL_SETTINGS`` environment variable if set, else
         ``<package_root>/../settings.yaml`` – i.e. one level above the module
         directory so that user-authored config sits outside the code tree.
+
+    Parsed settings are cached per file for the lifetime of the process (and
+    inherited by forked governor processes), so constructing an instance is
+    a `stat` of the settings file unless it changed on disk.  Sections are
+    frozen dataclasses shared by every instance, and `as_dict` is a
+    read-only view rather than a copy.
     """
 
     def __init__(self, config_path: str | os.PathLike | None = None) -> None:
         self._config_path = (
             Path(config_path).expanduser()
             if config_path is not None
+            else Path(os.environ[SETTINGS_ENV_VAR]).expanduser()
+            if os.environ.get(SETTINGS_ENV_VAR)
             else Path(__file__).resolve().parent.parent / "settings.yaml"
         )
 
-        raw_cfg = self._read_settings_yaml()
-
-        self.ingestor: IngestorConfig = IngestorConfig(**raw_cfg["ingestor"])
-        self.bmi: BMIConfig = BMIConfig(**raw_cfg["bmi"])
-        self.buffer: BufferConfig = BufferConfig(**raw_cfg["buffer"])
-        self.audio: AudioConfig = AudioConfig(**raw_cfg["audio"])
-        self.speaker: SpeakerConfig = SpeakerConfig(**raw_cfg["speaker"])
-        self.sensor: SensorConfig = SensorConfig(tuple(raw_cfg["sensor"]["i2c_addr"]), raw_cfg["sensor"]["binfmt"])
-        self.camera: CameraConfig = CameraConfig(tuple(raw_cfg["camera"]["ident"]))
-        # cast data-path strings to Path for safer downstream use
-        self.data_paths: DataPathsConfig = DataPathsConfig(
-            **{k: Path(v) for k, v in raw_cfg["data_paths"].items()}
-        )
-
-        # retain an immutable deep copy in case callers need the raw mapping
-        self._raw_cfg: Dict[str, Any] = copy.deepcopy(raw_cfg)
-
-    def as_dict(self) -> Dict[str, Any]:
-        """Return an immutable deep copy of the entire configuration."""
-        return copy.deepcopy(self._raw_cfg)
-
-    def _read_settings_yaml(self) -> Dict[str, Any]:
-        """Parse the YAML file and perform basic structural validation."""
-        if not self._config_path.exists():
-            raise FileNotFoundError(f"Settings file not found: {self._config_path!s}")
-
-        with self._config_path.open("r", encoding="utf-8") as fh:
-            data = yaml.load(fh, Loader=SafeLoader)
-
-        if not isinstance(data, dict):
-            raise ValueError(
-                f"Settings file {self._config_path!s} must contain a "
-                f"top-level mapping, got {type(data).__name__}"
-            )
-
-        # assert required top-level keys exist
-        required_keys = {
-            "ingestor",
-            "bmi",
-            "buffer",
-            "audio",
-            "speaker",
-            "sensor",
-            "camera",
-            "data_paths",
-        }
-        missing = required_keys.difference(data)
-        if missing:
-            raise KeyError(
-                f"Missing top-level sections in settings.yaml: {', '.join(missing)}"
-            )
-
-        return data
+        settings = _load_settings(self._config_path)
+
+        # sections are immutable, so every instance shares the cached objects
+        self.ingestor: IngestorConfig = settings.ingestor
+        self.bmi: BMIConfig = settings.bmi
+        self.buffer: BufferConfig = settings.buffer
+        self.audio: AudioConfig = settings.audio
+        self.speaker: SpeakerConfig = settings.speaker
+        self.sensor: SensorConfig = settings.sensor
+        self.camera: CameraConfig = settings.camera
+        self.sockets: SocketsConfig = settings.sockets
+        self.data_paths: DataPathsConfig = settings.data_paths
+
+        self._raw_cfg: Mapping[str, Any] = settings.raw
+
+    def as_dict(self) -> Mapping[str, Any]:
+        """Return a read-only view of the entire configuration (nested lists are tuples)."""
+        return self._raw_cfg
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget every parsed settings file, forcing the next instance to re-read it."""
+        with _cache_lock:
+            _cache.clear()
 
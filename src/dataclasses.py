@@ -17,3 +17,24 @@ class SensorPacketPayload:
     def __str__(self):
         return f"SensorPacketPayload[idx: {self.idx} | ts: {self.ts} | x:{self.x}, y:{self.y}, h:{self.h}]"
 
+
+
+@dataclass(frozen=True, slots=True)
+class SegmentIndexEntry:
+    ident: int
+    seq: int
+    start_ts: int
+    end_ts: int
+    frame_count: int
+    byte_offset: int
+    nbytes: int
+
+    # implement to make instances subscriptable:
+    def __getitem__(self, item):
+        return getattr(self, item)
+
+    def __str__(self):
+        return (
+            f"SegmentIndexEntry[cam{self.ident} seq: {self.seq} | ts: {self.start_ts}-{self.end_ts} | "
+            f"frames: {self.frame_count} | offset: {self.byte_offset}, size: {self.nbytes}]"
+        )
@@ -1,26 +1,56 @@
+from __future__ import annotations
+
+import os
 import struct
 import socket
 import sys
 from multiprocessing import Process, Queue, Event
-from threading import Thread
+from threading import Thread, Lock
 from datetime import datetime
+from typing import TYPE_CHECKING, Optional
 from loguru import logger
 
 from .config import RatballConfig
-from .sensor import Sensor
-from .speaker import Speaker
-from .camera import Camera
-from .dataclasses import SensorPacketPayload
+from .sensor import Sensor, SensorPollScheduler
+from .dataclasses import SensorPacketPayload, SegmentIndexEntry
+from .protocol import (
+    WIRE_MODE_SINGLE,
+    WIRE_MODE_BATCH,
+    WIRE_MODE_SEGMENT,
+    SAME_CONNECTION_PORT,
+    CONTROL_BATCH_COUNT,
+    CONTROL_FRAME_SIZE,
+    SensorBatchPacker,
+    recv_exact,
+    sendmsg_all,
+    wire_mode_from_str,
+)
+
+from .clock import clock
+from .clock_sync import answer_clock_pings
+from . import socket_profile
+from .utils import safe_unwrap_exception
+
+# cv2, numpy and sounddevice are imported by the governor that needs them, in its constructor,
+# so a process that never builds a camera or speaker governor doesn't pay for loading them
+if TYPE_CHECKING:
+    from .camera import Camera
+
+def _shutdown_stream(sock) -> None:
+    """end both directions of a data socket, waking a clock responder blocked in recv before close"""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
 
-from .utils import unix_time_millis, safe_unwrap_exception
 
-def build_client_hello(device_name: str, device_ident: int) -> bytes:
+def build_client_hello(device_name: str, device_ident: int, wire_mode: int = WIRE_MODE_SINGLE) -> bytes:
     try:
         device_name_enc = device_name.encode(encoding="ascii")
         if len(device_name_enc) != 6:
             logger.critical(f"Invalid length for encoded device name: {len(device_name_enc)}")
-            raise Exception(f"Failed to build client hello for device {device_name} with ident {ident}")
-        return struct.pack(">6sId", device_name_enc, device_ident, unix_time_millis(datetime.now()))
+            raise Exception(f"Failed to build client hello for device {device_name} with ident {device_ident}")
+        return struct.pack(">6sIdB", device_name_enc, device_ident, clock.now_ms(), wire_mode)
     except struct.error as ex:
         exmsg = safe_unwrap_exception(ex)
         logger.error(f"Struct error occurred while building client hello packet for device {device_name}{device_ident}: {exmsg}")
@@ -42,7 +72,10 @@ class SensorGovernor(Process):
 
         self._manifest = None
         try:
-            self._manifest = [Sensor(addr) for addr in self._cfg.sensor.i2c_addr]
+            self._manifest = [
+                Sensor(addr, backend=self._cfg.sensor.backend, sim_rate_hz=self._cfg.sensor.sim_rate_hz)
+                for addr in self._cfg.sensor.i2c_addr
+            ]
         except Exception as ex:
             exmsg = safe_unwrap_exception(ex)
             logger.critical(
@@ -50,9 +83,24 @@ class SensorGovernor(Process):
             )
             self._manifest = []
 
+        self._scheduler = SensorPollScheduler(self._manifest, self._cfg.sensor.poll_rate_hz)
+
         self._sock_ingest = None
         self._sock_bmi = None
 
+        # wire mode is requested in the client hello and may be downgraded by the Ingestor
+        self._wire_mode = wire_mode_from_str(self._cfg.sensor.wire_mode)
+        self._batch_packer = SensorBatchPacker(
+            self._cfg.sensor.binfmt,
+            self._cfg.sensor.batch_header_binfmt,
+            self._cfg.sensor.batch_size,
+            self._cfg.sensor.batch_max_age_ms,
+        )
+        # an idle transmitter wakes at least this often to flush aged batches and check for shutdown
+        self._idle_wait = self._cfg.sensor.batch_max_age_ms / 1000
+        # held around every frame sent on the data socket, so clock pongs land between frames
+        self._send_lock = Lock()
+
         self._init_sockets()
         self._client_handshake()
 
@@ -63,26 +111,36 @@ class SensorGovernor(Process):
             # listen thread runs in background, daemonize to exit when enq/tx threads die
             # Thread(target=self.term_listen, name="_sensor_lst_", daemon=True),
         ]
+        if self._wire_mode == WIRE_MODE_BATCH and self._client_ready.is_set():
+            # batch frames can carry in-band pongs, so answer the Ingestor's clock pings
+            control_header = struct.pack(self._cfg.sensor.batch_header_binfmt, CONTROL_BATCH_COUNT, 0)
+            self._thread_pool.append(
+                Thread(
+                    target=answer_clock_pings,
+                    args=[self._sock_ingest, self._send_lock, control_header, "sensor0"],
+                    name="_sensor_clk_",
+                    daemon=True,
+                )
+            )
 
     def _init_sockets(self) -> None:
-        '''sets up TCP connections using socket Python stdlib'''
-        self._sock_ingest = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._sock_bmi = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-        # ingestor tx/rx
+        '''sets up TCP connections tuned by the `sockets` profiles in settings.yaml'''
+        # ingestor tx/rx; in single-port mode this connection carries the sensor stream
         try:
-            self._sock_ingest.connect(
-                (self._cfg.ingestor.ip, self._cfg.ingestor.gateway_port)
+            self._sock_ingest = socket_profile.connect(
+                (self._cfg.ingestor.ip, self._cfg.ingestor.gateway_port),
+                self._cfg.sockets.sensor,
+                "sensor0",
             )
-            self._sock_ingest.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         except socket.error as ex:
             exmsg = safe_unwrap_exception(ex)
             logger.error(f"Exception occurred while connecting to Ingestor: {exmsg}")
 
         # bmi tx/rx
         try:
-            self._sock_bmi.connect((self._cfg.bmi.ip, self._cfg.bmi.listen_port))
-            self._sock_bmi.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock_bmi = socket_profile.connect(
+                (self._cfg.bmi.ip, self._cfg.bmi.listen_port), self._cfg.sockets.control, "bmi"
+            )
         except socket.error as ex:
             exmsg = safe_unwrap_exception(ex)
             logger.error(f"Socket error occurred while connecting to BMI: {exmsg}")
@@ -92,56 +150,60 @@ class SensorGovernor(Process):
         return self._cfg.ingestor.data_port_range_start <= int(portno) < self._cfg.ingestor.data_port_range_end
 
     def _client_handshake(self) -> None:
-        for ident, _ in enumerate(self._manifest):
-            try:
-                self._sock_ingest.sendall(
-                    build_client_hello('sensor', ident)
-                )
-            except socket.error as ex:
-                exmsg = safe_unwrap_exception(ex)
-                logger.error(f"Socket error occurred while sending hello packet to Ingestor for device sensor{ident}: {exmsg}")
+        """negotiate the data stream shared by every sensor in the manifest (records carry the sensor idx)"""
+        ident = 0
+        if self._sock_ingest is None:
+            logger.error(f"No Ingestor connection for sensor{ident}, skipping handshake")
+            return
+        try:
+            self._sock_ingest.sendall(
+                build_client_hello('sensor', ident, self._wire_mode)
+            )
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Socket error occurred while sending hello packet to Ingestor for device sensor{ident}: {exmsg}")
 
+        try:
+            next_port_payload = self._recv_all(
+                self._sock_ingest, struct.calcsize(self._cfg.ingestor.handshake_binfmt)
+            )
             try:
-                next_port_payload = self._sock_ingest.recv(
-                    struct.calcsize(self._cfg.ingestor.handshake_binfmt)
-                )
-                try:
-                    next_port = struct.unpack(self._cfg.ingestor.handshake_binfmt, next_port_payload)[0]
-                except struct.error as ex:
-                    exmsg = safe_unwrap_exception(ex)
-                    logger.critical(f"Struct error occurred while unpacking Ingestor handshake port: {exmsg}")
-
-                if self._is_valid_data_port(next_port):
-                    logger.info(f"Got client handshake from Ingestor, sending sensor{ident} stream to port {next_port}")
-                    self._sock_ingest.close()
-                    self._sock_ingest = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    self._sock_ingest.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                    self._sock_ingest.connect(
-                        (self._cfg.ingestor.ip, next_port)
-                    )
-                    self._client_ready.set()
-                else:
-                    logger.critical(f"Ingestor responded to client handshake with out-of-bounds destination port: {next_port}")
-                    self._sock_ingest.close()
-                    raise Exception("Ingestor stream connection could not be established, aborting")
-            except socket.error as ex:
-                exmsg = safe_unwrap_exception(ex)
-                logger.error(f"Socket error occurred while receiving client handshake from Ingestor for sensor{ident}: {exmsg}")
-            except Exception as ex:
+                next_port, granted_mode = struct.unpack(self._cfg.ingestor.handshake_binfmt, next_port_payload)
+            except (struct.error, TypeError) as ex:
                 exmsg = safe_unwrap_exception(ex)
-                logger.error(f"Exception occurred while receiving client handshake from Ingestor for sensor{ident}: {exmsg}")
-
+                logger.critical(f"Struct error occurred while unpacking Ingestor handshake port: {exmsg}")
+                raise Exception("Ingestor stream connection could not be established, aborting")
+
+            if granted_mode != self._wire_mode:
+                logger.warning(f"Ingestor downgraded sensor{ident} wire mode from {self._wire_mode} to {granted_mode}")
+                self._wire_mode = granted_mode
+
+            if next_port == SAME_CONNECTION_PORT:
+                # single-port mode: the data stream follows the hello on the gateway connection
+                logger.info(f"Got client handshake from Ingestor, sending sensor{ident} stream on gateway connection")
+                self._client_ready.set()
+            elif self._is_valid_data_port(next_port):
+                logger.info(f"Got client handshake from Ingestor, sending sensor{ident} stream to port {next_port}")
+                self._sock_ingest.close()
+                self._sock_ingest = socket_profile.connect(
+                    (self._cfg.ingestor.ip, next_port), self._cfg.sockets.sensor, "sensor0"
+                )
+                self._client_ready.set()
+            else:
+                logger.critical(f"Ingestor responded to client handshake with out-of-bounds destination port: {next_port}")
+                self._sock_ingest.close()
+                raise Exception("Ingestor stream connection could not be established, aborting")
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Socket error occurred while receiving client handshake from Ingestor for sensor{ident}: {exmsg}")
+        except Exception as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Exception occurred while receiving client handshake from Ingestor for sensor{ident}: {exmsg}")
 
     def _recv_all(self, sock, size) -> bytes:
         """ensures that each packet is complete before transmit"""
         try:
-            data = b""
-            while len(data) < size:
-                packet = sock.recv(size - len(data))
-                if not packet:
-                    return None
-                data += packet
-            return data
+            return recv_exact(sock, size)
         except socket.error as ex:
             exmsg = safe_unwrap_exception(ex)
             logger.error(f"Socket error occurred while attempting to receive BMI data")
@@ -155,41 +217,68 @@ class SensorGovernor(Process):
         )
 
     def enqueue(self) -> None:
-        '''thread task that pushes sensor data into deque buffers'''
-        while not self._tx_complete.is_set():
-            for sensor in self._manifest:
-                sensor.poll_data()
+        '''thread task that polls sensors into deque buffers at the configured rate'''
+        scheduler = self._scheduler
+        scheduler.run(self._tx_complete)
+        logger.info(
+            f"Sensor polling completed: {scheduler.polls} samples at {scheduler.rate_hz} Hz per sensor, "
+            f"{scheduler.overruns} overrun poll slots, {scheduler.empty_polls} empty reads, "
+            f"dropped samples per sensor: {scheduler.dropped}"
+        )
+
+    def _send_packet(self, packet, idx: int = -1, label: Optional[str] = None) -> None:
+        """send one packet, logging errors against `label` (default `sensor<idx>`)"""
+        try:
+            with self._send_lock:
+                self._sock_ingest.sendall(packet)
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(
+                f"Socket error occurred while sending data packet for {label or f'sensor{idx}'}: {exmsg}"
+            )
+
+    def _flush_batch(self) -> None:
+        """sends the pending batch frame, if any"""
+        frame = self._batch_packer.flush()
+        if frame is not None:
+            logger.debug(f"Flushing {len(frame)} byte sensor batch frame")
+            self._send_packet(frame, label="sensor batch")
 
     def transmit_live(self) -> None:
         '''thread task that pops sensor data from deque buffers and transmits via socket'''
+        sample_ready = self._scheduler.sample_ready
         while not self._tx_complete.is_set():
+            sent = False
             if not self._term_flag.is_set():
                 for idx, sensor in enumerate(self._manifest):
                     metadata, data = sensor.get_next()
-                    if data is not None:
-                        payload = SensorPacketPayload(
-                            metadata,
-                            data[0].x,
-                            data[0].y,
-                            data[0].h,
-                            idx,
-                        )
-                        logger.debug(f"Preparing to pack sensor data payload: {payload}")
-                        packet = self._pack_sensor_data(payload)
-                        if self._client_ready.is_set():
-                            logger.info("Sensor{idx} got client ready signal, beginning data transmission")
-                            try:
-                                self._sock_ingest.sendall(packet)
-                            except socket.error as ex:
-                                exmsg = safe_unwrap_exception(ex)
-                                logger.error(
-                                    f"Socket error occurred while sending data packet for sensor{idx}: {exmsg}"
-                                )
-                    else:
-                        logger.debug("No data received from sensor, skipping.")
-                        break
+                    if data is None:
+                        continue
+                    sent = True
+                    if not self._client_ready.is_set():
+                        continue
+                    x, y, h = data
+                    if self._wire_mode == WIRE_MODE_BATCH:
+                        self._batch_packer.add(metadata, x, y, h, idx)
+                        if self._batch_packer.due():
+                            self._flush_batch()
+                        continue
+
+                    payload = SensorPacketPayload(metadata, x, y, h, idx)
+                    logger.debug(f"Preparing to pack sensor data payload: {payload}")
+                    self._send_packet(self._pack_sensor_data(payload), idx)
+            if not sent:
+                # flush partially filled frames once their age deadline passes
+                if self._batch_packer.due():
+                    self._flush_batch()
+                # sleep until the scheduler polls a new sample instead of spinning on empty buffers
+                sample_ready.wait(self._idle_wait)
+                sample_ready.clear()
+        self._flush_batch()
         logger.info(f"Sensor data transmit thread lifecycle has completed, closing socket.")
-        self._sock_ingest.close()
+        if self._sock_ingest is not None:
+            _shutdown_stream(self._sock_ingest)
+            self._sock_ingest.close()
 
     def term_listen(self):
         """thread task that listens for external termination signal"""
@@ -200,15 +289,19 @@ class SensorGovernor(Process):
 
     def run(self):
         '''spawns thread pool'''
+        clock.start_drift_monitor()
         for thread in self._thread_pool:
             thread.start()
         for thread in self._thread_pool:
-            thread.join()
+            if not thread.daemon:
+                thread.join()
 
 
 class SpeakerGovernor(Process):
     def __init__(self):
         super(SpeakerGovernor, self).__init__(self)
+        from .speaker import Speaker
+
         self._cfg = RatballConfig()
         self._term_flag = Event()
         self.speaker = Speaker(0, self._cfg.audio.rate, self._cfg.speaker.block_size, self._cfg.buffer.framerate)
@@ -223,20 +316,14 @@ class SpeakerGovernor(Process):
 
     def _init_socket(self) -> None:
         # bmi tx/rx
-        self._sock_bmi = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._sock_bmi.connect((self._cfg.bmi.ip, self._cfg.bmi.listen_port))
-        self._sock_bmi.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock_bmi = socket_profile.connect(
+            (self._cfg.bmi.ip, self._cfg.bmi.listen_port), self._cfg.sockets.control, "bmi"
+        )
         self._sock_bmi.sendall()
 
     def _recv_all(self, sock, size) -> bytes:
         """ensures that each packet is received"""
-        data = b""
-        while len(data) < size:
-            packet = sock.recv(size - len(data))
-            if not packet:
-                return None
-            data += packet
-        return data
+        return recv_exact(sock, size)
 
     def listen(self):
         '''thread task that listens for external frequency and termination signal'''
@@ -265,58 +352,291 @@ class SpeakerGovernor(Process):
 
 class CameraGovernor(Process):
     def __init__(self):
-        super(CameraGovernor, self).__init__(self)
+        super().__init__()
+        from .camera import Camera
+        from .camera_sync import SyncedCapture
+
         self._cfg = RatballConfig()
         self._tx_complete = Event()
         self._term_flag = Event()
 
         # capture_id is unique per experiment, but shared by each Camera
         capture_id = datetime.now().strftime("%y%m%d_%H%M")
-        self._manifest = [Camera(ident, capture_id) for ident in self._cfg.camera.ident]
+        self._stream_tcp = self._cfg.camera.transport == "tcp"
+        # segments are staged on the rig's local storage before being sent
+        segment_dir = None
+        if self._stream_tcp and self._cfg.camera.segment_seconds > 0:
+            segment_dir = str(self._cfg.data_paths.camera)
+            os.makedirs(segment_dir, exist_ok=True)
+        self._manifest = [
+            Camera(
+                ident,
+                capture_id,
+                self._cfg.camera.width,
+                self._cfg.camera.height,
+                framerate=self._cfg.camera.framerate,
+                buffer_seconds=self._cfg.camera.buffer_seconds,
+                output_dir=segment_dir,
+                shm_name=(
+                    f"{self._cfg.camera.shm_prefix}{ident}"
+                    if self._cfg.camera.transport == "shm"
+                    else None
+                ),
+                shm_slots=self._cfg.camera.shm_slots,
+                segment_seconds=self._cfg.camera.segment_seconds,
+                backend=self._cfg.camera.backend,
+                codec=self._cfg.camera.codec,
+                encoder=self._cfg.camera.encoder,
+                latency_profile=self._cfg.camera.latency_profile,
+                roi=self._cfg.camera.roi_for(ident),
+            )
+            for ident in self._cfg.camera.ident
+        ]
 
-        self._sock_ingest = None
+        # one coordinator paces every camera so their frames are captured as aligned sets
+        self._sync = None
+        if self._cfg.camera.sync_capture:
+            if segment_dir is not None:
+                logger.warning("Synchronized capture needs per-frame transport, segmented cameras capture independently")
+            else:
+                os.makedirs(self._cfg.data_paths.camera, exist_ok=True)
+                self._sync = SyncedCapture(
+                    self._manifest,
+                    max_skew_ms=self._cfg.camera.sync_max_skew_ms,
+                    index_path=os.path.join(self._cfg.data_paths.camera, f"{capture_id}_framesets.csv"),
+                )
+
+        # one Ingestor data socket per camera, keyed by camera ident, each with a lock
+        # held around every frame so clock pongs land between frames
+        self._sock_data = {}
+        self._send_locks = {camera.sensor_id: Lock() for camera in self._manifest}
         self._sock_bmi = None
         self._init_sockets()
+        if self._stream_tcp:
+            self._client_handshake()
 
-
-    def _init_sockets(self) -> None:
-        # ingestor tx/rx
-        self._sock_ingest = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._sock_ingest.connect(
-            (self._cfg.ingestor.ip, self._cfg.ingestor.listen_port)
+        self._thread_pool = [
+            Thread(
+                target=self.transmit_segments if camera.segmented else self.transmit,
+                args=[camera],
+                name=f"_camera_tx_{camera.sensor_id}_",
+            )
+            for camera in self._manifest
+            if camera.sensor_id in self._sock_data
+        ]
+        self._thread_pool.extend(
+            Thread(
+                target=answer_clock_pings,
+                args=[
+                    self._sock_data[camera.sensor_id],
+                    self._send_locks[camera.sensor_id],
+                    self._control_header(camera),
+                    f"camera{camera.sensor_id}",
+                ],
+                name=f"_camera_clk_{camera.sensor_id}_",
+                daemon=True,
+            )
+            for camera in self._manifest
+            if camera.sensor_id in self._sock_data
+        )
+        self._thread_pool.append(
+            # listen thread runs in background, daemonize to exit when tx threads die
+            Thread(target=self.term_listen, name="_camera_lst_", daemon=True)
         )
-        self._sock_ingest.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self._sock_ingest.sendall()
 
+    def _init_sockets(self) -> None:
         # bmi tx/rx
-        self._sock_bmi = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._sock_bmi.connect((self._cfg.bmi.ip, self._cfg.bmi.listen_port))
-        self._sock_bmi.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self._sock_bmi.sendall()
+        try:
+            self._sock_bmi = socket_profile.connect(
+                (self._cfg.bmi.ip, self._cfg.bmi.listen_port), self._cfg.sockets.control, "bmi"
+            )
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Socket error occurred while connecting to BMI: {exmsg}")
+            self._sock_bmi = None
+
+    def _is_valid_data_port(self, portno: int):
+        return self._cfg.ingestor.data_port_range_start <= int(portno) < self._cfg.ingestor.data_port_range_end
+
+    def _client_handshake(self) -> None:
+        """negotiate one Ingestor data socket per camera through the gateway"""
+        handshake_len = struct.calcsize(self._cfg.ingestor.handshake_binfmt)
+        for camera in self._manifest:
+            ident = camera.sensor_id
+            gateway = None
+            try:
+                # in single-port mode the gateway connection carries the camera stream
+                gateway = socket_profile.connect(
+                    (self._cfg.ingestor.ip, self._cfg.ingestor.gateway_port), self._cfg.sockets.camera, f"camera{ident}"
+                )
+                wire_mode = WIRE_MODE_SEGMENT if camera.segmented else WIRE_MODE_SINGLE
+                gateway.sendall(build_client_hello('camera', ident, wire_mode))
+                handshake = self._recv_all(gateway, handshake_len)
+                if handshake is None:
+                    logger.error(f"Ingestor closed gateway connection before handshake for camera{ident}")
+                    continue
+                next_port, granted_mode = struct.unpack(self._cfg.ingestor.handshake_binfmt, handshake)
+                if granted_mode != wire_mode:
+                    logger.critical(f"Ingestor refused wire mode {wire_mode} for camera{ident}")
+                    continue
+                if next_port == SAME_CONNECTION_PORT:
+                    # single-port mode: the data stream follows the hello on the gateway connection
+                    logger.info(f"Got client handshake from Ingestor, sending camera{ident} stream on gateway connection")
+                    self._sock_data[ident], gateway = gateway, None
+                    continue
+                if not self._is_valid_data_port(next_port):
+                    logger.critical(f"Ingestor responded to client handshake with out-of-bounds destination port: {next_port}")
+                    continue
+                logger.info(f"Got client handshake from Ingestor, sending camera{ident} stream to port {next_port}")
+                self._sock_data[ident] = socket_profile.connect(
+                    (self._cfg.ingestor.ip, next_port), self._cfg.sockets.camera, f"camera{ident}"
+                )
+            except socket.error as ex:
+                exmsg = safe_unwrap_exception(ex)
+                logger.error(f"Socket error occurred during Ingestor handshake for camera{ident}: {exmsg}")
+            except struct.error as ex:
+                exmsg = safe_unwrap_exception(ex)
+                logger.critical(f"Struct error occurred while unpacking Ingestor handshake for camera{ident}: {exmsg}")
+            finally:
+                if gateway is not None:
+                    gateway.close()
+
+    def _control_header(self, camera: Camera) -> bytes:
+        """frame header marking an in-band control frame on this camera's stream"""
+        if camera.segmented:
+            return struct.pack(self._cfg.camera.segment_header_binfmt, camera.sensor_id, CONTROL_FRAME_SIZE, 0, 0, 0, 0, 0)
+        return struct.pack(self._cfg.camera.frame_header_binfmt, camera.sensor_id, CONTROL_FRAME_SIZE, 0)
 
     def _recv_all(self, sock, size) -> bytes:
         """ensures that each packet is complete before transmit"""
-        data = b""
-        while len(data) < size:
-            packet = sock.recv(size - len(data))
-            if not packet:
-                return None
-            data += packet
-        return data
-
-    def transmit(self):
-        while not self._tx_complete.is_set():
-            if not self._term_flag.is_set():
-                for camera in self._manifest:
-                    camera.start()
+        return recv_exact(sock, size)
+
+    def transmit(self, camera: Camera) -> None:
+        '''thread task that drains a camera's ring and streams `!BIQ`-framed frames to the Ingestor'''
+        ident = camera.sensor_id
+        sock = self._sock_data[ident]
+        send_lock = self._send_locks[ident]
+        header_fmt = struct.Struct(self._cfg.camera.frame_header_binfmt)
+        header = bytearray(header_fmt.size)
+        sent_frames = 0
+        try:
+            while not self._tx_complete.is_set() and not self._term_flag.is_set():
+                # block briefly on an empty ring rather than spinning
+                for frame, ts in camera.drain(timeout=0.1):
+                    header_fmt.pack_into(header, 0, ident, len(frame), ts)
+                    # header + frame view go out in one syscall without being concatenated
+                    with send_lock:
+                        sendmsg_all(sock, (header, frame))
+                    sent_frames += 1
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Socket error occurred while streaming camera{ident}: {exmsg}")
+        logger.info(
+            f"Camera{ident} transmit thread lifecycle has completed after {sent_frames} frames "
+            f"({camera.frames_captured} captured, {camera.sink_dropped} dropped by the sink, "
+            f"{camera.dropped_frames} by the ring), closing socket."
+        )
+        _shutdown_stream(sock)
+        sock.close()
+
+    def _send_segment(self, sock, header_fmt: struct.Struct, entry: SegmentIndexEntry, segment_path: str) -> None:
+        sock.sendall(
+            header_fmt.pack(
+                entry.ident,
+                entry.seq,
+                entry.start_ts,
+                entry.end_ts,
+                entry.frame_count,
+                entry.byte_offset,
+                entry.nbytes,
+            )
+        )
+        with open(segment_path, "rb") as segment:
+            # zero-copy from the page cache straight into the socket
+            sock.sendfile(segment, 0, entry.nbytes)
+
+    def transmit_segments(self, camera: Camera) -> None:
+        '''thread task that streams each completed video segment, preceded by its index entry'''
+        ident = camera.sensor_id
+        sock = self._sock_data[ident]
+        header_fmt = struct.Struct(self._cfg.camera.segment_header_binfmt)
+        seq = 0
+        byte_offset = 0
+        try:
+            while True:
+                stopping = self._tx_complete.is_set() or self._term_flag.is_set()
+                if stopping and not camera.stopped:
+                    # stop capturing so splitmuxsink finalizes the segment in progress
+                    camera.stop()
+                if not camera.segment_complete(seq):
+                    if stopping:
+                        break
+                    self._term_flag.wait(0.25)
+                    continue
+
+                segment_path = camera.segment_path(seq)
+                start_ts, end_ts, frame_count = camera.segment_info(seq)
+                entry = SegmentIndexEntry(
+                    ident,
+                    seq,
+                    start_ts,
+                    end_ts,
+                    frame_count,
+                    byte_offset,
+                    os.path.getsize(segment_path),
+                )
+                logger.debug(f"Sending video segment: {entry}")
+                with self._send_locks[ident]:
+                    self._send_segment(sock, header_fmt, entry, segment_path)
+
+                camera.forget_segment(seq)
+                if not self._cfg.camera.keep_segments:
+                    os.remove(segment_path)
+                byte_offset += entry.nbytes
+                seq += 1
+        except (socket.error, OSError) as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Exception occurred while sending video segment {seq} for camera{ident}: {exmsg}")
+        logger.info(
+            f"Camera{ident} segment transmit thread lifecycle has completed after {seq} segments "
+            f"({byte_offset} bytes), closing socket."
+        )
+        _shutdown_stream(sock)
+        sock.close()
 
     def term_listen(self):
-        term_msg = self._recv_all(self._sock_bmi, 10)
+        """thread task that listens for external termination signal"""
+        if self._sock_bmi is None:
+            return
+        try:
+            term_msg = self._recv_all(self._sock_bmi, 10)
+        except socket.error as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.error(f"Socket error occurred while listening for BMI termination signal: {exmsg}")
+            return
         if term_msg and term_msg.startswith(b"BEGIN STOP"):
             logger.info("Received termination signal")
             self._term_flag.set()
 
     def run(self):
-        pass
-
-
+        '''starts cameras, then spawns thread pool'''
+        clock.start_drift_monitor()
+        if self._sync is not None:
+            self._sync.start()
+        else:
+            for camera in self._manifest:
+                camera.start()
+        for thread in self._thread_pool:
+            thread.start()
+        for thread in self._thread_pool:
+            if not thread.daemon:
+                thread.join()
+        if not any(not thread.daemon for thread in self._thread_pool):
+            # shared-memory transport has no tx threads, capture until terminated
+            self._term_flag.wait()
+        self._tx_complete.set()
+        if self._sync is not None:
+            # the coordinator must be done with the captures before they are released
+            self._sync.stop()
+        for camera in self._manifest:
+            camera.stop()
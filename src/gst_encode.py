@@ -0,0 +1,149 @@
+"""
+Encoder selection for the recording pipelines.
+
+The recording branch of a static camera pipeline encodes on the Jetson's
+NVENC/NVJPG engines when they are present and on the CPU otherwise:
+
+  * hardware - `nvvidconv` copies the overlaid frame back into NVMM as NV12
+               (I420 for JPEG) on the VIC, and `nvv4l2h264enc`/`nvjpegenc`
+               encode it without touching the ARM cores
+  * software - `x264enc speed-preset=ultrafast`/`jpegenc` fed I420 from
+               `nvvidconv` when it exists, `videoconvert` otherwise, so the
+               same pipelines run on plain Linux with `videotestsrc`
+
+Which GStreamer elements exist is probed once per process, through
+PyGObject when it is installed and `gst-inspect-1.0 --exists` otherwise;
+with neither available nothing is assumed to exist and the software path is
+used.  The chosen path is logged once per (codec, mode) and kept on each
+`Camera` as `encode_path`.
+
+Usage
+-----
+path = select_encode_path(codec="h264", mode="auto")
+EncodeBranch(path, location, bitrate=2000, key_int=fps)     # see `gst_pipeline`
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from loguru import logger
+
+from .gst_pipeline import Caps, Stages, element
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+except (ImportError, ValueError):  # probing falls back to gst-inspect-1.0
+    Gst = None
+
+encode_modes = ("auto", "hardware", "software")
+encode_codecs = ("h264", "jpeg")
+
+_HARDWARE_ENCODERS = {"h264": "nvv4l2h264enc", "jpeg": "nvjpegenc"}
+_SOFTWARE_ENCODERS = {"h264": "x264enc", "jpeg": "jpegenc"}
+# Motion-JPEG quality, both encoders take 0-100
+_JPEG_QUALITY = 85
+
+# element name -> available, filled on first use
+_probed: Dict[str, bool] = {}
+_selected: Dict[Tuple[str, str], "EncodePath"] = {}
+_probe_lock = threading.Lock()
+
+
+def _probe(name: str) -> bool:
+    if Gst is not None:
+        if not Gst.is_initialized():
+            Gst.init(None)
+        return Gst.ElementFactory.find(name) is not None
+    inspect = shutil.which("gst-inspect-1.0")
+    if inspect is None:
+        return False
+    try:
+        return subprocess.run([inspect, "--exists", name], capture_output=True, timeout=10).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def element_available(name: str) -> bool:
+    """whether GStreamer has an element factory called `name`, probed once per process"""
+    with _probe_lock:
+        available = _probed.get(name)
+        if available is None:
+            available = _probed[name] = _probe(name)
+    return available
+
+
+@dataclass(frozen=True, slots=True)
+class EncodePath:
+    codec: str
+    # encoder element name
+    encoder: str
+    hardware: bool
+    # raw video conversion in front of the encoder, `nvvidconv` or `videoconvert`
+    converter: str
+
+    def stages(self, bitrate: int, key_int: int = 0) -> Stages:
+        """
+        Stages from raw video to an encoded stream.
+
+        `bitrate` is in kbit/s (H.264 only); `key_int` > 0 forces a keyframe
+        every `key_int` frames so segment boundaries fall on split points.
+        """
+        if self.codec == "jpeg":
+            return (
+                element(self.converter),
+                Caps("I420", nvmm=self.hardware),
+                element(self.encoder, quality=_JPEG_QUALITY),
+            )
+        if self.hardware:
+            key_opts = {"iframeinterval": key_int, "idrinterval": key_int} if key_int > 0 else {}
+            return (
+                element(self.converter),
+                Caps("NV12", nvmm=True),
+                # nvv4l2h264enc takes bit/s; repeat SPS/PPS so every segment decodes on its own
+                element(self.encoder, bitrate=bitrate * 1000, insert_sps_pps=True, maxperf_enable=True, **key_opts),
+                element("h264parse"),
+            )
+        key_opts = {"key_int_max": key_int} if key_int > 0 else {}
+        return (
+            element(self.converter),
+            Caps("I420"),
+            element(self.encoder, tune="zerolatency", speed_preset="ultrafast", bitrate=bitrate, **key_opts),
+        )
+
+    def __str__(self) -> str:
+        kind = "hardware" if self.hardware else "software"
+        return f"{self.codec} via {self.encoder} ({kind}, {self.converter})"
+
+
+def select_encode_path(codec: str = "h264", mode: str = "auto") -> EncodePath:
+    """
+    Pick the encoder for `codec`: `hardware` requires NVENC/NVJPG, `software`
+    always uses the CPU encoder, `auto` prefers hardware when it is present.
+    """
+    if codec not in encode_codecs:
+        raise ValueError(f"Unsupported camera codec: {codec}")
+    if mode not in encode_modes:
+        raise ValueError(f"Unsupported camera encoder mode: {mode}")
+    path = _selected.get((codec, mode))
+    if path is not None:
+        return path
+
+    has_nvvidconv = element_available("nvvidconv")
+    hardware = mode != "software" and has_nvvidconv and element_available(_HARDWARE_ENCODERS[codec])
+    if mode == "hardware" and not hardware:
+        raise RuntimeError(f"Hardware {codec} encoding requested but {_HARDWARE_ENCODERS[codec]} or nvvidconv is unavailable")
+    if hardware:
+        path = EncodePath(codec, _HARDWARE_ENCODERS[codec], True, "nvvidconv")
+    else:
+        path = EncodePath(codec, _SOFTWARE_ENCODERS[codec], False, "nvvidconv" if has_nvvidconv else "videoconvert")
+    _selected[(codec, mode)] = path
+    logger.info(f"Camera recording encodes {path}")
+    return path
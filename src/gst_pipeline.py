@@ -0,0 +1,325 @@
+"""
+Typed GStreamer pipeline descriptors for the camera pipelines.
+
+Every camera pipeline has the same shape:
+
+  source → convert → [tee →] branch, branch, ...
+
+where each branch ends in a sink: the OpenCV appsink or an encoder into a
+recording.  A `PipelineSpec` describes one pipeline out of typed stages
+(`Element`, `Caps`) and branch types, and `build_pipeline` renders it to the
+`gst-launch` descriptor handed to `cv2.VideoCapture`:
+
+  * stages are joined with ``" ! "`` and property values are quoted as
+    needed, so fragments can't run together or lose their separators
+  * behind a tee every branch starts with a `queue` whose size and leakiness
+    come from the `LatencyProfile`, so latency is tuned per branch kind
+    (``appsink``, ``encoder``) instead of per string
+  * the appsink branch can crop and decimate (`videocrop`/`videoscale`) before
+    converting, so only the region of interest reaches OpenCV
+  * specs are validated before rendering (element and property names, a
+    single appsink, container options) and raise ValueError when malformed
+  * rendered descriptors are cached per (spec, profile); specs are frozen
+    and hashable, so identical cameras share one descriptor
+
+Usage
+-----
+spec = PipelineSpec(
+    source=csi_source(sensor_id=0, width=1280, height=720, fps=30),
+    convert=(element("nvvidconv", flip_method=2),),
+    branches=(AppSinkBranch("GRAY8"),),
+)
+descriptor = build_pipeline(spec, latency_profile("realtime"))
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, ClassVar, Dict, Optional, Tuple, Union
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from .gst_encode import EncodePath
+
+_FACTORY_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+_PROPERTY_NAME = re.compile(r"^[a-z][a-z0-9-]*$")
+# property values made only of these characters go unquoted
+_BARE_VALUE = re.compile(r"^[A-Za-z0-9_.+-]+$")
+
+
+# ---- stages
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    value = str(value)
+    if _BARE_VALUE.match(value):
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@dataclass(frozen=True, slots=True)
+class Element:
+    """one element with its properties, in the order they are rendered"""
+
+    factory: str
+    props: Tuple[Tuple[str, Union[str, int, bool]], ...] = ()
+
+    def __str__(self) -> str:
+        return " ".join([self.factory, *(f"{name}={_format_value(value)}" for name, value in self.props)])
+
+
+def element(factory: str, **props) -> Element:
+    """`Element` from keyword properties, with underscores standing in for hyphens"""
+    return Element(factory, tuple((name.replace("_", "-"), value) for name, value in props.items()))
+
+
+@dataclass(frozen=True, slots=True)
+class Caps:
+    """raw video caps filter, e.g. ``video/x-raw(memory:NVMM), width=1280, height=720, format=NV12``"""
+
+    format: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    framerate: Optional[int] = None
+    nvmm: bool = False
+
+    def __str__(self) -> str:
+        fields = ["video/x-raw(memory:NVMM)" if self.nvmm else "video/x-raw"]
+        if self.width is not None:
+            fields.append(f"width={self.width}")
+        if self.height is not None:
+            fields.append(f"height={self.height}")
+        if self.format is not None:
+            fields.append(f"format={self.format}")
+        if self.framerate is not None:
+            fields.append(f"framerate={self.framerate}/1")
+        return ", ".join(fields)
+
+
+Stage = Union[Element, Caps]
+Stages = Tuple[Stage, ...]
+
+
+def csi_source(sensor_id: int, width: int, height: int, fps: int, fmt: Optional[str] = None, gain_range: Optional[str] = None) -> Stages:
+    """Jetson CSI camera in NVMM, optionally with a fixed digital gain range such as ``"1 1"``"""
+    props = {"sensor_id": sensor_id}
+    if gain_range is not None:
+        props["ispdigitalgainrange"] = gain_range
+    return (element("nvarguscamerasrc", **props), Caps(fmt, width, height, fps, nvmm=True))
+
+
+def testsrc_source(sensor_id: int, width: int, height: int, fps: int) -> Stages:
+    """live `videotestsrc` stand-in for `csi_source`, its ball coloured per sensor"""
+    return (
+        element("videotestsrc", is_live=True, pattern="ball", foreground_color=0xFFFFFFFF - sensor_id),
+        Caps(None, width, height, fps),
+    )
+
+
+# ---- latency profiles
+
+
+@dataclass(frozen=True, slots=True)
+class QueueSettings:
+    # 0 leaves a limit unbounded
+    max_size_buffers: int
+    max_size_time_ns: int = 0
+    # `no` blocks the tee when full, `downstream` discards the oldest buffer
+    leaky: str = "no"
+
+    def element(self) -> Element:
+        return element(
+            "queue",
+            max_size_buffers=self.max_size_buffers,
+            max_size_bytes=0,
+            max_size_time=self.max_size_time_ns,
+            leaky=self.leaky,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class LatencyProfile:
+    """queue settings per branch kind, plus how many buffers the appsink holds for OpenCV"""
+
+    appsink: QueueSettings
+    encoder: QueueSettings
+    appsink_max_buffers: int = 1
+
+
+latency_profiles: Dict[str, LatencyProfile] = {
+    # newest frame only on the live branches; recordings may lag a second before blocking the tee
+    "realtime": LatencyProfile(
+        appsink=QueueSettings(1, leaky="downstream"),
+        encoder=QueueSettings(0, max_size_time_ns=1_000_000_000),
+    ),
+    "balanced": LatencyProfile(
+        appsink=QueueSettings(4, leaky="downstream"),
+        encoder=QueueSettings(0, max_size_time_ns=2_000_000_000),
+        appsink_max_buffers=2,
+    ),
+    # nothing is discarded before the appsink; a stalled branch back-pressures the source
+    "lossless": LatencyProfile(
+        appsink=QueueSettings(30),
+        encoder=QueueSettings(0, max_size_time_ns=5_000_000_000),
+        appsink_max_buffers=30,
+    ),
+}
+
+
+def latency_profile(name: str) -> LatencyProfile:
+    try:
+        return latency_profiles[name]
+    except KeyError:
+        raise ValueError(f"Unsupported camera latency profile: {name}")
+
+
+# ---- branches
+
+
+@dataclass(frozen=True, slots=True)
+class AppSinkBranch:
+    """
+    frames for OpenCV in `format`, e.g. ``GRAY8`` or ``BGR``, optionally cropped by
+    `crop` (left, top, right, bottom pixels) and then scaled to `scale` (width, height)
+    """
+
+    kind: ClassVar[str] = "appsink"
+    format: str
+    convert: str = "videoconvert"
+    crop: Optional[Tuple[int, int, int, int]] = None
+    scale: Optional[Tuple[int, int]] = None
+
+    def stages(self, profile: LatencyProfile) -> Stages:
+        roi: Stages = ()
+        if self.crop is not None:
+            left, top, right, bottom = self.crop
+            roi += (element("videocrop", left=left, top=top, right=right, bottom=bottom),)
+        if self.scale is not None:
+            # nearest-neighbour is plain decimation, and the cheapest scaler on the CPU
+            roi += (element("videoscale", method="nearest-neighbour"), Caps(width=self.scale[0], height=self.scale[1]))
+        return (
+            # crop and scale before converting, so the conversion only touches the ROI
+            *roi,
+            element(self.convert),
+            Caps(self.format),
+            # `read()` blocks until the next buffer arrives; the sink never waits on the clock and
+            # drops its oldest buffer when the reader falls behind, so the source paces capture
+            element("appsink", max_buffers=profile.appsink_max_buffers, drop=True, sync=False),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class EncodeBranch:
+    """recording at `location` (without extension) as a single mp4/mkv, or `split_ns` mkv segments"""
+
+    kind: ClassVar[str] = "encoder"
+    encode: "EncodePath"
+    location: str
+    container: str = "mkv"
+    bitrate: int = 2000
+    key_int: int = 0
+    split_ns: int = 0
+
+    def stages(self, profile: LatencyProfile) -> Stages:
+        encoded = self.encode.stages(self.bitrate, self.key_int)
+        if self.container == "mp4":
+            return (*encoded, element("mp4mux"), element("filesink", location=f"{self.location}.mp4", sync=False))
+        if self.split_ns > 0:
+            sink = element("splitmuxsink", location=f"{self.location}_%05d.mkv", max_size_time=self.split_ns, muxer="matroskamux")
+        else:
+            sink = element("splitmuxsink", location=f"{self.location}.mkv", muxer="matroskamux")
+        return (*encoded, sink)
+
+
+Branch = Union[AppSinkBranch, EncodeBranch]
+
+
+# ---- descriptors
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineSpec:
+    source: Stages
+    convert: Stages = ()
+    branches: Tuple[Branch, ...] = ()
+
+
+def _check_stages(stages: Stages, where: str) -> None:
+    for stage in stages:
+        if isinstance(stage, Caps):
+            continue
+        if not isinstance(stage, Element):
+            raise ValueError(f"{where}: expected Element or Caps, got {type(stage).__name__}")
+        if not _FACTORY_NAME.match(stage.factory):
+            raise ValueError(f"{where}: invalid element name {stage.factory!r}")
+        for name, _ in stage.props:
+            if not _PROPERTY_NAME.match(name):
+                raise ValueError(f"{where}: invalid property {name!r} on {stage.factory}")
+
+
+def validate(spec: PipelineSpec, profile: LatencyProfile) -> None:
+    """raise ValueError if `spec` can't describe a working camera pipeline"""
+    if not spec.source or not isinstance(spec.source[0], Element):
+        raise ValueError("pipeline must start with a source element")
+    if not spec.branches:
+        raise ValueError("pipeline needs at least one branch")
+    appsinks = sum(isinstance(branch, AppSinkBranch) for branch in spec.branches)
+    if appsinks > 1:
+        # OpenCV reads a single appsink; a second one would fill and stall the tee
+        raise ValueError(f"pipeline has {appsinks} appsink branches, OpenCV reads only one")
+    _check_stages(spec.source, "source")
+    _check_stages(spec.convert, "convert")
+    for branch in spec.branches:
+        if isinstance(branch, AppSinkBranch):
+            if branch.crop is not None and min(branch.crop) < 0:
+                raise ValueError(f"appsink crop can't be negative: {branch.crop}")
+            if branch.scale is not None and min(branch.scale) <= 0:
+                raise ValueError(f"appsink scale must be positive: {branch.scale}")
+        if isinstance(branch, EncodeBranch):
+            if branch.container not in ("mkv", "mp4"):
+                raise ValueError(f"unsupported recording container: {branch.container}")
+            if branch.split_ns > 0 and branch.container != "mkv":
+                raise ValueError("only mkv recordings can be split into segments")
+        _check_stages(branch.stages(profile), f"{branch.kind} branch")
+
+
+def _join(stages: Stages) -> str:
+    return " ! ".join(str(stage) for stage in stages)
+
+
+# (spec, profile) -> descriptor, filled on first build
+_built: Dict[Tuple[PipelineSpec, LatencyProfile], str] = {}
+_built_lock = threading.Lock()
+
+
+def build_pipeline(spec: PipelineSpec, profile: LatencyProfile) -> str:
+    """validated `gst-launch` descriptor for `spec`, cached per (spec, profile)"""
+    key = (spec, profile)
+    with _built_lock:
+        descriptor = _built.get(key)
+    if descriptor is not None:
+        return descriptor
+
+    validate(spec, profile)
+    trunk = _join(spec.source + spec.convert)
+    if len(spec.branches) == 1:
+        descriptor = f"{trunk} ! {_join(spec.branches[0].stages(profile))}"
+    else:
+        # every branch gets its own queue, i.e. its own streaming thread, sized by its kind
+        branches = " ".join(
+            f"t. ! {_join((getattr(profile, branch.kind).element(),) + branch.stages(profile))}"
+            for branch in spec.branches
+        )
+        descriptor = f"{trunk} ! tee name=t {branches}"
+
+    with _built_lock:
+        _built[key] = descriptor
+    logger.debug(f"Built pipeline: {descriptor}")
+    return descriptor
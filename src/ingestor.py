@@ -1,20 +1,37 @@
 from __future__ import annotations
-from operator import itemgetter
 
+import fcntl
 import socket
 import struct
+import termios
 import sys
 import time
 import os
 
 from datetime import datetime
 from loguru import logger
-from queue import PriorityQueue
-from collections import deque
-from typing import Deque
-from dataclasses import dataclass
-from threading import Thread, Event
+from queue import Empty, Queue
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+from dataclasses import dataclass, replace
+from threading import Thread, Event, Lock
 from .config import RatballConfig
+from .dataclasses import SegmentIndexEntry
+from .sensor_store import open_sensor_store
+from .stats import LatencyRecorder
+from .clock import clock
+from .clock_sync import PeerClock
+from . import socket_profile
+from .protocol import (
+    SAME_CONNECTION_PORT,
+    WIRE_MODE_SINGLE,
+    WIRE_MODE_BATCH,
+    WIRE_MODE_SEGMENT,
+    CLOCK_PONG,
+    CONTROL_BATCH_COUNT,
+    CONTROL_FRAME_SIZE,
+    FramedReader,
+    iter_sensor_batch,
+)
 from .utils import safe_unwrap_exception
 
 
@@ -28,19 +45,47 @@ from .utils import safe_unwrap_exception
 #  - Data file post-processing may be performed (i.e. chunked video collation, frame decomposition, CSV data statistics, etc.)
 # 
 # Inbound connections are accepted on a single port, then per-device socket listeners are
-# negotiated following successful receipt of the following salutory payload:
+# negotiated following successful receipt of the following salutory payload. In single-port
+# mode (`ingestor.single_port`), the handshake instead carries port 0 and the device's data
+# stream follows on the same connection, routed by the device type and ident in the hello:
 #
 # Client Hello payload:
-# | ---- device type ---- | ---- device ident ---- | --- timestamp --- | (18B)
+# | ---- device type ---- | ---- device ident ---- | --- timestamp --- | -- wire mode -- | (19B)
 #
-# Device sockets are placed into a priority queue and handled round-robin according to timestamp.
+# Server Handshake payload:
+# | ---- data port ---- | -- granted wire mode -- | (3B)
+#
+# Each accepted device is dispatched on its device type straight to that type's stream handler,
+# which runs on a thread of its own for the lifetime of the device's data stream.
+#
+# Framed data connections are pinged every `ingestor.clock_sync_interval_s` (see `clock_sync`);
+# once a device has answered, its timestamps are rewritten into the Ingestor's time base on receipt.
 
-#client_hello_binfmt = ">6sId"
+#client_hello_binfmt = ">6sIdB"
 #client_hello_len = struct.calcsize(client_hello_binfmt)
 
-server_handshake_binfmt = ">H"
+server_handshake_binfmt = ">HB"
 server_handshake_len = struct.calcsize(server_handshake_binfmt)
 
+def _unsent_bytes(conn) -> int:
+    """bytes still queued in the connection's kernel send buffer"""
+    return struct.unpack("i", fcntl.ioctl(conn.fileno(), termios.TIOCOUTQ, b"\0\0\0\0"))[0]
+
+
+# wire modes this Ingestor is able to decode, per device type
+supported_wire_modes: Dict[str, FrozenSet[int]] = {
+    "sensor": frozenset((WIRE_MODE_SINGLE, WIRE_MODE_BATCH)),
+    "camera": frozenset((WIRE_MODE_SINGLE, WIRE_MODE_SEGMENT)),
+}
+
+
+def grant_wire_mode(device: str, ident: int, wire_mode: int) -> int:
+    """the requested wire mode if `device`'s receive path decodes it, single-record framing otherwise"""
+    if wire_mode in supported_wire_modes.get(device, ()):
+        return wire_mode
+    logger.warning(f"Device {device}{ident} requested unsupported wire mode {wire_mode}, granting single")
+    return WIRE_MODE_SINGLE
+
 # immutable descriptor object for device connection data
 @dataclass(frozen=True, slots=True)
 class DeviceGovernorConnection:
@@ -48,6 +93,9 @@ class DeviceGovernorConnection:
     ident: int
     created_ts: float
     sock: socket.socket
+    wire_mode: int = WIRE_MODE_SINGLE
+    # True if `sock` is already the connected data stream (single-port mode)
+    multiplexed: bool = False
 
     # implement to make instances subscriptable:
     def __getitem__(self, item):
@@ -63,48 +111,77 @@ class IngestorService:
         self._next_device_port: int = self._cfg.ingestor.data_port_range_start
         self._init_gateway_socket()
 
-        # priority queue of inbound device connections
-        self.connection_pool = PriorityQueue()
+        # stream handler per device type, each run on its own thread per accepted device
+        self._device_handlers: Dict[str, Callable[[DeviceGovernorConnection], None]] = {
+            "sensor": self.consume_sensor_feed,
+            "camera": self.consume_camera_feed,
+        }
 
         self._rx_complete = Event()
         self._term_flag = Event()
 
-        self._data_dir = os.path.join(
-            self._cfg.data_paths.sensor,
-            datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
-        )
+        session_dirname = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+        self._data_dir = os.path.join(self._cfg.data_paths.sensor, session_dirname)
+        self._camera_dir = os.path.join(self._cfg.data_paths.camera, session_dirname)
         self._init_data_dirs()
 
         # begin with one listener thread; thread pool will grow with # of clients
         self._thread_pool = [
             Thread(target=self.queue_inbound_clients, name="_lst_client_"),
         ]
-        self.sensor_data: Deque = deque()
+        # clock sync state of every framed data connection, pinged from one thread
+        self._clock_peers: Dict[socket.socket, PeerClock] = {}
+        self._clock_peers_lock = Lock()
+        if self._cfg.ingestor.clock_sync_interval_s > 0:
+            self._thread_pool.append(Thread(target=self._ping_clock_peers, name="_clock_ping_", daemon=True))
+        # decoded sensor records, one sequence of records per item (a single record or a whole batch);
+        # all sensor streams share one queue, so a single writer thread group-commits them
+        self.sensor_data: Queue = Queue()
+        self._sensor_writer: Optional[Thread] = None
+        self._sensor_writer_lock = Lock()
+        self._latency: Optional[LatencyRecorder] = LatencyRecorder() if self._cfg.ingestor.latency_stats else None
 
     def _init_data_dirs(self):
         logger.info(f"Creating sensor data directory at {self._data_dir}")
         os.makedirs(self._data_dir, exist_ok=True)
+        logger.info(f"Creating camera data directory at {self._camera_dir}")
+        os.makedirs(self._camera_dir, exist_ok=True)
 
     def _init_gateway_socket(self):
         """Initialize the gateway socket and begin listening for client connections"""
         try:
-            self._gateway_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._gateway_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self._gateway_sock.bind((
-                '',
+            self._gateway_sock = socket_profile.listen(
                 self._cfg.ingestor.gateway_port,
-            ))
-            self._gateway_sock.listen()
+                self._cfg.sockets.control,
+                "gateway",
+            )
         except socket.error as ex:
             exmsg = safe_unwrap_exception(ex)
             logger.error(f"Socket error occurred while reinitializing gateway socket: {exmsg}")
 
     def _get_next_device_port(self):
-        """Return the next available data port number, then increment it"""
+        """Return the next available data port number, then increment it (wrapping within the range)"""
         port = self._next_device_port
         self._next_device_port += 1
+        if self._next_device_port >= self._cfg.ingestor.data_port_range_end:
+            self._next_device_port = self._cfg.ingestor.data_port_range_start
         return port
 
+    def _open_device_stream(self, device_connection: DeviceGovernorConnection) -> socket.socket:
+        """return the connected data socket for a device connection, tuned for its stream type"""
+        if device_connection.multiplexed:
+            conn = device_connection.sock
+        else:
+            conn, addr = device_connection.sock.accept()
+            # data ports serve a single connection; free the listener straight away
+            device_connection.sock.close()
+        socket_profile.apply_profile(
+            conn,
+            self._cfg.sockets.for_device(device_connection.device_type),
+            f"{device_connection.device_type}{device_connection.ident}",
+        )
+        return conn
+
     def _recv_client_hello(self, conn: socket.socket) -> bytes:
         client_hello_len = struct.calcsize(
             self._cfg.ingestor.client_hello_binfmt
@@ -118,7 +195,7 @@ class IngestorService:
             exmsg = ex.message if hasattr(ex, 'message') else ex
             logger.error(f"Exception occurred while accepting new connection: {exmsg}")
 
-    def _unpack_client_hello(self, hello: bytes) -> Tuple[str, int, float]:
+    def _unpack_client_hello(self, hello: bytes) -> Tuple[bytes, int, float, int]:
         try:
             return struct.unpack(
                 self._cfg.ingestor.client_hello_binfmt,
@@ -129,55 +206,67 @@ class IngestorService:
             logger.critical(f"Exception occurred while unpacking client hello payload: {exmsg}")
 
     def _accept_new_conn(self):
-        """Accept device connection, assign that device a socket in a priority queue, then send handshake to client"""
+        """Accept device connection, dispatch it to its device type's handler, then send handshake to client"""
         conn, addr = self._gateway_sock.accept()
         logger.info(f"Connection from: {addr}")
 
         hello = self._recv_client_hello(conn)
         if hello is not None:
-            device_enc, ident, ts = self._unpack_client_hello(hello)
+            device_enc, ident, ts, wire_mode = self._unpack_client_hello(hello)
             device = device_enc.decode("ascii")
-            logger.info(f"Got client hello from device {device}{ident}, ts={ts}")
-            dt = time.time()*1000 - ts
-
-            # create and bind a new socket at a precomputed port
-            assigned_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            assigned_socket.bind(('', self._get_next_device_port()))
-            assigned_socket.listen()
-
-            # place the device descriptor + assigned socket into queue
-            self.connection_pool.put(
-                (
-                    # prioritize according to delta w/ incoming connection timestamp
-                    int(dt),
-                    DeviceGovernorConnection(
-                        device,
-                        ident,
-                        ts,
-                        assigned_socket,
-                    )
+            logger.info(f"Got client hello from device {device}{ident}, ts={ts}, wire_mode={wire_mode}")
+
+            handler = self._device_handlers.get(device)
+            if handler is None:
+                logger.warning(f"No handler for device type {device}, closing connection from {addr}")
+                conn.close()
+                return
+
+            # fall back to single-record framing for any wire mode this device type can't use
+            wire_mode = grant_wire_mode(device, ident, wire_mode)
+
+            multiplexed = self._cfg.ingestor.single_port
+            if multiplexed:
+                # the device streams on this very connection
+                assigned_socket = conn
+                assigned_port = SAME_CONNECTION_PORT
+            else:
+                # create and bind a new socket at a precomputed port, tuned for the device's stream
+                assigned_socket = socket_profile.listen(
+                    self._get_next_device_port(),
+                    self._cfg.sockets.for_device(device),
+                    f"{device}{ident}",
                 )
+                assigned_port = assigned_socket.getsockname()[1]
+
+            # hand the device descriptor + assigned socket straight to its handler thread
+            device_connection = DeviceGovernorConnection(
+                device,
+                ident,
+                ts,
+                assigned_socket,
+                wire_mode,
+                multiplexed,
+            )
+            # send handshake w/ permanent port to the client to use for all further transactions; it goes
+            # out before the handler starts, so in single-port mode no clock ping can precede it
+            conn.sendall(
+                struct.pack(server_handshake_binfmt, assigned_port, wire_mode)
             )
 
-            if device == 'sensor':
-                logger.info(f"Adding new thread to thread pool for sensor{ident}, ts={ts}")
-                t = Thread(target=self.consume_sensor_feed, name=f"_rx_sensor_{len(self._thread_pool)}_", daemon=True)
-                self._thread_pool.append(t)
-                t.start()
-            if device == 'camera':
-                logger.info(f"Adding new thread to thread pool for camera{ident}, ts={ts}")
-                t = Thread(target=self.consume_camera_feed, name=f"_rx_camera_{len(self._thread_pool)}_", daemon=True)
-                self._thread_pool.append(t)
-                t.start()
-
-            # send handshake w/ permanent port to the client to use for all further transactions
-            conn.send(
-                struct.pack(server_handshake_binfmt, assigned_socket.getsockname()[1])
+            logger.info(f"Adding new thread to thread pool for {device}{ident}, ts={ts}")
+            t = Thread(
+                target=handler,
+                args=[device_connection],
+                name=f"_rx_{device}_{len(self._thread_pool)}_",
+                daemon=True,
             )
+            self._thread_pool.append(t)
+            t.start()
 
-            # clean up and reset for new client connections
-            conn.close()
-            self._init_gateway_socket()
+            # the gateway keeps listening; only the per-connection socket is released
+            if not multiplexed:
+                conn.close()
         else:
             logger.warning(f"Did not receive hello packet from client at {addr}")
 
@@ -186,98 +275,309 @@ class IngestorService:
         while True:
             self._accept_new_conn()
 
-    def consume_camera_feed(self):
-        pass
+    def consume_camera_feed(self, device_connection: DeviceGovernorConnection):
+        """receive one camera's stream for its lifetime; each camera consumer thread owns exactly one camera stream"""
+        ident = device_connection.ident
+        logger.info(f"Receiving frame stream from camera{ident}")
+        conn = self._open_device_stream(device_connection)
+        peer = self._register_clock_peer(conn, f"camera{ident}")
+        try:
+            if device_connection.wire_mode == WIRE_MODE_SEGMENT:
+                self._recv_camera_segments(conn, ident, peer)
+            else:
+                self._recv_camera_frames(conn, ident, peer)
+        finally:
+            self._unregister_clock_peer(conn)
+
+    # ---- clock sync
+
+    def _register_clock_peer(self, conn, name: str) -> Optional[PeerClock]:
+        """start pinging a framed data connection, or None if clock sync is disabled"""
+        if self._cfg.ingestor.clock_sync_interval_s <= 0:
+            return None
+        peer = PeerClock(name, self._cfg.ingestor.clock_sync_window)
+        with self._clock_peers_lock:
+            self._clock_peers[conn] = peer
+        return peer
+
+    def _unregister_clock_peer(self, conn) -> None:
+        with self._clock_peers_lock:
+            self._clock_peers.pop(conn, None)
+
+    def _ping_clock_peers(self):
+        """thread task that sends a clock ping down every registered data connection"""
+        interval = self._cfg.ingestor.clock_sync_interval_s
+        while not self._rx_complete.wait(interval):
+            with self._clock_peers_lock:
+                peers = list(self._clock_peers.items())
+            for conn, peer in peers:
+                try:
+                    # like the asyncio Ingestor, only ping once the previous ping has drained, so a ping
+                    # frame always fits whole and one device's full receive window never blocks the others
+                    if _unsent_bytes(conn) > 0:
+                        logger.debug(f"Skipped clock ping to {peer.name}, send buffer not drained")
+                        continue
+                    ping = peer.ping()
+                    if ping is None:
+                        continue
+                    sent = conn.send(ping, socket.MSG_DONTWAIT)
+                except BlockingIOError:
+                    logger.debug(f"Skipped clock ping to {peer.name}, send buffer full")
+                    continue
+                except OSError as ex:
+                    exmsg = safe_unwrap_exception(ex)
+                    logger.debug(f"Clock ping to {peer.name} failed: {exmsg}")
+                    self._unregister_clock_peer(conn)
+                    continue
+                if sent != len(ping):
+                    # the device's ping responder is now out of step with the stream, stop pinging it
+                    logger.warning(f"Clock ping to {peer.name} cut short after {sent} of {len(ping)} bytes, dropping the peer")
+                    self._unregister_clock_peer(conn)
+
+    def _recv_clock_pong(self, reader: FramedReader, peer: Optional[PeerClock], pong_view) -> bool:
+        """read the pong following a control frame header, returning False if the peer closed the connection"""
+        if not reader.read_into(pong_view):
+            return False
+        if peer is not None:
+            rtt = peer.pong(pong_view)
+            if self._latency is not None:
+                self._latency.record_ms(f"{peer.name}.rtt", rtt / 1e6)
+        return True
+
+    # ---- camera streams
+
+    def _recv_camera_segments(self, conn, ident: int, peer: Optional[PeerClock] = None):
+        """receive indexed video segments into per-segment files plus a CSV segment index"""
+        header_fmt = struct.Struct(self._cfg.camera.segment_header_binfmt)
+        chunk_size = 1 << 20
+        reader = FramedReader(conn, chunk_size)
+        pong_view = memoryview(bytearray(CLOCK_PONG.size))
+
+        index_path = os.path.join(self._camera_dir, f"camera{ident}_segments.csv")
+        segments = 0
+        with open(index_path, 'w') as index_file:
+            index_file.write("seq,start_ts,end_ts,frame_count,byte_offset,nbytes\n")
+            while True:
+                try:
+                    header = reader.read_header(header_fmt)
+                    if header is None:
+                        break
+                    entry = SegmentIndexEntry(*header)
+                    if entry.seq == CONTROL_FRAME_SIZE:
+                        if not self._recv_clock_pong(reader, peer, pong_view):
+                            break
+                        continue
+                    if peer is not None and peer.synced:
+                        entry = replace(
+                            entry,
+                            start_ts=entry.start_ts + peer.offset_ns,
+                            end_ts=entry.end_ts + peer.offset_ns,
+                        )
+                    outpath = os.path.join(self._camera_dir, f"camera{ident}_{entry.seq:05d}.mkv")
+                    with open(outpath, 'wb') as outfile:
+                        remaining = entry.nbytes
+                        while remaining > 0:
+                            chunk = reader.read(min(remaining, chunk_size))
+                            if chunk is None:
+                                break
+                            outfile.write(chunk)
+                            remaining -= len(chunk)
+                    if remaining > 0:
+                        logger.warning(f"Camera{ident} stream closed mid-segment {entry.seq}, {remaining} bytes missing")
+                        break
+                except socket.error as ex:
+                    exmsg = safe_unwrap_exception(ex)
+                    logger.error(f"Socket error occurred while receiving camera{ident} segment: {exmsg}")
+                    break
+
+                logger.info(f"Received video segment: {entry}")
+                index_file.write(
+                    f"{entry.seq},{entry.start_ts},{entry.end_ts},{entry.frame_count},{entry.byte_offset},{entry.nbytes}\n"
+                )
+                index_file.flush()
+                segments += 1
+
+        logger.info(f"Camera{ident} segment stream ended after {segments} segments, index written to {index_path}")
+        conn.close()
+
+    def _recv_camera_frames(self, conn, ident: int, peer: Optional[PeerClock] = None):
+        """receive `!BIQ`-framed raw frames into reused buffers and append them to the camera's capture file"""
+        header_fmt = struct.Struct(self._cfg.camera.frame_header_binfmt)
+        # the frame buffer grows only when a larger frame arrives, then is reused for every frame
+        reader = FramedReader(conn, self._cfg.camera.width * self._cfg.camera.height)
+        pong_view = memoryview(bytearray(CLOCK_PONG.size))
+
+        outpath = os.path.join(self._camera_dir, f"camera{ident}.bin")
+        frames = 0
+        window_start = time.perf_counter()
+        # each record is stored exactly as received: frame header followed by the raw frame
+        with open(outpath, 'wb') as outfile:
+            while True:
+                try:
+                    header = reader.read_header(header_fmt)
+                    if header is None:
+                        break
+                    cam_id, frame_sz, sent_ts = header
+                    if frame_sz == CONTROL_FRAME_SIZE:
+                        if not self._recv_clock_pong(reader, peer, pong_view):
+                            break
+                        continue
+                    frame = reader.read(frame_sz)
+                    if frame is None:
+                        logger.warning(f"Camera{ident} stream closed mid-frame")
+                        break
+                except socket.error as ex:
+                    exmsg = safe_unwrap_exception(ex)
+                    logger.error(f"Socket error occurred while receiving camera{ident} frame: {exmsg}")
+                    break
+
+                if peer is not None and peer.synced:
+                    # stored headers carry the capture time in the Ingestor's time base
+                    sent_ts += peer.offset_ns
+                    header_fmt.pack_into(reader.header, 0, cam_id, frame_sz, sent_ts)
+                if self._latency is not None:
+                    self._latency.record_epoch_ns(f"camera{ident}", sent_ts)
+                outfile.write(reader.header)
+                outfile.write(frame)
+
+                frames += 1
+                if frames % 300 == 0:
+                    elapsed = time.perf_counter() - window_start
+                    logger.info(f"Camera{ident} received {frames} frames, {300 / elapsed:.1f} fps over last window")
+                    window_start = time.perf_counter()
+
+        logger.info(f"Camera{ident} stream ended after {frames} frames, written to {outpath}")
+        conn.close()
+
+    # ---- sensor streams
+
+    def _recv_sensor_batches(self, conn, peer: Optional[PeerClock] = None):
+        """receive framed sensor batches, decoding every record of a frame in a single pass"""
+        header_fmt = struct.Struct(self._cfg.sensor.batch_header_binfmt)
+        record_size = struct.calcsize(self._cfg.sensor.binfmt)
+        reader = FramedReader(conn, record_size * self._cfg.sensor.batch_size)
+        pong_view = memoryview(bytearray(CLOCK_PONG.size))
+        expected_seq = None
+        while True:
+            try:
+                header = reader.read_header(header_fmt)
+                if header is None:
+                    logger.info("Sensor batch stream closed by client")
+                    return
+                count, seq = header
+                if count == CONTROL_BATCH_COUNT:
+                    if not self._recv_clock_pong(reader, peer, pong_view):
+                        logger.info("Sensor batch stream closed by client")
+                        return
+                    continue
+                body = reader.read(count * record_size)
+                if body is None:
+                    logger.info("Sensor batch stream closed by client mid-frame")
+                    return
+            except socket.error as ex:
+                exmsg = safe_unwrap_exception(ex)
+                logger.error(f"Socket error occurred while receiving sensor batch: {exmsg}")
+                return
+
+            if expected_seq is not None and seq != expected_seq:
+                logger.warning(f"Sensor batch sequence gap: expected {expected_seq}, got {seq}")
+            expected_seq = (seq + 1) & 0xFFFFFFFF
 
-    def _recv_sensor_data(self, conn):
-        data_pkt_size = struct.calcsize(self._cfg.sensor.binfmt)
+            logger.debug(f"Received sensor batch {seq} with {count} records")
+            try:
+                records = list(iter_sensor_batch(self._cfg.sensor.binfmt, body))
+                if peer is not None and peer.synced:
+                    offset_ms = peer.offset_ms
+                    records = [(ts + offset_ms, x, y, h, idx) for ts, x, y, h, idx in records]
+                self.sensor_data.put(records)
+            except struct.error as ex:
+                exmsg = safe_unwrap_exception(ex)
+                logger.error(f"Struct error occurred while deserializing sensor batch: {exmsg}")
+
+    def _recv_sensor_data(self, conn, ident: int = 0, wire_mode: int = WIRE_MODE_SINGLE):
+        if wire_mode == WIRE_MODE_BATCH:
+            peer = self._register_clock_peer(conn, f"sensor{ident}")
+            try:
+                return self._recv_sensor_batches(conn, peer)
+            finally:
+                self._unregister_clock_peer(conn)
+
+        # single records have no framing to carry a clock pong, so these streams are never pinged
+        record_fmt = struct.Struct(self._cfg.sensor.binfmt)
+        reader = FramedReader(conn, record_fmt.size)
         # keep receiving data for the lifetime of the thread
         while True:
-            sensor_data_bin = b""
             try:
-                while len(sensor_data_bin) < data_pkt_size:
-                    packet = conn.recv(data_pkt_size - len(sensor_data_bin))
-                    if not packet:
-                        break
-                    sensor_data_bin += packet
+                sensor_data_bin = reader.read(record_fmt.size)
+                if sensor_data_bin is None:
+                    logger.info("Sensor stream closed by client")
+                    return
             except socket.error as ex:
                 exmsg = safe_unwrap_exception(ex)
                 logger.error(f"Socket error occurred while receiving sensor data: {exmsg}")
+                return
 
             logger.debug(f"Received {len(sensor_data_bin)} byte sensor data packet")
             try:
-                ts, x, y, h, idx = struct.unpack(
-                    self._cfg.sensor.binfmt,
-                    sensor_data_bin,
-                )
-                payload = SensorPacketPayload(ts, x, y, h, idx)
-                self.sensor_data.append(payload)
+                record = record_fmt.unpack(sensor_data_bin)
+                self.sensor_data.put((record,))
             except struct.error as ex:
                 exmsg = safe_unwrap_exception(ex)
                 logger.error(f"Struct error occurred while deserializing sensor data packet: {exmsg}")
 
     def _write_sensor_data(self):
-        # write data from queue for the lifetime of the thread
-        while True:
-            if len(self.sensor_data) > 0:
-                with (
-                    open(os.path.join(self._data_dir, 'sensor0.csv'), 'w+') as s1_outfile,
-                    open(os.path.join(self._data_dir, 'sensor1.csv'), 'w+') as s2_outfile,
-                ):
-                    datum = self.sensor_data.popleft()
-                    nextrow = f"{datum.ts},{datum.x},{datum.y},{datum.h}\n"
-                    logger.debug(f"Emitting row to CSV: {nextrow}")
-                    match datum.idx:
-                        case 0:
-                            s0_outfile.write(nextrow)
-                        case 1:
-                            s1_outfile.write(nextrow)
-
-    def consume_sensor_feed(self):
-        while True:
-            if not self.connection_pool.empty():
-                # pop prioritized connection from PriorityQueue, unpack tuple
-                prio, device_connection = self.connection_pool.get()
-
-                # unpack device descriptor fields from DeviceGovernorConnection
-                device_type, ident, created_ts, sock = itemgetter('device_type', 'ident', 'created_ts', 'sock')(
-                    device_connection
-                )
-                # reprioritize with a new timestamp
-                dt = time.time()*1000 - created_ts
-                # if the device isn't what we're looking for, reprioritize and re-enqueue it
-                if device_type != 'sensor':
-                    logger.info(f"Returning device {device_type}{ident} to connection pool with priority {dt}")
-                    self.connection_pool.put(
-                        (
-                            # prioritize according to delta w/ incoming connection timestamp
-                            int(dt),
-                            DeviceGovernorConnection(
-                                device,
-                                ident,
-                                ts,
-                                assigned_socket,
-                            )
-                        )
-                    )
-
-                # if it is, accept connection on socket and begin reading to CSV
-                else:
-                    logger.info(f"Spawning thread to begin writing data stream from {device_type}{ident}")
-                    conn, addr = sock.accept()
-                    recv_t = Thread(target=self._recv_sensor_data, name=f"_recv_sensor_{len(self._thread_pool)}_", args=[conn], daemon=True)
-                    write_t = Thread(target=self._write_sensor_data, name=f"_write_sensor_{len(self._thread_pool)}_", daemon=True)
-                    self._thread_pool.extend([recv_t, write_t])
-                    recv_t.start()
-                    write_t.start()
-                    logger.info(f"Current thread pool allocations: {len(self._thread_pool)}")
+        """group-commit decoded samples into the session's sensor store until the ingestor stops"""
+        store = open_sensor_store(self._cfg.sensor, self._data_dir)
+        logger.info(f"Writing {self._cfg.sensor.store} sensor store to {self._data_dir}")
+        poll_interval = self._cfg.sensor.flush_interval_ms / 1000
+        try:
+            while not self._rx_complete.is_set():
+                try:
+                    records = self.sensor_data.get(timeout=poll_interval)
+                except Empty:
+                    # commit staged samples that aged out while the streams were idle
+                    store.poll()
+                    continue
+                if self._latency is not None:
+                    self._latency.record_epoch_ms("sensor", (record[0] for record in records))
+                store.extend(records)
+                store.poll()
+            # drain whatever the receivers queued before shutdown
+            while True:
+                try:
+                    store.extend(self.sensor_data.get_nowait())
+                except Empty:
+                    break
+        finally:
+            store.close()
+
+    def consume_sensor_feed(self, device_connection: DeviceGovernorConnection):
+        """receive one sensor stream for its lifetime, starting the shared sensor writer with the first stream"""
+        ident = device_connection.ident
+        with self._sensor_writer_lock:
+            if self._sensor_writer is None:
+                self._sensor_writer = Thread(target=self._write_sensor_data, name=f"_write_sensor_{len(self._thread_pool)}_", daemon=True)
+                self._thread_pool.append(self._sensor_writer)
+                self._sensor_writer.start()
+        logger.info(f"Receiving data stream from sensor{ident}, thread pool allocations: {len(self._thread_pool)}")
+        conn = self._open_device_stream(device_connection)
+        self._recv_sensor_data(conn, ident, device_connection.wire_mode)
 
 
     def start(self):
+        clock.start_drift_monitor()
         for thread in self._thread_pool:
             thread.start()
-        for thread in self._thread_pool:
-            thread.join()
+        try:
+            for thread in self._thread_pool:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stop()
 
     def stop(self):
-        pass
+        # let the sensor writer commit and close its store before the daemon threads die
+        self._rx_complete.set()
+        if self._sensor_writer is not None:
+            self._sensor_writer.join()
+        if self._latency is not None:
+            self._latency.dump(os.path.join(self._data_dir, "latency.json"))
@@ -1,23 +1,23 @@
 import collections
 import time
-import alsaaudio as aa
-from datetime import datetime, timezone
 import struct
 
+try:
+    import alsaaudio as aa
+except ImportError:  # only needed by the `alsa` backend
+    aa = None
 
-class Microphone:
-    def __init__(self, bufSize, rate, channels, format_str, framerate, maxRetries=10):
-        format_map = {
-            "S16_LE": aa.PCM_FORMAT_S16_LE,
-            "U8": aa.PCM_FORMAT_U8,
-            "S32_LE": aa.PCM_FORMAT_S32_LE,
-            # add more as needed
-        }
+from .clock import clock
+from .simulators import SimulatedPCM
 
-        if format_str not in format_map:
-            raise ValueError(f"Unsupported audio format string: {format_str}")
 
-        self.format = format_map[format_str]
+class Microphone:
+    def __init__(self, bufSize, rate, channels, format_str, framerate, maxRetries=10, backend="alsa"):
+        if backend not in ("alsa", "sim"):
+            raise ValueError(f"Unsupported audio backend: {backend}")
+        if backend == "alsa" and aa is None:
+            raise ImportError("alsaaudio is required by the `alsa` audio backend")
+
         self.bufferSize = bufSize
         self.chunkSize = int(rate / framerate)
 
@@ -27,29 +27,45 @@ class Microphone:
         self.dataBufferOne = collections.deque(maxlen=bufSize)
         self.dataBufferTwo = collections.deque(maxlen=bufSize)
 
+        if backend == "sim":
+            self.format = format_str
+            self.micInput = SimulatedPCM(channels, rate, format_str, self.chunkSize)
+        else:
+            self.format, self.micInput = self._open_alsa_pcm(rate, channels, format_str, maxRetries)
+
+        # Just for debugging purposes
+        self.frameCount = 0
+
+    def _open_alsa_pcm(self, rate, channels, format_str, maxRetries):
+        format_map = {
+            "S16_LE": aa.PCM_FORMAT_S16_LE,
+            "U8": aa.PCM_FORMAT_U8,
+            "S32_LE": aa.PCM_FORMAT_S32_LE,
+            # add more as needed
+        }
+
+        if format_str not in format_map:
+            raise ValueError(f"Unsupported audio format string: {format_str}")
+
         for attempt in range(maxRetries):
             try:
-                self.micInput = aa.PCM(
+                pcm = aa.PCM(
                     type=aa.PCM_CAPTURE,
                     mode=aa.PCM_NORMAL,
                     channels=channels,
                     rate=rate,
-                    format=self.format,
+                    format=format_map[format_str],
                     periodsize=self.chunkSize,
                 )
-                break
+                return format_map[format_str], pcm
             except aa.ALSAAudioError as e:
                 print(f"[Attempt {attempt + 1}] ALSA not ready: {e}")
                 time.sleep(1)
-        else:
-            raise RuntimeError("Failed to initialize ALSA PCM after multiple attempts.")
-
-        # Just for debugging purposes
-        self.frameCount = 0
+        raise RuntimeError("Failed to initialize ALSA PCM after multiple attempts.")
 
     def append_mic_data(self, whichBuffer):
         length, data = self.micInput.read()
-        timestamp = self.unix_time_millis(datetime.now())
+        timestamp = clock.now_ms()
         timestampPacked = struct.pack("d", timestamp)
 
         if not length:
@@ -75,16 +91,3 @@ class Microphone:
             return (self.metaBufferTwo.popleft(), self.dataBufferTwo.popleft())
         else:
             return (None, None)
-
-    @staticmethod
-    def unix_time_millis(dt):
-        """formats timestamps as milliseconds-since-epoch (double-precision float, only requires 8 bytes)"""
-        unix_epoch = datetime.fromtimestamp(0, timezone.utc)
-
-        if dt.tzinfo is None:
-            # make dt offset-aware in UTC if it's naive
-            dt = dt.replace(tzinfo=timezone.utc)
-        else:
-            # convert to UTC if it's aware in a different timezone
-            dt = dt.astimezone(timezone.utc)
-        return (dt - unix_epoch).total_seconds() * 1000.0
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import struct
+import time
+from socket import socket
+from typing import Iterator, Optional, Sequence, Tuple
+
+
+# RATBALL wire protocol helpers
+#
+# Sensor streams may be sent in one of two wire modes, requested by the client in the
+# trailing byte of its hello packet and granted by the Ingestor in its handshake reply:
+#
+#  - single: one `sensor.binfmt` record (36B) per send
+#  - batch:  a framed batch of N contiguous `sensor.binfmt` records
+#
+# Batch frame:
+# | ---- record count ---- | ---- sequence no. ---- | ---- N × sensor record ---- |
+#
+# The frame header is `sensor.batch_header_binfmt`, so the frame length is fully
+# determined by the record count once the header has been read.
+#
+# Camera streams send one header per raw frame, immediately followed by the frame bytes:
+# | -- camera ident -- | ---- frame size ---- | ---- capture ts (epoch ns) ---- | ---- frame ---- |
+#
+# The frame header is `camera.frame_header_binfmt` (`!BIQ`, 13B). All timestamps on the wire come
+# from the sender's shared `clock`: epoch ms (float) for sensor records, epoch ns for camera frames.
+#
+# Camera streams in segment wire mode instead send one index header per completed video
+# segment, immediately followed by the segment file bytes:
+# | -- ident -- | -- seq -- | -- start ts -- | -- end ts -- | -- frames -- | -- offset -- | -- size -- | -- segment -- |
+#
+# The index header is `camera.segment_header_binfmt` (`!BIQQIQQ`, 41B).
+#
+# Clock sync: on framed streams (sensor batch, camera frame and segment modes) the Ingestor
+# periodically sends a ping on the otherwise idle Ingestor → device direction of the data
+# connection, carrying its own send time t1:
+# | ---- t1 (epoch ns) ---- | (8B)
+#
+# The device answers in-band, between two data frames, with a control frame: a regular frame
+# header whose length field holds the reserved marker value, immediately followed by the pong:
+# | ---- t1 ---- | ---- t2: device receive time ---- | ---- t3: device send time ---- | (24B)
+#
+#  - sensor batch:   record count  == CONTROL_BATCH_COUNT, sequence no. 0
+#  - camera frame:   frame size    == CONTROL_FRAME_SIZE, capture ts 0
+#  - camera segment: sequence no.  == CONTROL_FRAME_SIZE, all other fields 0
+#
+# Devices that don't answer pings simply never send control frames. Single-record sensor
+# streams have no framing to carry a pong and are never pinged.
+
+# handshake port value telling the client to keep streaming on its gateway connection
+# (single-port mode) instead of reconnecting to a dedicated data port
+SAME_CONNECTION_PORT = 0
+
+WIRE_MODE_SINGLE = 0
+WIRE_MODE_BATCH = 1
+WIRE_MODE_SEGMENT = 2
+
+wire_modes = {
+    "single": WIRE_MODE_SINGLE,
+    "batch": WIRE_MODE_BATCH,
+    "segment": WIRE_MODE_SEGMENT,
+}
+
+
+# clock sync messages, see above
+CLOCK_PING = struct.Struct("!q")
+CLOCK_PONG = struct.Struct("!qqq")
+# reserved frame length values marking an in-band control frame
+CONTROL_BATCH_COUNT = 0xFFFF
+CONTROL_FRAME_SIZE = 0xFFFFFFFF
+
+
+def wire_mode_from_str(mode: str) -> int:
+    """maps a settings.yaml wire mode name onto its protocol constant"""
+    try:
+        return wire_modes[mode]
+    except KeyError:
+        raise ValueError(f"Unsupported sensor wire mode: {mode}")
+
+
+class SensorBatchPacker:
+    """
+    Accumulates sensor records into a single preallocated batch frame.
+
+    Records are packed in place with `struct.pack_into`, so a flush costs one header
+    pack and one send regardless of the number of records in the frame.
+
+    Parameters
+    ----------
+    record_binfmt : str
+        struct format of a single sensor record, i.e. ``sensor.binfmt``
+    header_binfmt : str
+        struct format of the batch frame header, i.e. ``sensor.batch_header_binfmt``
+    batch_size : int
+        maximum number of records per frame, flushed as soon as it is reached
+    max_age_ms : float
+        maximum age of the oldest unsent record before the frame is due
+    """
+
+    __slots__ = (
+        "_record",
+        "_header",
+        "_batch_size",
+        "_max_age_ns",
+        "_buffer",
+        "_view",
+        "_count",
+        "_seq",
+        "_first_ns",
+    )
+
+    def __init__(self, record_binfmt: str, header_binfmt: str, batch_size: int, max_age_ms: float) -> None:
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        if batch_size >= CONTROL_BATCH_COUNT:
+            raise ValueError(f"batch_size must be below {CONTROL_BATCH_COUNT}, which marks control frames")
+
+        self._record = struct.Struct(record_binfmt)
+        self._header = struct.Struct(header_binfmt)
+        self._batch_size = batch_size
+        self._max_age_ns = int(max_age_ms * 1_000_000)
+
+        self._buffer = bytearray(self._header.size + self._record.size * batch_size)
+        self._view = memoryview(self._buffer)
+        self._count = 0
+        self._seq = 0
+        self._first_ns = 0
+
+    def add(self, ts: float, x: float, y: float, h: float, idx: int) -> None:
+        """packs one record into the next free slot of the frame"""
+        if self._count == self._batch_size:
+            raise BufferError("sensor batch full, flush before adding records")
+        if self._count == 0:
+            self._first_ns = time.monotonic_ns()
+        self._record.pack_into(
+            self._buffer,
+            self._header.size + self._count * self._record.size,
+            ts, x, y, h, idx,
+        )
+        self._count += 1
+
+    def due(self) -> bool:
+        """True when the frame is full or its oldest record has exceeded the age deadline"""
+        if self._count == 0:
+            return False
+        if self._count >= self._batch_size:
+            return True
+        return time.monotonic_ns() - self._first_ns >= self._max_age_ns
+
+    def flush(self) -> Optional[memoryview]:
+        """packs the frame header and returns a view over the complete frame, or None if empty
+
+        The returned view aliases the internal buffer and is only valid until the next `add`.
+        """
+        if self._count == 0:
+            return None
+        self._header.pack_into(self._buffer, 0, self._count, self._seq)
+        frame = self._view[: self._header.size + self._count * self._record.size]
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        self._count = 0
+        return frame
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def iter_sensor_batch(record_binfmt: str, body) -> Iterator[Tuple[float, float, float, float, int]]:
+    """decodes the contiguous records of a batch frame body without per-record slicing"""
+    return struct.iter_unpack(record_binfmt, body)
+
+
+def sendmsg_all(sock: socket, buffers: Sequence) -> None:
+    """scatter/gather send of `buffers` in order, resuming after partial sends
+
+    Avoids concatenating headers and payloads into a temporary buffer before sending.
+    """
+    views = [memoryview(buf).cast("B") for buf in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        # drop fully sent buffers, then trim the partially sent one
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if views and sent:
+            views[0] = views[0][sent:]
+
+
+def recv_exact_into(sock: socket, view) -> bool:
+    """fill `view` completely from `sock`, returning False if the peer closed the connection first"""
+    received = 0
+    size = len(view)
+    while received < size:
+        nbytes = sock.recv_into(view[received:])
+        if nbytes == 0:
+            return False
+        received += nbytes
+    return True
+
+
+def recv_exact(sock: socket, size: int) -> Optional[bytearray]:
+    """receive exactly `size` bytes into a new buffer, or None if the peer closed the connection first"""
+    buf = bytearray(size)
+    return buf if recv_exact_into(sock, memoryview(buf)) else None
+
+
+class FramedReader:
+    """
+    Zero-copy receiver for header-prefixed frames on a stream socket.
+
+    Headers and payloads are read with `socket.recv_into` straight into
+    buffers owned by the reader and returned as views, so a frame is never
+    assembled by concatenation.  The payload buffer is reused for every frame
+    and only grows (geometrically) when a larger frame arrives, so a steady
+    stream of camera frames costs no allocations after the first one.
+
+    Parameters
+    ----------
+    sock : socket
+        Connected stream socket to read from.
+    size_hint : int
+        Initial payload buffer size, e.g. the expected frame size.
+    """
+
+    __slots__ = ("sock", "_buffer", "_view", "_headers", "header")
+
+    def __init__(self, sock: socket, size_hint: int = 0) -> None:
+        self.sock = sock
+        self._buffer = bytearray(size_hint)
+        self._view = memoryview(self._buffer)
+        # one buffer per header format, keyed by its struct
+        self._headers = {}
+        # raw bytes of the most recently read header, valid until the next header of the same format
+        self.header: Optional[memoryview] = None
+
+    def read_header(self, fmt: struct.Struct) -> Optional[Tuple]:
+        """read and unpack one `fmt` header, or None if the peer closed the connection"""
+        view = self._headers.get(fmt)
+        if view is None:
+            view = self._headers[fmt] = memoryview(bytearray(fmt.size))
+        if not recv_exact_into(self.sock, view):
+            return None
+        self.header = view
+        return fmt.unpack_from(view)
+
+    def read(self, size: int) -> Optional[memoryview]:
+        """read exactly `size` payload bytes, or None if the peer closed the connection first
+
+        The returned view aliases the reader's buffer and is only valid until the next `read`.
+        """
+        if size > len(self._buffer):
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+            self._view = memoryview(self._buffer)
+        view = self._view[:size]
+        if not recv_exact_into(self.sock, view):
+            return None
+        return view
+
+    def read_into(self, view) -> bool:
+        """fill a caller-owned buffer, returning False if the peer closed the connection first"""
+        return recv_exact_into(self.sock, view)
@@ -14,6 +14,9 @@ logger.add(
 self_path = os.path.abspath(__file__)
 self_dir = os.path.split(self_path)[0]
 parent_dir = os.path.abspath(os.path.join(self_dir, ".."))
+sys.path.insert(0, parent_dir)
+
+from src.protocol import FramedReader
 
 try:
     from yaml import CSafeLoader as SafeLoader
@@ -62,16 +65,8 @@ def format_output(unmarshaled_data):
     return f"{metadata},{sensor_x},{sensor_y},{sensor_h}\n"
 
 
-def recv_all(sock, size):
-    """Ensures all data is received before processing."""
-    data = bytearray()
-    while len(data) < size:
-        packet = sock.recv(size - len(data))
-        if not packet:
-            return None  # Handle closed connection
-        data.extend(bytearray(packet))
-        # logger.debug(f'sock.recv got data of length {len(data)}\n')
-    return data
+# receives every packet into one reused buffer; returns None once the connection closes
+reader = FramedReader(conn, 36)
 
 
 def data_receiver_task():
@@ -88,7 +83,7 @@ def data_receiver_task():
         current_sensor = None
         while not term_flag:
             # Receiving entire packet
-            packet = recv_all(conn, 36)
+            packet = reader.read(36)
             if packet is None:
                 pass
             elif packet[:8] == b"END_STOP":
@@ -1,23 +1,96 @@
-# Sparkfun libraries for OTOS sensor tx/rx:
-import qwiic_otos
+# Sparkfun libraries for OTOS sensor tx/rx, only needed by the `otos` backend:
+try:
+    import qwiic_otos
+except ImportError:
+    qwiic_otos = None
 
 from collections import deque
-from datetime import datetime
+from threading import Event
+import math
 import os.path
+import struct
 import sys
+import time
+
+from loguru import logger
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
-from .utils import unix_time_millis
+from .clock import clock
+
+
+class OtosPoseReader:
+    """
+    Lean OTOS read path: one block read of the position registers only.
+
+    `QwiicOTOS.getPosVelAcc()` reads all 18 pose/velocity/acceleration bytes and
+    builds three `Pose2D` objects per sample, but only the position is streamed.
+    This reads the 6 position bytes and decodes the little-endian int16 values
+    with scales precomputed for the device's configured units.
+
+    The block read relies on the driver's private I2C handle and unit scales.
+    If a driver version lacks them, reads fall back to `getPosition()`.
+    """
+
+    REG_POS_XL = 0x20
+    POS_NBYTES = 6
+    # full-scale register ranges from the OTOS datasheet: ±10 m and ±π rad
+    INT16_TO_METER = 10.0 / 32768.0
+    INT16_TO_RAD = math.pi / 32768.0
+    # driver internals the block read needs, checked once per device
+    DRIVER_ATTRS = ("_i2c", "_meterToUnit", "_radToUnit")
+
+    def __init__(self, device):
+        self._device = device
+        missing = [attr for attr in self.DRIVER_ATTRS if not hasattr(device, attr)]
+        if missing:
+            logger.warning(
+                f"qwiic_otos driver lacks {', '.join(missing)}, "
+                f"OTOS at {hex(device.address)} falls back to getPosition() reads"
+            )
+            self.read = self._read_position
+            return
+        self._i2c = device._i2c
+        self._address = device.address
+        self._unpack = struct.Struct("<3h").unpack
+        self._xy_scale = self.INT16_TO_METER * device._meterToUnit
+        self._h_scale = self.INT16_TO_RAD * device._radToUnit
+
+    def _read_position(self):
+        """driver read path, slower but independent of its internals"""
+        pose = self._device.getPosition()
+        return pose.x, pose.y, pose.h
+
+    def read(self):
+        """returns (x, y, h) as plain floats, or None if the read came back short"""
+        raw = self._i2c.read_block(self._address, self.REG_POS_XL, self.POS_NBYTES)
+        if raw is None or len(raw) != self.POS_NBYTES:
+            return None
+        x, y, h = self._unpack(bytes(raw))
+        return x * self._xy_scale, y * self._xy_scale, h * self._h_scale
 
 
 class Sensor:
     BUF_SIZE = 36
 
-    def __init__(self, address):
+    def __init__(self, address, backend="otos", sim_rate_hz=400.0):
         self.address = address
-        self.device = qwiic_otos.QwiicOTOS(address=self.address)
+        if backend == "sim":
+            # simulators pull in numpy, which the I2C read path doesn't need
+            from .simulators import SimulatedOTOS
+
+            self.device = SimulatedOTOS(self.address, rate_hz=sim_rate_hz)
+            self._read_pose = self.device.read_pose
+        elif backend == "otos":
+            if qwiic_otos is None:
+                raise ImportError("qwiic_otos is required by the `otos` sensor backend")
+            self.device = qwiic_otos.QwiicOTOS(address=self.address)
+            self._read_pose = OtosPoseReader(self.device).read
+        else:
+            raise ValueError(f"Unsupported sensor backend: {backend}")
         self.data_buffer = deque(maxlen=self.BUF_SIZE)
         self.meta_buffer = deque(maxlen=self.BUF_SIZE)
+        # samples overwritten in the full buffers before the transmitter popped them
+        self.dropped = 0
 
         if not self.device.is_connected():
             raise ConnectionError(
@@ -28,14 +101,73 @@ class Sensor:
         self.device.begin()
 
     def poll_data(self):
-        data = self.device.getPosVelAcc()
+        """reads one (x, y, h) position sample into the buffers, returns False if the read failed"""
+        data = self._read_pose()
         if data:
-            metadata = unix_time_millis(datetime.now())
+            metadata = clock.now_ms()
+            if len(self.data_buffer) == self.BUF_SIZE:
+                # keep the freshest samples, but account for the one being overwritten
+                self.dropped += 1
             self.data_buffer.append(data)
             self.meta_buffer.append(metadata)
+            return True
+        return False
 
     def get_next(self):
         if len(self.data_buffer) > 0:
             return self.meta_buffer.popleft(), self.data_buffer.popleft()
         return None, None
 
+
+
+class SensorPollScheduler:
+    """
+    Polls every sensor at `rate_hz` against a monotonic deadline.
+
+    Polls are staggered evenly across the period, so with N sensors one poll is
+    due every period / N and the bus sees a steady cadence rather than bursts.
+    A poll slot that's missed entirely (e.g. a slow bus transaction) is counted
+    as an overrun and skipped instead of being made up with back-to-back polls.
+    """
+
+    def __init__(self, sensors, rate_hz):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.sensors = sensors
+        self.rate_hz = rate_hz
+        self._slot_ns = int(1e9 / rate_hz / max(len(sensors), 1))
+        # set after every successful poll, so the transmitter can sleep while idle
+        self.sample_ready = Event()
+        self.polls = 0
+        self.empty_polls = 0
+        self.overruns = 0
+
+    def run(self, stop):
+        """poll until `stop` is set"""
+        if not self.sensors:
+            return
+        idx = 0
+        next_ns = time.monotonic_ns()
+        while not stop.is_set():
+            delay_ns = next_ns - time.monotonic_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / 1e9)
+
+            if self.sensors[idx].poll_data():
+                self.polls += 1
+                self.sample_ready.set()
+            else:
+                self.empty_polls += 1
+            idx = (idx + 1) % len(self.sensors)
+
+            next_ns += self._slot_ns
+            lag_ns = time.monotonic_ns() - next_ns
+            if lag_ns >= self._slot_ns:
+                # fell at least one whole slot behind: drop the missed slots, keep the round-robin order
+                missed = lag_ns // self._slot_ns
+                self.overruns += missed
+                next_ns += missed * self._slot_ns
+
+    @property
+    def dropped(self):
+        return [sensor.dropped for sensor in self.sensors]
@@ -0,0 +1,242 @@
+"""
+Offline alignment and resampling of a session's odometry sensor streams.
+
+Each sensor is timestamped when its own I2C read returns, so the streams of
+the two sensors are jittered and never share sample times.  This module
+puts every stream on one common, uniformly spaced time grid with vectorized
+`np.interp` and derives a fused ball-velocity estimate from the aligned
+streams, replacing per-session resampling in pandas.
+
+Alignment
+---------
+* samples are sorted by timestamp and duplicate timestamps dropped, so a
+  stream that went briefly non-monotonic still interpolates correctly
+* the grid spans only the interval every stream covers, at `rate_hz`
+* grid points falling in a gap longer than `max_gap_ms` between two
+  samples are NaN rather than interpolated across the dropout
+* heading is unwrapped before interpolation so ±180° crossings don't
+  produce spurious spins
+
+Ball velocity
+-------------
+The OTOS reports field-relative position, rotated by its own heading
+estimate.  Per-sensor surface velocity is the time derivative of position
+rotated back into the sensor frame.  With the two sensors mounted on the
+ball's equator 90° apart, each with its y axis along the ball's meridian:
+
+  * forward = sensor0 y velocity   (pitch)
+  * lateral = sensor1 y velocity   (roll)
+  * yaw     = mean of both x velocities, which both see the ball's spin
+
+All velocities are surface speeds in the sensors' linear unit per second.
+
+Usage
+-----
+aligned = align_session(session_dir, rate_hz=200)
+aligned.grid, aligned.streams["sensor0"]["x"], aligned.velocity["forward"]
+
+python -m src.sensor_align <session_dir> <out.csv> [rate_hz] [max_gap_ms]
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .sensor_store import COLUMNS, MANIFEST_NAME, SensorColumnReader
+
+# stream roles in the fused estimate, see module docstring
+FORWARD_STREAM = "sensor0"
+LATERAL_STREAM = "sensor1"
+
+StreamArrays = Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True, slots=True)
+class AlignedSensors:
+    # common time grid, epoch milliseconds
+    grid: np.ndarray
+    # stream name -> {"x", "y", "h"} resampled onto `grid`
+    streams: Dict[str, StreamArrays]
+    # "forward", "lateral", "yaw", "speed" on `grid`
+    velocity: StreamArrays
+
+
+def load_session(session_dir: str) -> Dict[str, StreamArrays]:
+    """
+    Read every sensor stream of an Ingestor session, columnar or CSV.
+
+    Returns
+    -------
+    dict
+        stream name -> {column: float64 array} for the columns ts, x, y, h
+    """
+    if os.path.exists(os.path.join(session_dir, MANIFEST_NAME)):
+        reader = SensorColumnReader(session_dir)
+        return {
+            stream: {column: np.asarray(reader.column(stream, column), dtype=np.float64) for column in COLUMNS}
+            for stream in reader.streams()
+        }
+
+    streams = {}
+    for path in sorted(glob.glob(os.path.join(session_dir, "sensor*.csv"))):
+        rows = np.loadtxt(path, delimiter=",", ndmin=2, dtype=np.float64)
+        rows = rows.reshape(-1, len(COLUMNS))
+        streams[os.path.splitext(os.path.basename(path))[0]] = {
+            column: rows[:, i] for i, column in enumerate(COLUMNS)
+        }
+    return streams
+
+
+def _monotonic(stream: Mapping[str, np.ndarray]) -> StreamArrays:
+    """sort a stream by timestamp, drop repeated timestamps and unwrap heading"""
+    ts = np.asarray(stream["ts"], dtype=np.float64)
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+    keep = np.empty(ts.shape, dtype=bool)
+    keep[:1] = True
+    np.greater(ts[1:], ts[:-1], out=keep[1:])
+    order = order[keep]
+    return {
+        "ts": ts[keep],
+        "x": np.asarray(stream["x"], dtype=np.float64)[order],
+        "y": np.asarray(stream["y"], dtype=np.float64)[order],
+        "h": np.unwrap(np.asarray(stream["h"], dtype=np.float64)[order], period=360.0),
+    }
+
+
+def common_grid(streams: Mapping[str, Mapping[str, np.ndarray]], rate_hz: float) -> np.ndarray:
+    """uniform grid in epoch ms over the interval every stream covers"""
+    if rate_hz <= 0:
+        raise ValueError("rate_hz must be positive")
+    spans = [(stream["ts"][0], stream["ts"][-1]) for stream in streams.values() if len(stream["ts"])]
+    if not spans or len(spans) != len(streams):
+        return np.empty(0, dtype=np.float64)
+    start = max(first for first, _ in spans)
+    end = min(last for _, last in spans)
+    if end < start:
+        return np.empty(0, dtype=np.float64)
+    step_ms = 1000.0 / rate_hz
+    return start + step_ms * np.arange(int((end - start) // step_ms) + 1, dtype=np.float64)
+
+
+def resample(stream: Mapping[str, np.ndarray], grid: np.ndarray, max_gap_ms: Optional[float] = None) -> StreamArrays:
+    """
+    Linearly interpolate the x, y, h columns of a monotonic stream onto `grid`.
+
+    Grid points outside the stream, or inside a gap longer than `max_gap_ms`,
+    are NaN.
+    """
+    ts = stream["ts"]
+    if len(ts) == 0:
+        return {column: np.full(grid.shape, np.nan) for column in ("x", "y", "h")}
+
+    invalid = (grid < ts[0]) | (grid > ts[-1])
+    if max_gap_ms is not None and len(ts) > 1:
+        right = np.clip(np.searchsorted(ts, grid, side="left"), 1, len(ts) - 1)
+        invalid |= (ts[right] - ts[right - 1]) > max_gap_ms
+        # grid points landing exactly on a sample are never in a gap
+        invalid &= ts[right] != grid
+
+    resampled = {}
+    for column in ("x", "y", "h"):
+        values = np.interp(grid, ts, stream[column])
+        values[invalid] = np.nan
+        resampled[column] = values
+    return resampled
+
+
+def sensor_frame_velocity(stream: Mapping[str, np.ndarray], grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """surface velocity (per second) in the sensor's own frame from field-relative position"""
+    if len(grid) < 2:
+        return np.full(grid.shape, np.nan), np.full(grid.shape, np.nan)
+    t_s = grid / 1000.0
+    vx_field = np.gradient(stream["x"], t_s)
+    vy_field = np.gradient(stream["y"], t_s)
+    heading = np.radians(stream["h"])
+    cos_h, sin_h = np.cos(heading), np.sin(heading)
+    return cos_h * vx_field + sin_h * vy_field, cos_h * vy_field - sin_h * vx_field
+
+
+def fuse_velocity(streams: Mapping[str, Mapping[str, np.ndarray]], grid: np.ndarray) -> StreamArrays:
+    """fused ball velocity from the forward and lateral sensors, see module docstring"""
+    vx_fwd, vy_fwd = sensor_frame_velocity(streams[FORWARD_STREAM], grid)
+    vx_lat, vy_lat = sensor_frame_velocity(streams[LATERAL_STREAM], grid)
+    forward = vy_fwd
+    lateral = vy_lat
+    yaw = 0.5 * (vx_fwd + vx_lat)
+    return {
+        "forward": forward,
+        "lateral": lateral,
+        "yaw": yaw,
+        "speed": np.hypot(forward, lateral),
+    }
+
+
+def align_streams(
+    streams: Mapping[str, Mapping[str, np.ndarray]],
+    rate_hz: float = 200.0,
+    max_gap_ms: Optional[float] = 50.0,
+) -> AlignedSensors:
+    """
+    Resample raw sensor streams onto a common grid and fuse a ball-velocity estimate.
+
+    Parameters
+    ----------
+    streams : mapping
+        stream name -> {"ts", "x", "y", "h"} arrays, e.g. from `load_session`
+    rate_hz : float
+        Grid rate.
+    max_gap_ms : float, optional
+        Longest gap between samples that is interpolated across; ``None`` disables gap masking.
+    """
+    ordered = {name: _monotonic(stream) for name, stream in streams.items()}
+    grid = common_grid(ordered, rate_hz)
+    resampled = {name: resample(stream, grid, max_gap_ms) for name, stream in ordered.items()}
+    velocity = (
+        fuse_velocity(resampled, grid)
+        if FORWARD_STREAM in resampled and LATERAL_STREAM in resampled
+        else {}
+    )
+    return AlignedSensors(grid, resampled, velocity)
+
+
+def align_session(session_dir: str, rate_hz: float = 200.0, max_gap_ms: Optional[float] = 50.0) -> AlignedSensors:
+    return align_streams(load_session(session_dir), rate_hz, max_gap_ms)
+
+
+def write_csv(aligned: AlignedSensors, path: str) -> None:
+    """one row per grid point: ts, <stream>_x/_y/_h for every stream, then the fused velocity"""
+    names: List[str] = ["ts"]
+    columns = [aligned.grid]
+    for stream, values in sorted(aligned.streams.items()):
+        for column in ("x", "y", "h"):
+            names.append(f"{stream}_{column}")
+            columns.append(values[column])
+    for column, values in aligned.velocity.items():
+        names.append(column)
+        columns.append(values)
+    np.savetxt(
+        path,
+        np.column_stack(columns) if len(aligned.grid) else np.empty((0, len(names))),
+        delimiter=",",
+        header=",".join(names),
+        comments="",
+        fmt="%.6f",
+    )
+
+
+if __name__ == "__main__":
+    if not 3 <= len(sys.argv) <= 5:
+        print("usage: python -m src.sensor_align <session_dir> <out.csv> [rate_hz] [max_gap_ms]", file=sys.stderr)
+        sys.exit(2)
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 200.0
+    gap = float(sys.argv[4]) if len(sys.argv) > 4 else 50.0
+    result = align_session(sys.argv[1], rate, gap)
+    write_csv(result, sys.argv[2])
+    print(f"{len(result.grid)} aligned samples at {rate:g} Hz written to {sys.argv[2]}")
@@ -0,0 +1,523 @@
+"""
+Ingestor-side stores for odometry sensor streams.
+
+`SensorColumnStore` is an append-only columnar store; `SensorCsvStore`
+writes the legacy one-CSV-per-sensor layout. Both keep one long-lived
+handle (or mapping) per sensor stream for the whole session and share the
+same group-commit policy: staged samples are committed when the staging
+buffer fills, when the oldest staged sample exceeds `max_age_ms` (checked
+by `poll()`), and at session end. `fsync` selects when committed data is
+forced to disk:
+
+  * ``never``  - leave write-back to the OS
+  * ``close``  - fsync once when the session closes
+  * ``commit`` - fsync on every group commit
+
+Each store tracks a durability watermark - the timestamp of the newest
+sample handed to the OS and of the newest sample known to be on disk -
+and reports it in the logs.
+
+Each sensor stream (one per sensor idx) is written as typed float64 columns
+(ts, x, y, h) into fixed-capacity, memory-mapped `.npy` segment files.
+Samples are staged in a small in-memory block and copied into the mapped
+segment one block at a time, so the per-sample cost is a handful of array
+stores instead of text formatting.
+
+Columnar layout
+---------------
+<store_dir>/
+    manifest.json
+    sensor0/seg00000.ts.npy  seg00000.x.npy  seg00000.y.npy  seg00000.h.npy
+    sensor0/seg00001.ts.npy  ...
+    sensor1/...
+
+`manifest.json` records the number of valid rows in every segment and is
+replaced atomically after each block flush; rows beyond that count are
+preallocated space and must be ignored.
+
+Usage
+-----
+store = open_sensor_store(cfg.sensor, data_dir)   # ingestor side
+store.append(ts, x, y, h, idx)
+store.poll()                                      # while idle
+store.close()
+
+reader = SensorColumnReader(data_dir)              # analysis side, zero-copy
+for segment in reader.segments("sensor0"):
+    segment["x"].mean()
+
+python -m src.sensor_store <store_dir> <csv_dir>   # offline CSV export
+"""
+
+from __future__ import annotations
+
+import abc
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+import numpy as np
+from loguru import logger
+
+COLUMNS = ("ts", "x", "y", "h")
+MANIFEST_NAME = "manifest.json"
+_DTYPE = np.dtype("<f8")
+_VERSION = 1
+
+FSYNC_POLICIES = ("never", "close", "commit")
+# minimum interval between durability watermark reports at INFO level
+_REPORT_INTERVAL_NS = 10_000_000_000
+
+
+def _segment_path(stream_dir: str, seq: int, column: str) -> str:
+    return os.path.join(stream_dir, f"seg{seq:05d}.{column}.npy")
+
+
+def _fsync_dir(path: str) -> None:
+    """make the entries of directory `path` (new and renamed files) durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _ColumnStream:
+    """one sensor's columns: an in-memory staging block in front of mapped segments"""
+
+    __slots__ = (
+        "name",
+        "_dir",
+        "_segment_rows",
+        "_block",
+        "_block_rows",
+        "_segments",
+        "_maps",
+        "_unsynced",
+        "_seg_rows",
+    )
+
+    def __init__(self, name: str, stream_dir: str, block_rows: int, segment_rows: int) -> None:
+        self.name = name
+        self._dir = stream_dir
+        self._segment_rows = segment_rows
+        # staging block is column-major so each flush is one contiguous copy per column
+        self._block = np.empty((len(COLUMNS), block_rows), dtype=_DTYPE)
+        self._block_rows = 0
+        # manifest entries, one per segment: {"seq": n, "rows": n, "capacity": n}
+        self._segments: List[Dict[str, int]] = []
+        self._maps: List[np.memmap] = []
+        # maps of segments that rolled over since the last sync
+        self._unsynced: List[np.memmap] = []
+        self._seg_rows = 0
+        os.makedirs(stream_dir, exist_ok=True)
+
+    @property
+    def segments(self) -> List[Dict[str, int]]:
+        return self._segments
+
+    @property
+    def pending(self) -> int:
+        """samples staged but not yet copied into a segment"""
+        return self._block_rows
+
+    def append(self, ts: float, x: float, y: float, h: float) -> bool:
+        """stage one sample, returning True if the staging block was flushed"""
+        block = self._block
+        row = self._block_rows
+        block[0, row] = ts
+        block[1, row] = x
+        block[2, row] = y
+        block[3, row] = h
+        self._block_rows = row + 1
+        if self._block_rows == block.shape[1]:
+            self.flush()
+            return True
+        return False
+
+    def extend(self, rows: np.ndarray) -> bool:
+        """stage an (n, 4) array of samples, returning True if any block was flushed"""
+        flushed = False
+        capacity = self._block.shape[1]
+        start = 0
+        while start < len(rows):
+            take = min(capacity - self._block_rows, len(rows) - start)
+            self._block[:, self._block_rows:self._block_rows + take] = rows[start:start + take].T
+            self._block_rows += take
+            start += take
+            if self._block_rows == capacity:
+                self.flush()
+                flushed = True
+        return flushed
+
+    def _open_segment(self) -> None:
+        seq = len(self._segments)
+        # a full segment's pages still have to reach the disk on the next sync
+        self._unsynced.extend(self._maps)
+        self._maps = [
+            np.lib.format.open_memmap(
+                _segment_path(self._dir, seq, column),
+                mode="w+",
+                dtype=_DTYPE,
+                shape=(self._segment_rows,),
+            )
+            for column in COLUMNS
+        ]
+        self._segments.append({"seq": seq, "rows": 0, "capacity": self._segment_rows})
+        self._seg_rows = 0
+
+    def flush(self) -> None:
+        """copy the staging block into the mapped segment(s)"""
+        start = 0
+        while start < self._block_rows:
+            if not self._maps or self._seg_rows == self._segment_rows:
+                self._open_segment()
+            take = min(self._segment_rows - self._seg_rows, self._block_rows - start)
+            for col, mapped in enumerate(self._maps):
+                mapped[self._seg_rows:self._seg_rows + take] = self._block[col, start:start + take]
+            self._seg_rows += take
+            self._segments[-1]["rows"] = self._seg_rows
+            start += take
+        self._block_rows = 0
+
+    def sync(self) -> None:
+        """write the mapped pages of every segment written since the last sync back to disk"""
+        for mapped in self._unsynced:
+            mapped.flush()
+        self._unsynced = []
+        for mapped in self._maps:
+            mapped.flush()
+        # segment files created since the last sync need their directory entries too
+        _fsync_dir(self._dir)
+
+    def close(self) -> None:
+        # syncing is left to the owning store's fsync policy
+        self.flush()
+        self._maps = []
+        self._unsynced = []
+
+
+class _GroupCommit(abc.ABC):
+    """commit policy and durability watermark shared by the sensor stores"""
+
+    def __init__(self, max_age_ms: float, fsync: str) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unsupported fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}")
+        self._max_age_ns = int(max_age_ms * 1_000_000)
+        self._fsync = fsync
+        self._oldest_staged_ns: Optional[int] = None
+        self._newest_ts: Optional[float] = None
+        self._commits = 0
+        self._last_report_ns = time.monotonic_ns()
+        # newest sample timestamp handed to the OS / known to be on disk
+        self.written_ts: Optional[float] = None
+        self.durable_ts: Optional[float] = None
+
+    def _staged(self, ts: float) -> None:
+        if self._oldest_staged_ns is None:
+            self._oldest_staged_ns = time.monotonic_ns()
+        self._newest_ts = ts
+
+    def poll(self) -> None:
+        """commit if the oldest staged sample has exceeded the age deadline"""
+        if self._oldest_staged_ns is not None and time.monotonic_ns() - self._oldest_staged_ns >= self._max_age_ns:
+            self.commit()
+
+    def commit(self) -> None:
+        """write all staged samples, then fsync if the policy asks for it"""
+        self._write()
+        self._oldest_staged_ns = None
+        self.written_ts = self._newest_ts
+        if self._fsync == "commit":
+            self._sync()
+            self.durable_ts = self.written_ts
+        self._commits += 1
+        self._report()
+
+    def close(self) -> None:
+        self.commit()
+        if self._fsync != "never":
+            self._sync()
+            self.durable_ts = self.written_ts
+        self._close()
+        self._report(force=True)
+
+    def _report(self, force: bool = False) -> None:
+        now = time.monotonic_ns()
+        message = (
+            f"{type(self).__name__} durability watermark after {self._commits} commits: "
+            f"written_ts={self.written_ts}, durable_ts={self.durable_ts} (fsync={self._fsync})"
+        )
+        if force or now - self._last_report_ns >= _REPORT_INTERVAL_NS:
+            logger.info(message)
+            self._last_report_ns = now
+        else:
+            logger.debug(message)
+
+    @abc.abstractmethod
+    def _write(self) -> None:
+        """hand every staged sample to the OS"""
+
+    @abc.abstractmethod
+    def _sync(self) -> None:
+        """make everything written so far durable"""
+
+    @abc.abstractmethod
+    def _close(self) -> None:
+        """release files and mappings"""
+
+
+class SensorColumnStore(_GroupCommit):
+    """
+    Columnar writer for all sensor streams of an Ingestor session.
+
+    Parameters
+    ----------
+    store_dir : str
+        Session directory the per-sensor stream directories and manifest live in.
+    block_rows : int
+        Samples staged in memory per stream before they're copied into the segment.
+    segment_rows : int
+        Preallocated rows per segment file; a new segment is opened when one fills.
+    max_age_ms : float
+        Maximum age of a staged sample before `poll()` commits it.
+    fsync : str
+        One of ``never``, ``close`` or ``commit``.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        block_rows: int = 4096,
+        segment_rows: int = 1 << 20,
+        max_age_ms: float = 500.0,
+        fsync: str = "close",
+    ) -> None:
+        super().__init__(max_age_ms, fsync)
+        if block_rows <= 0 or segment_rows <= 0:
+            raise ValueError("block_rows and segment_rows must be positive")
+        self._dir = str(store_dir)
+        self._block_rows = block_rows
+        self._segment_rows = segment_rows
+        self._streams: Dict[int, _ColumnStream] = {}
+        os.makedirs(self._dir, exist_ok=True)
+
+    def _stream(self, idx: int) -> _ColumnStream:
+        stream = self._streams.get(idx)
+        if stream is None:
+            name = f"sensor{idx}"
+            stream = self._streams[idx] = _ColumnStream(
+                name, os.path.join(self._dir, name), self._block_rows, self._segment_rows
+            )
+        return stream
+
+    def append(self, ts: float, x: float, y: float, h: float, idx: int) -> None:
+        self._staged(ts)
+        # a full staging block is a group commit
+        if self._stream(int(idx)).append(ts, x, y, h):
+            self.commit()
+
+    def extend(self, records: Sequence) -> None:
+        """append a sequence of (ts, x, y, h, idx) records, e.g. one decoded batch frame"""
+        if not len(records):
+            return
+        rows = np.asarray(records, dtype=_DTYPE)
+        self._staged(float(rows[-1, 0]))
+        idx_col = rows[:, 4]
+        flushed = False
+        for idx in np.unique(idx_col):
+            flushed |= self._stream(int(idx)).extend(rows[idx_col == idx, :4])
+        if flushed:
+            self.commit()
+
+    def flush(self) -> None:
+        """copy all staged samples into their segments and publish the new row counts"""
+        self.commit()
+
+    def _write(self) -> None:
+        for stream in self._streams.values():
+            if stream.pending:
+                stream.flush()
+        # under `commit` the manifest is published by `_sync`, once the rows it lists are on disk
+        if self._fsync != "commit":
+            self._write_manifest()
+
+    def _sync(self) -> None:
+        """force mapped segment pages to disk, then the manifest listing them"""
+        for stream in self._streams.values():
+            stream.sync()
+        self._write_manifest(durable=True)
+
+    def _close(self) -> None:
+        for stream in self._streams.values():
+            stream.close()
+
+    def _write_manifest(self, durable: bool = False) -> None:
+        manifest = {
+            "version": _VERSION,
+            "dtype": _DTYPE.str,
+            "columns": list(COLUMNS),
+            "streams": {stream.name: stream.segments for stream in self._streams.values()},
+        }
+        path = os.path.join(self._dir, MANIFEST_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(manifest, fh)
+            if durable:
+                fh.flush()
+                os.fsync(fh.fileno())
+        # readers only ever see a complete manifest
+        os.replace(tmp_path, path)
+        if durable:
+            _fsync_dir(self._dir)
+
+
+class SensorCsvStore(_GroupCommit):
+    """
+    CSV writer for all sensor streams of an Ingestor session, one `sensor<idx>.csv` per sensor.
+
+    Rows are staged per stream in user space and written with a single `write` per stream on
+    each group commit, which happens once `flush_bytes` of rows are staged, when `poll()` finds
+    the oldest staged row older than `max_age_ms`, and at session end.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        flush_bytes: int = 1 << 20,
+        max_age_ms: float = 500.0,
+        fsync: str = "close",
+    ) -> None:
+        super().__init__(max_age_ms, fsync)
+        if flush_bytes <= 0:
+            raise ValueError("flush_bytes must be positive")
+        self._dir = str(store_dir)
+        self._flush_bytes = flush_bytes
+        self._files: Dict[int, TextIO] = {}
+        self._rows: Dict[int, List[str]] = {}
+        self._staged_bytes = 0
+        os.makedirs(self._dir, exist_ok=True)
+
+    def _stream_rows(self, idx: int) -> List[str]:
+        rows = self._rows.get(idx)
+        if rows is None:
+            # opened once per session and kept open; truncates any file left by a previous run
+            self._files[idx] = open(os.path.join(self._dir, f"sensor{idx}.csv"), "w")
+            rows = self._rows[idx] = []
+        return rows
+
+    def append(self, ts: float, x: float, y: float, h: float, idx: int) -> None:
+        row = f"{ts},{x},{y},{h}\n"
+        self._stream_rows(int(idx)).append(row)
+        self._staged(ts)
+        self._staged_bytes += len(row)
+        if self._staged_bytes >= self._flush_bytes:
+            self.commit()
+
+    def extend(self, records: Sequence) -> None:
+        """append a sequence of (ts, x, y, h, idx) records, e.g. one decoded batch frame"""
+        for ts, x, y, h, idx in records:
+            self.append(ts, x, y, h, idx)
+
+    def flush(self) -> None:
+        self.commit()
+
+    def _write(self) -> None:
+        for idx, rows in self._rows.items():
+            if rows:
+                self._files[idx].write("".join(rows))
+                rows.clear()
+            self._files[idx].flush()
+        self._staged_bytes = 0
+
+    def _sync(self) -> None:
+        for outfile in self._files.values():
+            os.fsync(outfile.fileno())
+
+    def _close(self) -> None:
+        for outfile in self._files.values():
+            outfile.close()
+
+
+def open_sensor_store(sensor_cfg, store_dir: str):
+    """build the store selected by the `sensor` section of settings.yaml"""
+    if sensor_cfg.store == "columnar":
+        return SensorColumnStore(
+            store_dir,
+            block_rows=sensor_cfg.store_block_rows,
+            segment_rows=sensor_cfg.store_segment_rows,
+            max_age_ms=sensor_cfg.flush_interval_ms,
+            fsync=sensor_cfg.fsync,
+        )
+    if sensor_cfg.store == "csv":
+        return SensorCsvStore(
+            store_dir,
+            flush_bytes=sensor_cfg.flush_bytes,
+            max_age_ms=sensor_cfg.flush_interval_ms,
+            fsync=sensor_cfg.fsync,
+        )
+    raise ValueError(f"Unsupported sensor store: {sensor_cfg.store}")
+
+
+class SensorColumnReader:
+    """Read-only access to a columnar sensor store through zero-copy `np.memmap` views."""
+
+    def __init__(self, store_dir: str) -> None:
+        self._dir = str(store_dir)
+        with open(os.path.join(self._dir, MANIFEST_NAME)) as fh:
+            self._manifest = json.load(fh)
+        if self._manifest.get("version") != _VERSION:
+            raise ValueError(f"Unsupported sensor store version {self._manifest.get('version')} in {self._dir}")
+
+    def streams(self) -> List[str]:
+        return sorted(self._manifest["streams"])
+
+    def rows(self, stream: str) -> int:
+        return sum(segment["rows"] for segment in self._manifest["streams"][stream])
+
+    def segments(self, stream: str) -> Iterator[Dict[str, np.ndarray]]:
+        """yield {column: memmap view} per segment, trimmed to the rows actually written"""
+        stream_dir = os.path.join(self._dir, stream)
+        for segment in self._manifest["streams"][stream]:
+            rows = segment["rows"]
+            if rows == 0:
+                continue
+            yield {
+                column: np.load(_segment_path(stream_dir, segment["seq"], column), mmap_mode="r")[:rows]
+                for column in self._manifest["columns"]
+            }
+
+    def column(self, stream: str, column: str) -> np.ndarray:
+        """whole column of a stream; zero-copy when it lives in a single segment"""
+        parts = [segment[column] for segment in self.segments(stream)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.empty(0, dtype=_DTYPE)
+        return np.concatenate(parts)
+
+
+def export_csv(store_dir: str, out_dir: str, streams: Iterable[str] = ()) -> List[str]:
+    """write each stream as `<stream>.csv` rows of `ts,x,y,h`, matching the legacy CSV writer"""
+    reader = SensorColumnReader(store_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for stream in streams or reader.streams():
+        path = os.path.join(out_dir, f"{stream}.csv")
+        with open(path, "w") as outfile:
+            for segment in reader.segments(stream):
+                # tolist() yields Python floats, which format with the same repr as the live writer
+                for ts, x, y, h in zip(*(segment[column].tolist() for column in COLUMNS)):
+                    outfile.write(f"{ts},{x},{y},{h}\n")
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"usage: python -m src.sensor_store <store_dir> <csv_dir>", file=sys.stderr)
+        sys.exit(2)
+    for csv_path in export_csv(sys.argv[1], sys.argv[2]):
+        print(csv_path)
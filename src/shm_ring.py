@@ -0,0 +1,272 @@
+"""
+Shared-memory frame ring for same-host frame transport.
+
+A `SharedFrameRing` is created by the single writer (a `Camera` inside a
+`CameraGovernor` process) and any number of other processes on the same
+host attach to it by name with a `SharedFrameReader`.  Readers never write
+to the segment, so they don't slow the writer down; a reader that falls
+more than *capacity* frames behind simply skips ahead.
+
+Segment layout (all integers little-endian int64)
+-------------------------------------------------
+| header (16 words) | slot seq[capacity] | slot ts[capacity] | slab[capacity × frame] |
+
+header: magic, version, capacity, ndim, shape[0..3], head, tail
+  * head - sequence number of the next frame to be written
+  * tail - sequence number of the oldest frame still held in the ring
+slot seq: sequence number held by a slot, or -1 while it is being written
+slot ts:  capture timestamp of the slot's frame, epoch ns from `clock.now_ns()`
+
+Readers validate `slot seq` before and after touching a frame (seqlock), so
+a frame overwritten mid-read is detected rather than silently torn.
+
+Usage
+-----
+ring = SharedFrameRing.create("ratball_cam0", capacity=8, shape=(720, 1280))
+slot = ring.begin_write()                       # writer side
+cap.read(image=slot)
+ring.commit(clock.now_ns())
+
+reader = SharedFrameReader("ratball_cam0")     # any other process
+for seq, view, ts in reader.follow():
+    ...
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+_MAGIC = 0x5241544246524D53  # "RATBFRMS"
+_VERSION = 1
+_HEADER_WORDS = 16
+_MAX_NDIM = 4
+
+# header word offsets
+_H_MAGIC = 0
+_H_VERSION = 1
+_H_CAPACITY = 2
+_H_NDIM = 3
+_H_SHAPE = 4
+_H_HEAD = _H_SHAPE + _MAX_NDIM
+_H_TAIL = _H_HEAD + 1
+
+_WORD = np.dtype("<i8")
+
+# segments created (and so registered with the resource tracker) by this process
+_created: Set[str] = set()
+
+
+def _segment_size(capacity: int, frame_nbytes: int) -> int:
+    return _WORD.itemsize * (_HEADER_WORDS + 2 * capacity) + capacity * frame_nbytes
+
+
+class _SharedFrameLayout:
+    """numpy views over the header, slot metadata and slab of a mapped segment"""
+
+    __slots__ = ("shm", "header", "slot_seq", "slot_ts", "slab", "capacity", "shape")
+
+    def __init__(self, shm: shared_memory.SharedMemory) -> None:
+        self.shm = shm
+        self.header = np.ndarray((_HEADER_WORDS,), dtype=_WORD, buffer=shm.buf)
+        if int(self.header[_H_MAGIC]) != _MAGIC:
+            raise ValueError(f"Shared memory segment {shm.name} is not a RATBALL frame ring")
+        if int(self.header[_H_VERSION]) != _VERSION:
+            raise ValueError(f"Unsupported frame ring version {int(self.header[_H_VERSION])} in {shm.name}")
+
+        self.capacity = int(self.header[_H_CAPACITY])
+        ndim = int(self.header[_H_NDIM])
+        self.shape = tuple(int(d) for d in self.header[_H_SHAPE:_H_SHAPE + ndim])
+
+        offset = _WORD.itemsize * _HEADER_WORDS
+        self.slot_seq = np.ndarray((self.capacity,), dtype=_WORD, buffer=shm.buf, offset=offset)
+        offset += _WORD.itemsize * self.capacity
+        self.slot_ts = np.ndarray((self.capacity,), dtype=_WORD, buffer=shm.buf, offset=offset)
+        offset += _WORD.itemsize * self.capacity
+        self.slab = np.ndarray((self.capacity, *self.shape), dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+
+class SharedFrameRing:
+    """Single-writer frame ring living in a named `multiprocessing.shared_memory` segment.
+
+    Use :pymeth:`create` to allocate the segment; the writer owns it and
+    unlinks it on :pymeth:`close`.
+    """
+
+    __slots__ = ("_layout", "_slots", "_head")
+
+    def __init__(self, layout: _SharedFrameLayout) -> None:
+        self._layout = layout
+        self._slots = [layout.slab[i] for i in range(layout.capacity)]
+        self._head = int(layout.header[_H_HEAD])
+
+    @classmethod
+    def create(cls, name: str, capacity: int, shape: Tuple[int, ...]) -> "SharedFrameRing":
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < len(shape) <= _MAX_NDIM:
+            raise ValueError(f"frame shape must have 1..{_MAX_NDIM} dimensions")
+
+        frame_nbytes = int(np.prod(shape))
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity, frame_nbytes))
+        except FileExistsError:
+            # stale segment from a crashed writer: reclaim it
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity, frame_nbytes))
+
+        header = np.ndarray((_HEADER_WORDS,), dtype=_WORD, buffer=shm.buf)
+        header[:] = 0
+        header[_H_VERSION] = _VERSION
+        header[_H_CAPACITY] = capacity
+        header[_H_NDIM] = len(shape)
+        header[_H_SHAPE:_H_SHAPE + len(shape)] = shape
+        # magic last, so a reader never maps a half-initialized header
+        header[_H_MAGIC] = _MAGIC
+        del header
+
+        _created.add(shm.name)
+        layout = _SharedFrameLayout(shm)
+        layout.slot_seq[:] = -1
+        return cls(layout)
+
+    @property
+    def name(self) -> str:
+        return self._layout.shm.name
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._layout.shape
+
+    def begin_write(self) -> np.ndarray:
+        """Invalidate and return the next slot for in-place writing."""
+        layout = self._layout
+        idx = self._head % layout.capacity
+        layout.slot_seq[idx] = -1
+        if self._head >= layout.capacity:
+            layout.header[_H_TAIL] = self._head - layout.capacity + 1
+        return self._slots[idx]
+
+    def commit(self, ts: int) -> None:
+        """Publish the slot returned by the last :pymeth:`begin_write`."""
+        layout = self._layout
+        idx = self._head % layout.capacity
+        layout.slot_ts[idx] = ts
+        layout.slot_seq[idx] = self._head
+        self._head += 1
+        layout.header[_H_HEAD] = self._head
+
+    def close(self) -> None:
+        shm = self._layout.shm
+        self._slots = []
+        self._layout = None
+        shm.close()
+        shm.unlink()
+        _created.discard(shm.name)
+
+
+class SharedFrameReader:
+    """Read-only attachment to a `SharedFrameRing` owned by another process.
+
+    Frames are returned as read-only views into the segment, so a caller
+    must finish with a frame (or copy it) and then confirm it with
+    :pymeth:`valid` if it needs to know the frame wasn't overwritten meanwhile.
+    """
+
+    __slots__ = ("_layout", "_views", "_cursor", "overruns")
+
+    def __init__(self, name: str) -> None:
+        # the writer owns the segment's lifetime: keep the resource tracker
+        # from unlinking it when this (reader) process exits
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # a writer in this process holds the tracker's only entry for the name, and unregisters it on unlink
+            if shm.name not in _created:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        self._layout = _SharedFrameLayout(shm)
+
+        self._views = []
+        for i in range(self._layout.capacity):
+            slot = self._layout.slab[i]
+            slot.flags.writeable = False
+            self._views.append(memoryview(slot).cast("B").toreadonly())
+
+        self._cursor = self.head
+        self.overruns = 0
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._layout.shape
+
+    @property
+    def head(self) -> int:
+        return int(self._layout.header[_H_HEAD])
+
+    @property
+    def tail(self) -> int:
+        return int(self._layout.header[_H_TAIL])
+
+    def valid(self, seq: int) -> bool:
+        """True if frame *seq* is still intact in its slot."""
+        return int(self._layout.slot_seq[seq % self._layout.capacity]) == seq
+
+    def read(self, seq: int) -> Optional[Tuple[memoryview, int]]:
+        """Return (view, timestamp) of frame *seq*, or None if it isn't available."""
+        idx = seq % self._layout.capacity
+        if int(self._layout.slot_seq[idx]) != seq:
+            return None
+        ts = int(self._layout.slot_ts[idx])
+        # re-validate so the timestamp is known to belong to this frame
+        if int(self._layout.slot_seq[idx]) != seq:
+            return None
+        return self._views[idx], ts
+
+    def latest(self) -> Optional[Tuple[int, memoryview, int]]:
+        """Return (seq, view, timestamp) of the most recently committed frame."""
+        seq = self.head - 1
+        if seq < 0:
+            return None
+        record = self.read(seq)
+        return None if record is None else (seq, *record)
+
+    def follow(self, poll_interval: float = 0.001, timeout: Optional[float] = None) -> Iterator[Tuple[int, memoryview, int]]:
+        """Yield (seq, view, timestamp) for every new frame, skipping ahead after an overrun.
+
+        Stops once no new frame has been committed for *timeout* seconds (``None`` waits forever).
+        """
+        idle_since = time.monotonic()
+        while True:
+            head = self.head
+            if self._cursor >= head:
+                if timeout is not None and time.monotonic() - idle_since >= timeout:
+                    return
+                time.sleep(poll_interval)
+                continue
+            idle_since = time.monotonic()
+
+            tail = self.tail
+            if self._cursor < tail:
+                self.overruns += tail - self._cursor
+                self._cursor = tail
+
+            record = self.read(self._cursor)
+            if record is None:
+                # overwritten between the tail check and the read
+                self.overruns += 1
+            else:
+                yield (self._cursor, *record)
+            self._cursor += 1
+
+    def close(self) -> None:
+        self._views = []
+        shm = self._layout.shm
+        self._layout = None
+        shm.close()
@@ -0,0 +1,343 @@
+"""
+Hardware-free device backends for development, CI and benchmarking.
+
+Each simulator is a drop-in stand-in for the driver object its device
+wrapper normally holds, exposing the subset of the driver API that wrapper
+uses, and produces data at the rate the real hardware would:
+
+  * `SimulatedOTOS`    - `qwiic_otos.QwiicOTOS` (`Sensor`, ``sensor.backend: sim``)
+  * `SimulatedCapture` - `cv2.VideoCapture` on a live appsink (`Camera`, ``camera.backend: numpy``)
+  * `SimulatedPCM`     - `alsaaudio.PCM` in capture mode (`Microphone(..., backend="sim")`)
+
+Output is deterministic per device (seeded from the I2C address / camera
+ident), so runs are reproducible.  Blocking calls are paced against a
+monotonic deadline like a live source: a caller that falls behind gets the
+newest sample, and the skipped ones are counted in `dropped`.
+
+Usage
+-----
+sensor = Sensor(0x17, backend="sim", sim_rate_hz=400)
+camera = Camera(0, capture_id, 1280, 720, framerate=30, backend="numpy")
+mic = Microphone(10, 44100, 1, "S16_LE", 30, backend="sim")
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _wait_until(deadline_ns: int) -> None:
+    delay = deadline_ns - time.monotonic_ns()
+    if delay > 0:
+        time.sleep(delay / 1e9)
+
+
+# ---- odometry sensor
+
+
+@dataclass(slots=True)
+class Pose2D:
+    """mirrors `qwiic_otos.Pose2D`: linear units in inches, heading in degrees"""
+
+    x: float = 0.0
+    y: float = 0.0
+    h: float = 0.0
+
+
+class SimulatedOTOS:
+    """
+    Synthetic SparkFun OTOS tracking a ball rolling on the rig.
+
+    Velocity is a sum of two sinusoids per axis, so position, velocity and
+    acceleration are all closed-form functions of time and any sample can be
+    evaluated without integrating.  Like the real device, register values
+    only change once per internal sample period (`rate_hz`) and every read
+    costs one I2C transaction whose duration depends on the bytes read.
+
+    Parameters
+    ----------
+    address : int
+        I2C address, also seeds the trajectory so each sensor is distinct.
+    rate_hz : float
+        Internal sample rate of the simulated device.
+    bus_hz : float
+        Simulated I2C clock; a block read of N bytes holds the bus for
+        (3 + N) × 9 bit times (address + register write, restart, N data bytes).
+    noise : float
+        Standard deviation of the additive noise on every reported value.
+    """
+
+    def __init__(
+        self,
+        address: int,
+        rate_hz: float = 400.0,
+        bus_hz: float = 400_000.0,
+        noise: float = 0.01,
+    ) -> None:
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.address = address
+        self._period_ns = int(1e9 / rate_hz)
+        self._bit_s = 1.0 / bus_hz if bus_hz > 0 else 0.0
+        self._noise = noise
+        self._rng = random.Random(address)
+        # (amplitude in/s, angular frequency rad/s, phase) per velocity component
+        self._terms = [
+            [(self._rng.uniform(5.0, 20.0), self._rng.uniform(0.2, 2.0), self._rng.uniform(0, math.tau)) for _ in range(2)]
+            for _ in range(2)
+        ]
+        self._heading = (self._rng.uniform(10.0, 90.0), self._rng.uniform(0.05, 0.5))
+        self._origin_ns: Optional[int] = None
+
+    def is_connected(self) -> bool:
+        return True
+
+    def begin(self) -> bool:
+        self._origin_ns = time.monotonic_ns()
+        return True
+
+    def _axis(self, terms, t: float) -> Tuple[float, float, float]:
+        pos = vel = acc = 0.0
+        for amp, omega, phase in terms:
+            pos += amp / omega * (math.cos(phase) - math.cos(omega * t + phase))
+            vel += amp * math.sin(omega * t + phase)
+            acc += amp * omega * math.cos(omega * t + phase)
+        return pos, vel, acc
+
+    def _block_read(self, nbytes: int) -> float:
+        """hold the simulated bus for one block read, returns the sample time the registers hold"""
+        if self._origin_ns is None:
+            self.begin()
+        if self._bit_s > 0:
+            time.sleep((3 + nbytes) * 9 * self._bit_s)
+        # registers hold the most recent internal sample
+        ticks = (time.monotonic_ns() - self._origin_ns) // self._period_ns
+        return ticks * self._period_ns / 1e9
+
+    def read_pose(self) -> Tuple[float, float, float]:
+        """the `OtosPoseReader` path: 6-byte position read as plain floats"""
+        t = self._block_read(6)
+        px = self._axis(self._terms[0], t)[0]
+        py = self._axis(self._terms[1], t)[0]
+        h_amp, h_omega = self._heading
+        gauss = self._rng.gauss
+        noise = self._noise
+        return px + gauss(0, noise), py + gauss(0, noise), h_amp * math.sin(h_omega * t) + gauss(0, noise)
+
+    def getPosVelAcc(self) -> Tuple[Pose2D, Pose2D, Pose2D]:
+        t = self._block_read(18)
+
+        px, vx, ax = self._axis(self._terms[0], t)
+        py, vy, ay = self._axis(self._terms[1], t)
+        h_amp, h_omega = self._heading
+        ph = h_amp * math.sin(h_omega * t)
+        vh = h_amp * h_omega * math.cos(h_omega * t)
+        ah = -h_amp * h_omega * h_omega * math.sin(h_omega * t)
+
+        gauss = self._rng.gauss
+        noise = self._noise
+        return (
+            Pose2D(px + gauss(0, noise), py + gauss(0, noise), ph + gauss(0, noise)),
+            Pose2D(vx + gauss(0, noise), vy + gauss(0, noise), vh + gauss(0, noise)),
+            Pose2D(ax + gauss(0, noise), ay + gauss(0, noise), ah + gauss(0, noise)),
+        )
+
+
+# ---- camera
+
+# `cv2.CAP_PROP_POS_MSEC`, without requiring OpenCV
+CAP_PROP_POS_MSEC = 0
+
+
+class SimulatedCapture:
+    """
+    NumPy frame source with the `cv2.VideoCapture` read API of a live appsink.
+
+    Frames are a scrolling gradient with a bright bar, rendered by copying a
+    window of a precomputed pattern, so producing a frame costs one memcpy.
+    The frame number is stamped little-endian into the first 8 bytes of every
+    frame, letting a receiver detect gaps end to end.  Like an appsink,
+    ``get(CAP_PROP_POS_MSEC)`` reports the running time of the last grabbed
+    frame: when it was due, not when it was read.
+
+    Parameters
+    ----------
+    width, height : int
+        Frame size in pixels.
+    fps : float
+        Frame rate; `grab()` blocks until the next frame is due.
+    channels : int
+        1 for GRAY8 frames of shape (height, width), 3 for BGR (height, width, 3).
+    seed : int
+        Offsets the pattern so each simulated camera is distinct.
+    """
+
+    def __init__(self, width: int, height: int, fps: float, channels: int = 1, seed: int = 0) -> None:
+        if channels not in (1, 3):
+            raise ValueError("channels must be 1 (GRAY8) or 3 (BGR)")
+        self.width = width
+        self.height = height
+        self.shape = (height, width) if channels == 1 else (height, width, channels)
+        self._period_ns = int(1e9 / fps)
+
+        # two frame widths of pattern, scrolled a few pixels per frame
+        cols = (np.arange(2 * width) * 255 // max(2 * width - 1, 1)).astype(np.uint8)
+        cols[(np.arange(2 * width) + seed * 97) % width < max(width // 16, 1)] = 255
+        pattern = np.broadcast_to(cols, (height, 2 * width))
+        if channels == 3:
+            pattern = np.stack([pattern, pattern[:, ::-1], pattern], axis=-1)
+        self._pattern = np.ascontiguousarray(pattern)
+        self._step = max(width // 120, 1)
+
+        self._opened = True
+        self._next_ns: Optional[int] = None
+        self._origin_ns: Optional[int] = None
+        self._pts_ns = 0
+        self.frames = 0
+        self.dropped = 0
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def release(self) -> None:
+        self._opened = False
+
+    def grab(self) -> bool:
+        """block until the next frame is due, skipping any deadlines already missed"""
+        if not self._opened:
+            return False
+        now = time.monotonic_ns()
+        if self._next_ns is None:
+            self._next_ns = self._origin_ns = now
+        elif now - self._next_ns >= self._period_ns:
+            # a live source doesn't queue frames for a slow reader
+            missed = (now - self._next_ns) // self._period_ns
+            self.dropped += missed
+            self.frames += missed
+            self._next_ns += missed * self._period_ns
+        _wait_until(self._next_ns)
+        self._pts_ns = self._next_ns - self._origin_ns
+        self._next_ns += self._period_ns
+        self.frames += 1
+        return True
+
+    def get(self, prop_id: int) -> float:
+        """``CAP_PROP_POS_MSEC`` (0) is the running time of the last grabbed frame; other properties read 0"""
+        return self._pts_ns / 1e6 if prop_id == CAP_PROP_POS_MSEC else 0.0
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """render the most recently grabbed frame, into `image` when its shape matches"""
+        if not self._opened or self.frames == 0:
+            return False, None
+        if image is None or image.shape != self.shape or image.dtype != np.uint8:
+            image = np.empty(self.shape, dtype=np.uint8)
+        offset = (self.frames * self._step) % self.width
+        np.copyto(image, self._pattern[:, offset:offset + self.width])
+        image.reshape(-1)[:8] = np.frombuffer((self.frames - 1).to_bytes(8, "little"), dtype=np.uint8)
+        return True, image
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+
+def frame_number(frame) -> int:
+    """recover the frame number a `SimulatedCapture` stamped into `frame`"""
+    return int.from_bytes(bytes(memoryview(frame).cast("B")[:8]), "little")
+
+
+# ---- microphone
+
+# sample dtype and DC offset per ALSA format name
+_PCM_FORMATS = {
+    "S16_LE": (np.dtype("<i2"), 0),
+    "U8": (np.dtype("u1"), 128),
+    "S32_LE": (np.dtype("<i4"), 0),
+}
+
+
+class SimulatedPCM:
+    """
+    Synthetic capture PCM with the `alsaaudio.PCM.read()` API.
+
+    Produces a tone plus low-level noise, one period of `periodsize` frames
+    per `read()`, blocking until the period would have been captured.  One
+    second of interleaved samples is rendered up front, so a read is a slice
+    of that buffer.
+
+    Parameters
+    ----------
+    channels : int
+        Interleaved channel count.
+    rate : int
+        Sample rate in Hz.
+    format_str : str
+        ALSA sample format name, one of ``S16_LE``, ``U8`` or ``S32_LE``.
+    periodsize : int
+        Frames returned per `read()`.
+    tone_hz : float
+        Frequency of the synthetic tone.
+    amplitude : float
+        Tone amplitude as a fraction of full scale.
+    """
+
+    formats = tuple(_PCM_FORMATS)
+
+    def __init__(
+        self,
+        channels: int,
+        rate: int,
+        format_str: str,
+        periodsize: int,
+        tone_hz: float = 440.0,
+        amplitude: float = 0.25,
+    ) -> None:
+        if format_str not in _PCM_FORMATS:
+            raise ValueError(f"Unsupported audio format string: {format_str}")
+        dtype, offset = _PCM_FORMATS[format_str]
+        self.periodsize = periodsize
+        self._period_ns = int(periodsize * 1e9 / rate)
+
+        full_scale = (np.iinfo(dtype).max - np.iinfo(dtype).min) / 2
+        t = np.arange(rate) / rate
+        rng = np.random.default_rng(0)
+        signal = amplitude * np.sin(2 * np.pi * tone_hz * t) + rng.normal(0, 0.01, rate)
+        samples = (np.clip(signal, -1.0, 1.0) * (full_scale - 1) + offset).astype(dtype)
+        # one second of interleaved frames, with a period of wraparound so reads never split
+        interleaved = np.repeat(samples, channels)
+        wrap = periodsize * channels
+        self._pcm = np.concatenate([interleaved, interleaved[:wrap]]).tobytes()
+        self._frame_bytes = dtype.itemsize * channels
+        self._second_frames = rate
+
+        self._cursor = 0
+        self._next_ns: Optional[int] = None
+        self.dropped = 0
+
+    def read(self) -> Tuple[int, bytes]:
+        now = time.monotonic_ns()
+        if self._next_ns is None:
+            self._next_ns = now
+        elif now - self._next_ns >= self._period_ns:
+            # overrun: the periods a slow reader missed are lost, as with ALSA
+            missed = (now - self._next_ns) // self._period_ns
+            self.dropped += missed
+            self._cursor = (self._cursor + missed * self.periodsize) % self._second_frames
+            self._next_ns += missed * self._period_ns
+        self._next_ns += self._period_ns
+        _wait_until(self._next_ns)
+
+        start = self._cursor * self._frame_bytes
+        data = self._pcm[start:start + self.periodsize * self._frame_bytes]
+        self._cursor = (self._cursor + self.periodsize) % self._second_frames
+        return self.periodsize, data
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,130 @@
+"""
+Socket factory applying the per-stream tuning profiles from settings.yaml.
+
+Every device link is created here rather than with a bare `socket.socket`,
+so its options come from the ``sockets`` section of settings.yaml:
+
+  * ``control`` - gateway, handshake and BMI connections
+  * ``sensor``  - sensor data streams: small frames, latency bound
+  * ``camera``  - camera data streams: large frames, throughput bound
+
+Buffer sizes are applied before connect/listen, so the TCP window scale is
+negotiated for them.  The kernel may grant less than requested (sizes are
+capped by ``net.core.wmem_max``/``rmem_max``, and Linux reports double the
+requested size to account for bookkeeping), so the effective values are read
+back and logged, with a warning when a request wasn't met.
+
+Usage
+-----
+sock = connect((ip, port), cfg.sockets.sensor, "sensor0")
+listener = listen(port, cfg.sockets.camera, "camera0")
+apply_profile(conn, cfg.sockets.camera, "camera0")
+"""
+
+from __future__ import annotations
+
+import socket
+import sys
+from typing import Dict, Tuple
+
+from loguru import logger
+
+from .config import SocketProfile
+from .utils import safe_unwrap_exception
+
+# not exported by the socket module on every Python version
+SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46)
+
+
+def set_keepalive(sock, idle_s: int = 1, interval_s: int = 3, count: int = 5) -> None:
+    """
+    Enable TCP keepalive on a socket.
+
+    Probing starts after `idle_s` seconds of idleness and repeats every
+    `interval_s` seconds; the connection is dropped after `count` failed
+    probes.  The timing options are Linux-specific and skipped elsewhere.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle_s)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval_s)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+
+
+def effective_options(sock) -> Dict[str, int]:
+    """socket options as granted by the kernel"""
+    options = {
+        "nodelay": sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY),
+        "sndbuf": sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+        "rcvbuf": sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+        "keepalive": sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE),
+    }
+    if sys.platform.startswith("linux"):
+        options["busy_poll_us"] = sock.getsockopt(socket.SOL_SOCKET, SO_BUSY_POLL)
+    return options
+
+
+def apply_profile(sock, profile: SocketProfile, name: str, log: bool = True) -> Dict[str, int]:
+    """
+    Apply `profile` to `sock` and return the effective option values.
+
+    Options the kernel refuses (e.g. busy polling without CAP_NET_ADMIN) are
+    logged and skipped rather than failing the connection.
+    """
+    requested = []
+    if profile.nodelay:
+        requested.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1, "nodelay"))
+    if profile.sndbuf > 0:
+        requested.append((socket.SOL_SOCKET, socket.SO_SNDBUF, profile.sndbuf, "sndbuf"))
+    if profile.rcvbuf > 0:
+        requested.append((socket.SOL_SOCKET, socket.SO_RCVBUF, profile.rcvbuf, "rcvbuf"))
+    if profile.busy_poll_us > 0 and sys.platform.startswith("linux"):
+        requested.append((socket.SOL_SOCKET, SO_BUSY_POLL, profile.busy_poll_us, "busy_poll_us"))
+
+    for level, option, value, label in requested:
+        try:
+            sock.setsockopt(level, option, value)
+        except OSError as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.warning(f"{name} socket refused {label}={value}: {exmsg}")
+    if profile.keepalive:
+        try:
+            set_keepalive(sock, profile.keepalive_idle_s, profile.keepalive_interval_s, profile.keepalive_count)
+        except OSError as ex:
+            exmsg = safe_unwrap_exception(ex)
+            logger.warning(f"{name} socket refused keepalive: {exmsg}")
+
+    effective = effective_options(sock)
+    if log:
+        logger.info(f"{name} socket options: " + ", ".join(f"{key}={value}" for key, value in effective.items()))
+        for label, wanted in (("sndbuf", profile.sndbuf), ("rcvbuf", profile.rcvbuf), ("busy_poll_us", profile.busy_poll_us)):
+            granted = effective.get(label)
+            if wanted > 0 and granted is not None and granted < wanted:
+                logger.warning(f"{name} socket {label} granted {granted} of {wanted} requested, check the kernel limits")
+    return effective
+
+
+def connect(address: Tuple[str, int], profile: SocketProfile, name: str) -> socket.socket:
+    """open a TCP connection to `address` with `profile` applied before connecting"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        apply_profile(sock, profile, name)
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def listen(port: int, profile: SocketProfile, name: str) -> socket.socket:
+    """bind and listen on `port` (0 for any free port); accepted connections inherit `profile`"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        apply_profile(sock, profile, name, log=False)
+        sock.bind(("", port))
+        sock.listen()
+    except OSError:
+        sock.close()
+        raise
+    return sock
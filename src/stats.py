@@ -0,0 +1,104 @@
+"""
+Ingestor-side arrival latency statistics.
+
+When ``ingestor.latency_stats`` is enabled, the Ingestor compares the
+timestamp each sender embedded in a sample or frame with the time the
+sample reaches its writer, and dumps per-stream percentiles to
+``latency.json`` in the session directory when it stops.
+
+Sensor timestamps are epoch milliseconds and camera timestamps epoch
+nanoseconds, both from the sender's `clock`.  Once a stream's clock sync
+(`clock_sync`) has completed an exchange, the Ingestor rewrites its
+timestamps into its own time base before they get here, so the latency is
+the true capture → writer time: network transit plus queueing in both
+processes.  Each synced stream also records its ping round-trip times as
+``<stream>.rtt``; until the first exchange, and for streams without clock
+sync, latencies across hosts include the offset between the hosts' clocks.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from array import array
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+from .clock import clock
+
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+class LatencyRecorder:
+    """
+    Per-stream latency samples in milliseconds.
+
+    Parameters
+    ----------
+    max_samples : int
+        Samples kept per stream; later samples are still counted but not kept,
+        so memory stays bounded on long sessions.
+    """
+
+    __slots__ = ("_max_samples", "_samples", "_counts", "_started")
+
+    def __init__(self, max_samples: int = 1 << 22) -> None:
+        self._max_samples = max_samples
+        self._samples: Dict[str, array] = {}
+        self._counts: Dict[str, int] = {}
+        self._started = time.monotonic()
+
+    def _stream(self, stream: str) -> array:
+        samples = self._samples.get(stream)
+        if samples is None:
+            samples = self._samples[stream] = array("d")
+            self._counts[stream] = 0
+        return samples
+
+    def record_epoch_ms(self, stream: str, sent_ms: Iterable[float]) -> None:
+        """record samples stamped with epoch milliseconds"""
+        now_ms = clock.now_ms()
+        samples = self._stream(stream)
+        count = 0
+        for ts in sent_ms:
+            if len(samples) < self._max_samples:
+                samples.append(now_ms - ts)
+            count += 1
+        self._counts[stream] += count
+
+    def record_epoch_ns(self, stream: str, sent_ns: int) -> None:
+        """record one sample stamped with epoch nanoseconds"""
+        samples = self._stream(stream)
+        if len(samples) < self._max_samples:
+            samples.append((clock.now_ns() - sent_ns) / 1e6)
+        self._counts[stream] += 1
+
+    def record_ms(self, stream: str, latency_ms: float) -> None:
+        """record one already measured latency"""
+        samples = self._stream(stream)
+        if len(samples) < self._max_samples:
+            samples.append(latency_ms)
+        self._counts[stream] += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        elapsed = time.monotonic() - self._started
+        summary = {}
+        for stream, samples in self._samples.items():
+            values = np.frombuffer(samples, dtype=np.float64) if len(samples) else np.zeros(1)
+            p50, p99, p999 = np.percentile(values, PERCENTILES)
+            summary[stream] = {
+                "count": self._counts[stream],
+                "rate_per_s": self._counts[stream] / elapsed if elapsed > 0 else 0.0,
+                "latency_ms": {
+                    "p50": float(p50),
+                    "p99": float(p99),
+                    "p99.9": float(p999),
+                    "max": float(values.max()),
+                },
+            }
+        return summary
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as outfile:
+            json.dump(self.summary(), outfile, indent=2)